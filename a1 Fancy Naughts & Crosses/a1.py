@@ -1,9 +1,23 @@
 """ A fancy tic-tac-toe game for CSSE1001/7030 A1. """
+import sys
+from bisect import insort
+from functools import lru_cache
+from typing import Callable, Generator, Iterable, TypeVar
 from constants import *
+from bitboard import DIRECTIONS, LINE_MASKS, BitBoard, line_masks, pieces_mask
 
 Board = list[list[str]]
 Pieces = list[int]
 Move = tuple[int, int, int] # (row, column, piece size)
+Reader = Callable[[str], str] # Reads one answer after a prompt, like input()
+Renderer = Callable[[Board, Pieces, Pieces], None] # Displays like print_game
+# Chooses a move for a player, called as agent(state, player); None passes.
+# ... An agent may also have an end_game() method, called once a game is over
+Agent = Callable[['GameState', str], 'Move | None']
+# A conversation with the user which yields each prompt, is sent the answer
+# ... and finally returns a value; see answer_prompts
+T = TypeVar('T')
+Prompts = Generator[str, str, T]
 
 
 def num_hours() -> float:
@@ -25,14 +39,102 @@ def generate_initial_pieces(num_pieces: int) -> Pieces:
     return list(range(1, num_pieces+1))
 
 
-def initial_state() -> Board:
+class GameConfig:
+    '''
+    The geometry of one variant of the game, with the tables derived from it,
+    so games of different sizes can run side by side in one process. Shared
+    instances come from game_config().
+    '''
+    def __init__(self, grid_size: int = GRID_SIZE,
+                 pieces_per_player: int = PIECES_PER_PLAYER,
+                 win_length: int | None = None) -> None:
+        '''
+        Inputs
+            grid_size: The number of rows (and columns), from 2 to 8 (type int)
+            pieces_per_player: The number of pieces of each player (type int)
+            win_length: The number of cells in a row which wins, from 1 to
+            ... grid_size; None for a whole row, column or diagonal
+            ... (type int | None)
+        '''
+        if grid_size not in LINE_MASKS:
+            raise ValueError(f'Unsupported grid size: {grid_size}')
+        self.grid_size = grid_size
+        self.pieces_per_player = pieces_per_player
+        self.win_length = win_length or grid_size
+        
+        # The answers process_move accepts for a row or column and a size
+        self.coordinate_labels = frozenset(str(i) 
+                                           for i in range(1, grid_size + 1))
+        self.size_labels = frozenset(str(i) 
+                                     for i in range(1, pieces_per_player + 1))
+        
+        # Every line a player wins by owning (a whole row, column or diagonal,
+        # ... or win_length cells in a row along one) as a bitmask and as
+        # ... cell indices, and the lines through every cell
+        self.line_masks = line_masks(grid_size, self.win_length)
+        self.lines = tuple(tuple(index for index in range(grid_size ** 2) 
+                                 if line >> index & 1) 
+                           for line in self.line_masks)
+        self.cell_lines = tuple(tuple(k for k, line in enumerate(self.lines)
+                                      if index in line)
+                                for index in range(grid_size ** 2))
+
+    def initial_state(self) -> Board:
+        '''
+        Outputs
+            Returns a new board where every cell contains EMPTY (type Board)
+        '''
+        return [[EMPTY] * self.grid_size for _ in range(self.grid_size)]
+
+    def initial_pieces(self) -> Pieces:
+        '''
+        Outputs
+            Returns one player's pieces at the start of a game (type Pieces)
+        '''
+        return generate_initial_pieces(self.pieces_per_player)
+
+    def __repr__(self) -> str:
+        if self.win_length == self.grid_size:
+            return f'GameConfig({self.grid_size}, {self.pieces_per_player})'
+        return (f'GameConfig({self.grid_size}, {self.pieces_per_player}, '
+                f'{self.win_length})')
+
+
+@lru_cache(maxsize=None)
+def game_config(grid_size: int, pieces_per_player: int,
+                win_length: int | None = None) -> GameConfig:
+    '''
+    Inputs
+        grid_size: The number of rows (and columns), from 2 to 8 (type int)
+        pieces_per_player: The number of pieces of each player (type int)
+        win_length: The number of cells in a row which wins, the whole line
+        ... if None (type int | None)
+    Outputs
+        Returns the configuration of that variant, built once and shared by
+        ... every game of it (type GameConfig)
+    '''
+    return GameConfig(grid_size, pieces_per_player, win_length)
+
+
+def default_config() -> GameConfig:
     '''
     Inputs: No input
+    Outputs
+        Returns the configuration given by GRID_SIZE and PIECES_PER_PLAYER,
+        ... which functions below use when given none (type GameConfig)
+    '''
+    return game_config(GRID_SIZE, PIECES_PER_PLAYER)
+
+
+def initial_state(config: GameConfig | None = None) -> Board:
+    '''
+    Inputs
+        config: The variant of the game, default_config() if None
+        ... (type GameConfig | None)
     Outputs 
         Returns a new board where every cell contains EMPTY (type Board)
     '''
-    # List comprehension is used to avoid shallow copy
-    return [[EMPTY] * GRID_SIZE for _ in range(GRID_SIZE)]
+    return (config or default_config()).initial_state()
 
 
 def place_piece(board: Board, player: str, pieces_available: Pieces, 
@@ -50,7 +152,10 @@ def place_piece(board: Board, player: str, pieces_available: Pieces,
     
     if player in [NAUGHT, CROSS]:
         # adding the piece to the position "move" on the board
-        board[row][col] = player + str(size)
+        if isinstance(board, BitBoard):
+            board.place(player, move)
+        else:
+            board[row][col] = player + str(size)
         
         # remove the piece from "pieces_available"
         pieces_available.remove(size)
@@ -58,6 +163,37 @@ def place_piece(board: Board, player: str, pieces_available: Pieces,
     return None
 
 
+def render_game(board: Board, naught_pieces: Pieces, cross_pieces: Pieces
+                ) -> str:
+    '''
+    Inputs
+        board: A squared board of cells which may contain pieces (type Board)
+        naught_peices: The available peices of player NAUGHT (type Pieces)
+        cross_peices: The available peices of player CROSS (type Pieces)
+    Outputs
+        Returns the text print_game displays, as one string (type str)
+    '''
+    grid_size = len(board)
+    
+    # The players' pieces
+    lines = ["O has: " + ', '.join(str(i) for i in naught_pieces),
+             "X has: " + ', '.join(str(i) for i in cross_pieces),
+             ""]
+    
+    # A well-formatted board which has (2 + 2*GRID_SIZE) rows: the column
+    # ... indices, then "---"-formatted row splitters around every row of cells
+    splitter = EMPTY + '-'*grid_size*3
+    lines.append(EMPTY + ''.join(' ' + str(i) + ' ' for i in 
+                                 range(1, grid_size)) + ' ' + str(grid_size))
+    lines.append(splitter)
+    for row in range(grid_size):
+        lines.append(f"{row + 1}|" + ''.join(f"{cell}|" for cell in board[row]))
+        lines.append(splitter)
+    lines.append("")
+    
+    return '\n'.join(lines)
+
+
 def print_game(board: Board, naught_pieces: Pieces, cross_pieces: Pieces
                ) -> None:
     '''
@@ -68,68 +204,43 @@ def print_game(board: Board, naught_pieces: Pieces, cross_pieces: Pieces
     Outputs
         Prints something; Returns None
     '''
-    # Display the players' pieces
-    O_pieces = [str(i) for i in naught_pieces]
-    X_pieces = [str(i) for i in cross_pieces]
-    print("O has:", ', '.join(O_pieces))
-    print("X has:", ', '.join(X_pieces))
-    print()
-    
-    # Prepare board display by flattening a 2D board (type Board) to a 1D list
-    flattened = [item for sublist in board for item in sublist]
-    i = 1
-    
-    # Display a well-formatted board which has (2 + 2*GRID_SIZE) printed rows  
-    while i <= 2 + 2*GRID_SIZE:
-        
-        # The first row displays the column indices
-        if i == 1:
-            i += 1
-            elements = [EMPTY] + [' ' + str(i) + ' ' for i in \
-                                  range(1, GRID_SIZE)]
-            elements += [' ' + str(GRID_SIZE)]
-            print(''.join(elements))
-        
-        # The even-indexed rows displays the "---"-formated row splitters
-        elif i % 2 == 0:
-            i += 1
-            print(EMPTY + '-'*GRID_SIZE*3)
-        
-        # The odd-indexed rows displays the cells where Pieces may be in place
-        else:
-            i += 1
-            row = int((i-1)/2)
-            start, end = (row - 1) * GRID_SIZE, row * GRID_SIZE - 1 
-            print(f"{row}|", end='')
-            for j in range(GRID_SIZE - 1):
-                print(f"{flattened[start + j]}|", end='')
-            print(f"{flattened[end]}|")
+    # The whole frame is built first and written at once, so stdout sees a
+    # ... single write however big the board is
+    sys.stdout.write(render_game(board, naught_pieces, cross_pieces))
     
     return None
 
 
-def process_move(move: str) -> Move | None:
+def process_move(move: str, config: GameConfig | None = None
+                 ) -> Move | None:
     '''
     Inputs
         move: An instruction of a on-board move (type str)
+        config: The variant of the game, default_config() if None
+        ... (type GameConfig | None)
     Outputs
         If move correctly formatted: Returns its (row, column, piece size) 
         ... (type Move)
         Otherwise: Prints something; Returns None
     '''
+    # identify invalid format by length and space/non-space characters
+    # ... (the length is checked first so that short input cannot crash)
+    if len(move) != 5:
+        print(INVALID_FORMAT_MESSAGE)
+        return None
     row, col, size = move[0], move[2], move[4]
+    config = config or default_config()
     
-    # identify invalid format by length and space/non-space characters             
-    if len(move) != 5 or not (all(i != ' ' for i in [row, col, size]) and \
-                              move[1] == ' ' and move[3] == ' '):
+    if not (all(i != ' ' for i in [row, col, size]) and \
+            move[1] == ' ' and move[3] == ' '):
         print(INVALID_FORMAT_MESSAGE)
     
     # identify invalid rows, columns, or sizes
-    elif row not in [str(i) for i in range(1, GRID_SIZE + 1)]:
+    elif row not in config.coordinate_labels:
         print(INVALID_ROW_MESSAGE)
-    elif col not in [str(i) for i in range(1, GRID_SIZE + 1)]:
+    elif col not in config.coordinate_labels:
         print(INVALID_COLUMN_MESSAGE)
-    elif size not in [str(i) for i in range(1, PIECES_PER_PLAYER + 1)]:
+    elif size not in config.size_labels:
         print(INVALID_SIZE_MESSAGE)
     
     # return Move of valid format after converting it from str to tuple
@@ -138,31 +249,86 @@ def process_move(move: str) -> Move | None:
         return (row, col, size)
 
 
-def get_player_move() -> Move:
+def move_prompts(config: GameConfig | None = None) -> Prompts[Move]:
     '''
     Inputs
-        No input as parameters
-        prompt: User's input indicating a move on-board (type int)
+        config: The variant of the game, default_config() if None
+        ... (type GameConfig | None)
     Outputs
-        If prompt is "h" or "H": Prints something and Returns function
-        ... get_player_move() (type Move)
-        If prompt is format-validated by function process_move(): Returns the 
-        ... move (type Move)
-        Otherwise: Returns function get_player_move() (type Move)
+        Yields the prompt for a move and is sent the user's answer
+        If the answer is "h" or "H": Prints something and prompts again
+        If the answer is format-validated by function process_move(): Returns
+        ... the move (type Move)
+        Otherwise: Prompts again until a correctly formatted move is entered
     '''
-    prompt = input("Enter your move: ")
-    
-    if prompt in ["h", "H"]:
-        print(HELP_MESSAGE)
-        return get_player_move()
-    else:
+    while True:
+        prompt = yield "Enter your move: "
+        
+        if prompt in ["h", "H"]:
+            print(HELP_MESSAGE)
+            continue
+        
         # Returns correctly formatted move (type Move) or Prints error message
-        # ... for the incorrectly formatted
-        if process_move(prompt):
-            return process_move(prompt)
-        # Re-prompts user for a correctly formatted if current one is incorrect
-        else:
-            return get_player_move()
+        # ... for the incorrectly formatted and re-prompts the user
+        move = process_move(prompt, config)
+        if move:
+            return move
+
+
+def answer_prompts(prompts: Prompts[T], read: Reader = input) -> T:
+    '''
+    Inputs
+        prompts: A conversation with the user (type Prompts)
+        read: Reads the user's answer to each prompt, input() by default
+        ... (type Reader)
+    Outputs
+        Returns the value the conversation ends with (type T)
+    '''
+    try:
+        prompt = next(prompts)
+        while True:
+            prompt = prompts.send(read(prompt))
+    except StopIteration as finished:
+        return finished.value
+
+
+def get_player_move(read: Reader = input, config: GameConfig | None = None
+                    ) -> Move:
+    '''
+    Inputs
+        read: Reads the user's answer to a prompt, input() by default
+        ... (type Reader)
+        config: The variant of the game, default_config() if None
+        ... (type GameConfig | None)
+    Outputs
+        Prompts until a correctly formatted move is entered, as described
+        ... in move_prompts(); Returns the move (type Move)
+    '''
+    return answer_prompts(move_prompts(config), read)
+
+
+def line_reader(lines: Iterable[str], echo: bool = False) -> Reader:
+    '''
+    Inputs
+        lines: Answers to the prompts, e.g. a list or an open file (type
+        ... Iterable[str])
+        echo: Whether to print each answer after its prompt, as a terminal
+        ... shows it (type bool)
+    Outputs
+        Returns a replacement for input() which answers prompts from lines
+        ... and raises EOFError once they run out (type Reader)
+    '''
+    answers = iter(lines)
+    
+    def read(prompt: str = '') -> str:
+        answer = next(answers, None)
+        if answer is None:
+            raise EOFError
+        answer = answer.rstrip('\r\n')
+        print(prompt + answer if echo else prompt, end='\n' if echo else '')
+        return answer
+    
+    return read
 
 
 def check_move(board: Board, pieces_available: Pieces, move: Move) -> bool:
@@ -176,6 +342,10 @@ def check_move(board: Board, pieces_available: Pieces, move: Move) -> bool:
     '''
     row, col, size = move
     
+    # A bitboard compares the sizes without parsing any string
+    if isinstance(board, BitBoard):
+        return size in pieces_available and board.can_place(move)
+    
     # A move is valid only when the size is available, and (row, column) is
     # ... empty or containing a smaller piece
     if size in pieces_available and (board[row][col] == EMPTY or 
@@ -185,21 +355,31 @@ def check_move(board: Board, pieces_available: Pieces, move: Move) -> bool:
         return False
 
 
-def check_win(board: Board) -> str | None:
+def check_win(board: Board, win_length: int | None = None) -> str | None:
     '''
     Inputs
         board: A squared board of cells which may contain pieces (type Board)
+        win_length: The number of cells in a row which wins, a whole row,
+        ... column or diagonal if None (type int | None)
     Outputs
         If there is a winner: Returns winner (type str)
         Otherwise: Returns None
     '''
+    if isinstance(board, BitBoard):
+        return board.winner(win_length)
+    
+    # Runs shorter than the board are matched against every window of them
+    if win_length is not None and win_length != len(board):
+        return BitBoard.from_board(board).winner(win_length)
+    
     # board with cells containing players only, its transpose, its diagnoal,
     # ... and its reverse diagonal
+    grid_size = len(board)
     who = [[cell[0] for cell in row] for row in board]
-    who_transpose = [[who[i][j] for i in range(GRID_SIZE)] for j in 
-                     range(GRID_SIZE)]
-    diag = [who[i][i] for i in range(GRID_SIZE)]
-    rev_diag = [who[i][GRID_SIZE - 1 - i] for i in range(GRID_SIZE)]
+    who_transpose = [[who[i][j] for i in range(grid_size)] for j in 
+                     range(grid_size)]
+    diag = [who[i][i] for i in range(grid_size)]
+    rev_diag = [who[i][grid_size - 1 - i] for i in range(grid_size)]
     
     # Only in the following cases a winner exists
     winner = None
@@ -212,7 +392,7 @@ def check_win(board: Board) -> str | None:
     elif all(k == rev_diag[0] for k in rev_diag) and rev_diag[0] != ' ':
         winner = rev_diag[0]
     else:
-        for i in range(GRID_SIZE):
+        for i in range(grid_size):
             
             # Detects if a player occupies a row
             if all(m == who[i][0] for m in who[i]) and who[i][0] != ' ':
@@ -236,10 +416,14 @@ def check_stalemate(board: Board, naught_pieces: Pieces, cross_pieces: Pieces
     Outputs
         Whether stalemate (no more moves can be made) is reached (type bool)
     '''
+    if isinstance(board, BitBoard):
+        return board.is_stalemate(pieces_mask(naught_pieces),
+                                  pieces_mask(cross_pieces))
+    
     # Extract the piece size of each cell on board
     sizes = []
-    for i in range(GRID_SIZE):
-        for j in range(GRID_SIZE):
+    for i in range(len(board)):
+        for j in range(len(board)):
             if board[i][j] == EMPTY:
                 sizes += [0]
             else:
@@ -263,99 +447,368 @@ def check_stalemate(board: Board, naught_pieces: Pieces, cross_pieces: Pieces
     return stalemate
 
 
-def main() -> None:
+class GameState:
     '''
-    Inputs: No input
+    A board with both players' pieces which keeps, for every row, column and
+    diagonal, how many cells each player owns, and how many cells hold each
+    piece size. A win is then read off the lines through the last move and a
+    stalemate off the smallest size on the board, without rescanning it.
+    
+    When a shorter run than a whole line wins, the runs through the last
+    move are measured instead: up to win_length - 1 cells each way along
+    each direction, whatever the size of the board.
+    
+    Every cell also keeps the stack of pieces placed on it, and every move
+    is journalled, so undo() takes it back and redo() plays it again in
+    constant time, without copying the board: search can make and unmake
+    moves on one state.
+    '''
+    def __init__(self, config: GameConfig | None = None) -> None:
+        '''
+        Inputs
+            config: The variant of the game, default_config() if None
+            ... (type GameConfig | None)
+        '''
+        self.config = config = config or default_config()
+        self.grid_size = grid_size = config.grid_size
+        self.win_length = config.win_length
+        self.board = config.initial_state()
+        self.naught_pieces = config.initial_pieces()
+        self.cross_pieces = config.initial_pieces()
+        self.last_move = None
+        
+        # Cells owned by each player on every line; the lines through every
+        # ... cell come precomputed with the configuration
+        self._owned = {NAUGHT: [0] * len(config.lines), 
+                       CROSS: [0] * len(config.lines)}
+        # ... (none are kept when a shorter run wins)
+        self._cell_lines = config.cell_lines \
+            if self.win_length == grid_size else ((),) * grid_size ** 2
+        
+        # Number of cells holding each size (0 for an empty cell); sizes on a
+        # ... cell only grow, so the smallest one never moves backwards
+        self._size_counts = [grid_size ** 2] + \
+            [0] * config.pieces_per_player
+        self._min_size = 0
+        
+        # The pieces on every cell, row by row, as (player, size) from the
+        # ... bottom up; board shows the top of each
+        self.stacks = [[] for _ in range(grid_size ** 2)]
+        # The moves played, each with what undoing it restores:
+        # ... (player, move, last_move before it, _min_size before it), and
+        # ... the moves undone, latest last, until another move is played
+        self._journal = []
+        self._undone = []
+
+    def pieces_of(self, player: str) -> Pieces:
+        '''
+        Inputs
+            player: NAUGHT or CROSS (type str)
+        Outputs
+            Returns the available pieces of player (type Pieces)
+        '''
+        return self.naught_pieces if player == NAUGHT else self.cross_pieces
+
+    def check_move(self, player: str, move: Move) -> bool:
+        '''
+        Inputs
+            player: NAUGHT or CROSS (type str)
+            move: Place a piece of (size) on (row, column) on board (type Move)
+        Outputs
+            Whether the move is valid for player (type bool)
+        '''
+        return check_move(self.board, self.pieces_of(player), move)
+
+    def place_piece(self, player: str, move: Move) -> None:
+        '''
+        Inputs
+            player: NAUGHT or CROSS (type str)
+            move: A valid move of player (type Move)
+        Outputs
+            Places the piece and forgets the moves undone; Returns None
+        '''
+        self._undone.clear()
+        self._make(player, move)
+
+    def _make(self, player: str, move: Move) -> None:
+        '''
+        Inputs
+            player: NAUGHT or CROSS (type str)
+            move: A valid move of player (type Move)
+        Outputs
+            Places the piece and journals the move; Returns None
+        '''
+        self._journal.append((player, move, self.last_move, self._min_size))
+        row, col, size = move
+        covered = self.board[row][col]
+        lines = self._cell_lines[row * self.grid_size + col]
+        
+        # Move the cell's lines from its previous owner (if any) to player
+        if covered != EMPTY:
+            owned = self._owned[covered[0]]
+            for k in lines:
+                owned[k] -= 1
+            self._size_counts[int(covered[-1])] -= 1
+        else:
+            self._size_counts[0] -= 1
+        owned = self._owned[player]
+        for k in lines:
+            owned[k] += 1
+        self._size_counts[size] += 1
+        while not self._size_counts[self._min_size]:
+            self._min_size += 1
+        
+        self.stacks[row * self.grid_size + col].append((player, size))
+        place_piece(self.board, player, self.pieces_of(player), move)
+        self.last_move = (player, move)
+
+    def undo(self) -> tuple[str, Move] | None:
+        '''
+        Outputs
+            Takes back the last move, revealing the piece it covered, if any.
+            ... Returns its player and the move, or None if no move is left
+            ... to take back (type tuple[str, Move] | None)
+        '''
+        if not self._journal:
+            return None
+        player, move, self.last_move, self._min_size = self._journal.pop()
+        row, col, size = move
+        stack = self.stacks[row * self.grid_size + col]
+        stack.pop()
+        lines = self._cell_lines[row * self.grid_size + col]
+        
+        # Hand the cell's lines back from player to the revealed owner
+        owned = self._owned[player]
+        for k in lines:
+            owned[k] -= 1
+        self._size_counts[size] -= 1
+        if stack:
+            owner, covered = stack[-1]
+            owned = self._owned[owner]
+            for k in lines:
+                owned[k] += 1
+            self._size_counts[covered] += 1
+            self.board[row][col] = owner + str(covered)
+        else:
+            self._size_counts[0] += 1
+            self.board[row][col] = EMPTY
+        
+        # Pieces are kept sorted, and a player has at most
+        # ... PIECES_PER_PLAYER of them
+        insort(self.pieces_of(player), size)
+        self._undone.append((player, move))
+        return player, move
+
+    def redo(self) -> tuple[str, Move] | None:
+        '''
+        Outputs
+            Plays the last move taken back again. Returns its player and the
+            ... move, or None if there is none (type tuple[str, Move] | None)
+        '''
+        if not self._undone:
+            return None
+        player, move = self._undone.pop()
+        self._make(player, move)
+        return player, move
+
+    def check_win(self) -> str | None:
+        '''
+        Outputs
+            If the last move completed a line: Returns its player (type str)
+            Otherwise: Returns None
+        '''
+        if self.last_move is None:
+            return None
+        player, (row, col, _) = self.last_move
+        if self.win_length == self.grid_size:
+            owned = self._owned[player]
+            for k in self._cell_lines[row * self.grid_size + col]:
+                if owned[k] == self.grid_size:
+                    return player
+            return None
+        
+        # The longest run of player's cells through the last move, counted
+        # ... out from it in both senses of each direction
+        board, n, needed = self.board, self.grid_size, self.win_length
+        for row_step, col_step in DIRECTIONS:
+            run = 1
+            for sign in (1, -1):
+                r, c = row + sign * row_step, col + sign * col_step
+                while run < needed and 0 <= r < n and 0 <= c < n and \
+                        board[r][c][0] == player:
+                    run += 1
+                    r, c = r + sign * row_step, c + sign * col_step
+            if run >= needed:
+                return player
+        return None
+
+    def has_valid_move(self, player: str) -> bool:
+        '''
+        Inputs
+            player: NAUGHT or CROSS (type str)
+        Outputs
+            Whether player can place any of its pieces (type bool)
+        '''
+        # Only the biggest piece need be tried, on the cell whose top piece
+        # ... is the smallest
+        pieces = self.pieces_of(player)
+        return bool(pieces) and pieces[-1] > self._min_size
+
+    def check_stalemate(self) -> bool:
+        '''
+        Outputs
+            Whether stalemate (no more moves can be made) is reached (type bool)
+        '''
+        # Pieces stay sorted as they are only ever removed, so the biggest
+        # ... available piece is the last one
+        biggest = max(self.naught_pieces[-1] if self.naught_pieces else -1,
+                      self.cross_pieces[-1] if self.cross_pieces else -1)
+        return self._min_size >= biggest
+
+
+def game_session(show: Renderer = print_game,
+                 agents: dict[str, Agent] | None = None,
+                 config: GameConfig | None = None) -> Prompts[None]:
+    '''
+    Inputs
+        show: Displays the game, print_game() by default; see render.py for
+        ... a redraw-changes-only and a display-nothing mode (type Renderer)
+        agents: The computer players, by the player they move for; the user
+        ... is prompted for every other player's moves, and every agent's
+        ... end_game() is called, if it has one, as soon as a game is over.
+        ... See mcts.py (type dict[str, Agent] | None)
+        config: The variant of the game, default_config() if None
+        ... (type GameConfig | None)
     Outputs: 
-        Returns whole_game() (type None)
+        Plays games until the user declines to play again, yielding every
+        ... prompt and being sent the user's answer; see main() for the
+        ... terminal and server.py for network sessions
     '''
     # Helper function covering Step 3, Step 4, Step 5-1
-    def test_move(board: Board, player: str, pieces_player: Pieces) -> None:
+    def test_move(state: GameState, player: str) -> Prompts[None]:
         '''
         Inputs 
-            board: A squared board of cells which may contain pieces(type Board)
+            state: The board and pieces of the current game (type GameState)
             player: A player's name (type string)
-            pieces_player: Available pieces of the player (type Pieces)
         Outputs
-            If move is correctly formatted and valid: Returns 
-            ... place_piece(board, player, pieces_player, move) (type None)
-            If move is correctly formatted but invalid: Print something and 
-            ... Returns test_move(board, player, pieces_player) (type None)
-            Otherwise: Returns test_move(...) (type None)
-        '''
-        # Step 3: The user is prompted for a move
-        move = get_player_move()
+            Prompts until the move is correctly formatted and valid, printing
+            ... something for each invalid one, then Returns 
+            ... state.place_piece(player, move) (type None)
+        '''
+        if agents and player in agents:
+            move = agents[player](state, player)
+            # An agent without a valid move passes
+            if move is None:
+                if state.has_valid_move(player):
+                    raise ValueError(f'{player} agent passed with a valid '
+                                     f'move')
+                return None
+            if not state.check_move(player, move):
+                raise ValueError(f'{player} agent made an invalid move: '
+                                 f'{move}')
+            return state.place_piece(player, move)
         
-        # Step 4: Check if the move is correctly formatted and valid
-        if move and check_move(board, pieces_player, move):
-            # Step 5-1: Update the board
-            return place_piece(board, player, pieces_player, move)
-        elif move and not check_move(board, pieces_player, move):
+        while True:
+            # Step 3: The user is prompted for a move
+            move = yield from move_prompts(config)
+            
+            # Step 4: Check if the move is valid
+            if state.check_move(player, move):
+                # Step 5-1: Update the board
+                return state.place_piece(player, move)
             print(INVALID_MOVE_MESSAGE)
             print(f"\n{player} turn to move\n")
-            return test_move(board, player, pieces_player)
-        else:
-            return test_move(board, player, pieces_player)
 
     # Helper function covering Step 7
-    def game_over() -> None:
+    def game_over() -> Prompts[bool]:
         '''
         Inputs: No input
         Outputs
-            If agree to play again: Returns whole_game() (type: None)
-            Otherwise: Returns None
+            Whether the user agrees to play again (type bool)
         '''
         # Step 7: Prompt them for whether to play again
-        prompt = input("Play again? ")
-        if prompt in ["y", "Y"]:
-            return whole_game()
-        else:
-            return None
+        prompt = yield "Play again? "
+        return prompt in ["y", "Y"]
 
     # Helper function covering all steps
-    def whole_game() -> None:
+    def whole_game() -> Prompts[bool]:
         '''
         Inputs: No input
-        Outputs: Returns None
+        Outputs
+            Whether the user agrees to play another game (type bool)
         '''
-        # Initialization of the game
-        board = initial_state()
-        naught_pieces = generate_initial_pieces(PIECES_PER_PLAYER)
-        cross_pieces = generate_initial_pieces(PIECES_PER_PLAYER)
+        # Initialization of the game; the state tracks wins and stalemates
+        # ... incrementally as pieces are placed
+        state = GameState(config)
+        board = state.board
+        naught_pieces, cross_pieces = state.naught_pieces, state.cross_pieces
         players = ["O", "X"]
         i = 0
 
         # Step 1: The current game is displayed
-        print_game(board, naught_pieces, cross_pieces)
+        show(board, naught_pieces, cross_pieces)
         
         # Iterate over Step 2 to Step 6
-        while check_stalemate(board, naught_pieces, cross_pieces) == False and \
-              check_win(board) == None:
-            player = players[i % 2]
-            if player == "O":
-                pieces_player = naught_pieces
-            else:
-                pieces_player = cross_pieces
-            # Step 2: The user is informed whose turn it is to move.
-            print(f"\n{player} turn to move\n")
-            
-            # Step 3, Step 4, Step 5-1
-            test_move(board, player, pieces_player)
-            i += 1
-            
-            # Step 5-2: Display the new game state
-            print_game(board, naught_pieces, cross_pieces)
-            
-            # Step 6: Check if the game is over: stalemate or won by someone
-            if check_stalemate(board, naught_pieces, cross_pieces) == True:
-                print("Stalemate!")
-                # Step 7
-                game_over()
-            elif check_win(board):
-                print(check_win(board), "wins!")
-                game_over()
+        try:
+            while state.check_stalemate() == False and \
+                    state.check_win() == None:
+                player = players[i % 2]
+                # Step 2: The user is informed whose turn it is to move.
+                print(f"\n{player} turn to move\n")
+                
+                # Step 3, Step 4, Step 5-1
+                yield from test_move(state, player)
+                i += 1
+                
+                # Step 5-2: Display the new game state
+                show(board, naught_pieces, cross_pieces)
+                
+                # Step 6: Check if the game is over: stalemate or won by
+                # ... someone
+                if state.check_stalemate() == True:
+                    print("Stalemate!")
+                elif state.check_win():
+                    print(state.check_win(), "wins!")
+        finally:
+            # Agents stop any work on this game, e.g. thinking on the user's
+            # ... time, once it is over or the session is closed during it
+            for agent in (agents or {}).values():
+                end_game = getattr(agent, 'end_game', None)
+                if end_game is not None:
+                    end_game()
+        
+        # Step 7
+        return (yield from game_over())
+
+    # Games are played one after another, so a session of any length runs in
+    # ... constant stack
+    while (yield from whole_game()):
+        pass
+    return None
+
 
-    return whole_game()
+def main(read: Reader = input, show: Renderer = print_game,
+         agents: dict[str, Agent] | None = None,
+         config: GameConfig | None = None) -> None:
+    '''
+    Inputs
+        read: Reads the user's answers, input() by default; see line_reader
+        ... for scripted sessions (type Reader)
+        show: Displays the game, print_game() by default (type Renderer)
+        agents: The computer players, by the player they move for
+        ... (type dict[str, Agent] | None)
+        config: The variant of the game, default_config() if None
+        ... (type GameConfig | None)
+    Outputs: 
+        Plays the game_session() in the terminal until the user declines to
+        ... play again or the answers run out (EOFError); Returns None
+    '''
+    # Running out of scripted answers ends the session quietly
+    try:
+        answer_prompts(game_session(show, agents, config), read)
+    except EOFError:
+        pass
+    return None
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,203 @@
+""" Vectorised evaluation of many fancy tic-tac-toe games at once (A1). """
+import numpy as np
+
+from a1 import *
+
+# Owners as stored in BoardBatch.owners; players are indexed 0 (NAUGHT) and
+# 1 (CROSS) elsewhere, so a player's owner code is its index plus one
+EMPTY_OWNER, NAUGHT_OWNER, CROSS_OWNER = 0, 1, 2
+PLAYERS = (NAUGHT, CROSS)
+
+
+class BoardBatch:
+    ''' K boards held as arrays, updated and checked all at once.
+
+        owners[k, row, col] is EMPTY_OWNER, NAUGHT_OWNER or CROSS_OWNER and
+        sizes[k, row, col] the size of the piece there (0 when empty).
+        pieces[k, player, size] is True while that player of game k still has
+        the piece of that size.
+    '''
+    def __init__(self, count: int, grid_size: int = GRID_SIZE,
+                 pieces_per_player: int = PIECES_PER_PLAYER) -> None:
+        '''
+        Inputs
+            count: The number of boards K (type int)
+            grid_size: The number of rows (and columns) of each board
+            ... (type int)
+            pieces_per_player: The number of pieces of each player (type int)
+        '''
+        self.grid_size = grid_size
+        self.owners = np.zeros((count, grid_size, grid_size), dtype=np.int8)
+        self.sizes = np.zeros((count, grid_size, grid_size), dtype=np.int8)
+        self.pieces = np.ones((count, 2, pieces_per_player + 1), dtype=bool)
+        self.pieces[:, :, 0] = False
+        self._diagonal = np.arange(grid_size)
+
+    def __len__(self) -> int:
+        return len(self.owners)
+
+    def check_moves(self, players: np.ndarray, moves: np.ndarray
+                    ) -> np.ndarray:
+        '''
+        Inputs
+            players: The player index (0 or 1) moving on each board, shape (K,)
+            ... (type np.ndarray)
+            moves: One (row, col, size) per board, shape (K, 3)
+            ... (type np.ndarray)
+        Outputs
+            Returns whether each move is valid as check_move would decide,
+            ... shape (K,) (type np.ndarray)
+        '''
+        games = np.arange(len(self))
+        rows, cols, sizes = moves[:, 0], moves[:, 1], moves[:, 2]
+        in_range = (rows >= 0) & (rows < self.grid_size) & (cols >= 0) & \
+            (cols < self.grid_size) & (sizes > 0) & \
+            (sizes < self.pieces.shape[2])
+        # Out-of-range moves are looked up at (0, 0, 0) and then discarded
+        rows, cols = np.where(in_range, rows, 0), np.where(in_range, cols, 0)
+        sizes = np.where(in_range, sizes, 0)
+        return in_range & self.pieces[games, players, sizes] & \
+            (sizes > self.sizes[games, rows, cols])
+
+    def place_pieces(self, players: np.ndarray, moves: np.ndarray,
+                     where: np.ndarray | None = None) -> None:
+        '''
+        Inputs
+            players: The player index (0 or 1) moving on each board, shape (K,)
+            ... (type np.ndarray)
+            moves: One valid (row, col, size) per board, shape (K, 3)
+            ... (type np.ndarray)
+            where: Which boards to move on, all if None, shape (K,)
+            ... (type np.ndarray | None)
+        Outputs
+            Returns None
+        '''
+        games = np.arange(len(self))
+        if where is not None:
+            games, players, moves = games[where], players[where], moves[where]
+        rows, cols, sizes = moves[:, 0], moves[:, 1], moves[:, 2]
+        self.owners[games, rows, cols] = players + 1
+        self.sizes[games, rows, cols] = sizes
+        self.pieces[games, players, sizes] = False
+
+    def check_wins(self) -> np.ndarray:
+        '''
+        Outputs
+            Returns, for each board, the owner code of the player owning a
+            ... whole row, column or diagonal, or EMPTY_OWNER, shape (K,)
+            ... (type np.ndarray)
+        '''
+        i = self._diagonal
+        winners = np.full(len(self), EMPTY_OWNER, dtype=np.int8)
+        for owner in (CROSS_OWNER, NAUGHT_OWNER):
+            owned = self.owners == owner
+            has_line = owned.all(axis=2).any(axis=1) | \
+                owned.all(axis=1).any(axis=1) | \
+                owned[:, i, i].all(axis=1) | owned[:, i, i[::-1]].all(axis=1)
+            winners[has_line] = owner
+        return winners
+
+    def check_stalemates(self) -> np.ndarray:
+        '''
+        Outputs
+            Returns whether no more moves can be made on each board, as
+            ... check_stalemate would decide, shape (K,) (type np.ndarray)
+        '''
+        smallest = self.sizes.min(axis=(1, 2))
+        # The biggest available piece of either player, 0 when none are left
+        size_values = np.arange(self.pieces.shape[2])
+        biggest = (self.pieces * size_values).max(axis=(1, 2))
+        return smallest >= biggest
+
+    def legal_moves(self, players: np.ndarray) -> np.ndarray:
+        '''
+        Inputs
+            players: The player index (0 or 1) moving on each board, shape (K,)
+            ... (type np.ndarray)
+        Outputs
+            Returns legal[k, row, col, size], True where the move is valid,
+            ... shape (K, grid_size, grid_size, sizes) (type np.ndarray)
+        '''
+        available = self.pieces[np.arange(len(self)), players]
+        size_values = np.arange(self.pieces.shape[2])
+        bigger = size_values > self.sizes[..., np.newaxis]
+        return bigger & available[:, np.newaxis, np.newaxis, :]
+
+    def random_moves(self, players: np.ndarray, rng: np.random.Generator
+                     ) -> tuple[np.ndarray, np.ndarray]:
+        '''
+        Inputs
+            players: The player index (0 or 1) moving on each board, shape (K,)
+            ... (type np.ndarray)
+            rng: The random number generator to draw from
+            ... (type np.random.Generator)
+        Outputs
+            Returns a uniformly random valid move per board, shape (K, 3), and
+            ... whether the board had any valid move, shape (K,)
+            ... (type tuple[np.ndarray, np.ndarray])
+        '''
+        legal = self.legal_moves(players).reshape(len(self), -1)
+        scores = np.where(legal, rng.random(legal.shape), -1.0)
+        flat = scores.argmax(axis=1)
+        n, sizes = self.grid_size, self.pieces.shape[2]
+        moves = np.stack((flat // (n * sizes), flat // sizes % n,
+                          flat % sizes), axis=1)
+        return moves, legal.any(axis=1)
+
+    def to_board(self, k: int) -> Board:
+        '''
+        Inputs
+            k: The index of a board in the batch (type int)
+        Outputs
+            Returns board k as a list-of-strings Board (type Board)
+        '''
+        symbols = {EMPTY_OWNER: '', NAUGHT_OWNER: NAUGHT, CROSS_OWNER: CROSS}
+        return [[symbols[owner] + str(size) if owner else EMPTY
+                 for owner, size in zip(owner_row, size_row)]
+                for owner_row, size_row in zip(self.owners[k], self.sizes[k])]
+
+    def pieces_of(self, k: int, player: str) -> Pieces:
+        '''
+        Inputs
+            k: The index of a board in the batch (type int)
+            player: NAUGHT or CROSS (type str)
+        Outputs
+            Returns the available pieces of player in game k (type Pieces)
+        '''
+        return np.flatnonzero(self.pieces[k, PLAYERS.index(player)]).tolist()
+
+
+def random_rollouts(batch: BoardBatch, rng: np.random.Generator,
+                    first_player: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Inputs
+        batch: Boards on which no game is over yet (type BoardBatch)
+        rng: The random number generator to draw from (type np.random.Generator)
+        first_player: The player index (0 or 1) to move first (type int)
+    Outputs
+        Plays uniformly random moves on every board in lockstep until each
+        ... game ends. Returns the result per board (the winner's owner
+        ... code, or EMPTY_OWNER for a stalemate) and the number of pieces
+        ... placed, both shape (K,) (type tuple[np.ndarray, np.ndarray])
+    '''
+    count = len(batch)
+    players = np.full(count, first_player, dtype=np.int64)
+    results = np.full(count, EMPTY_OWNER, dtype=np.int8)
+    lengths = np.zeros(count, dtype=np.int64)
+    playing = np.ones(count, dtype=bool)
+
+    while playing.any():
+        moves, can_move = batch.random_moves(players, rng)
+        # A player without a valid move passes
+        moving = playing & can_move
+        batch.place_pieces(players, moves, moving)
+        lengths += moving
+
+        # Stalemate is checked before a win, as in the game loop of main()
+        stalemates = playing & batch.check_stalemates()
+        winners = batch.check_wins()
+        won = playing & ~stalemates & (winners != EMPTY_OWNER)
+        results[won] = winners[won]
+        playing &= ~(stalemates | won)
+        players = 1 - players
+    return results, lengths
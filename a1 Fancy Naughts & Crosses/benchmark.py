@@ -0,0 +1,523 @@
+""" Benchmarks the A1 game functions over every supported game variant. """
+import argparse
+import contextlib
+import copy
+import json
+import platform
+import random
+import sys
+import time
+from typing import Any, Callable, NamedTuple
+
+from a1 import *
+from movegen import legal_moves
+from selfplay import play_game, random_policy
+
+# The variants swept by default: every grid size of CSSE7030 and every number
+# of pieces CSSE1001 may test with
+GRID_SIZES = range(2, 9)
+PIECES = range(5, 10)
+# Fixtures are drawn from this many random games of each variant
+FIXTURE_GAMES = 20
+# The most positions of each variant the micro benchmarks run over
+FIXTURE_POSITIONS = 200
+# Every process_move input in this many is malformed, as typed by a user
+MALFORMED_EVERY = 10
+FORMAT_VERSION = 1
+DEFAULT_TOLERANCE = 0.15
+
+
+class Fixtures(NamedTuple):
+    ''' The inputs every benchmark of one variant runs over. '''
+    config: GameConfig
+    # Positions of random games: (board, naught_pieces, cross_pieces)
+    positions: list[tuple[Board, Pieces, Pieces]]
+    # Random moves on each position, valid or not
+    probes: list[Move]
+    # The moves of every game, in the order played, with the player
+    games: list[list[tuple[str, Move]]]
+
+
+class _NullStream:
+    ''' Discards everything written, so printing is timed without a
+        terminal.
+    '''
+    def write(self, text: str) -> int:
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def _random_game(state: GameState, rng: random.Random
+                 ) -> list[tuple[str, Move]]:
+    '''
+    Inputs
+        state: A new game, played on (type GameState)
+        rng: Picks the moves (type random.Random)
+    Outputs
+        Plays random valid moves to the end of the game. Returns the moves
+        ... with their players (type list[tuple[str, Move]])
+    '''
+    moves = []
+    player = NAUGHT
+    while not state.check_stalemate() and state.check_win() is None:
+        choices = list(legal_moves(state.board, state.pieces_of(player)))
+        # A player without a valid move passes
+        if choices:
+            move = rng.choice(choices)
+            state.place_piece(player, move)
+            moves.append((player, move))
+        player = CROSS if player == NAUGHT else NAUGHT
+    return moves
+
+
+def make_fixtures(grid_size: int, pieces_per_player: int) -> Fixtures:
+    '''
+    Inputs
+        grid_size: The number of rows (and columns) of the board (type int)
+        pieces_per_player: The number of pieces of each player (type int)
+    Outputs
+        Returns the fixtures of the variant; the same ones on every run, as
+        ... the random games are seeded by the variant (type Fixtures)
+    '''
+    config = game_config(grid_size, pieces_per_player)
+    rng = random.Random(grid_size * 100 + pieces_per_player)
+    positions, games = [], []
+    for _ in range(FIXTURE_GAMES):
+        state = GameState(config)
+        replayed = GameState(config)
+        moves = _random_game(state, rng)
+        games.append(moves)
+        for player, move in moves:
+            replayed.place_piece(player, move)
+            positions.append((copy.deepcopy(replayed.board),
+                              list(replayed.naught_pieces),
+                              list(replayed.cross_pieces)))
+    positions = rng.sample(positions, min(len(positions), FIXTURE_POSITIONS))
+    probes = [(rng.randrange(grid_size), rng.randrange(grid_size),
+               rng.randint(1, pieces_per_player)) for _ in positions]
+    return Fixtures(config, positions, probes, games)
+
+
+class Timing(NamedTuple):
+    ''' The code a benchmark times, and how many operations it performs.
+        If there is a setup, each run is passed what it returns, and setting
+        up is not timed.
+    '''
+    run: Callable[..., Any]
+    operations: int
+    setup: Callable[[], Any] | None = None
+
+
+# Each benchmark is called with the fixtures of a variant
+Benchmark = Callable[[Fixtures], Timing]
+
+
+def bench_process_move(fixtures: Fixtures) -> Timing:
+    '''
+    Inputs
+        fixtures: The positions and games of a variant (type Fixtures)
+    Outputs
+        Times process_move on the probes as typed by a user, one in
+        ... MALFORMED_EVERY of them malformed; Returns the timing
+        ... (type Timing)
+    '''
+    config = fixtures.config
+    inputs = [f"{row + 1} {col + 1} {size}"
+              for row, col, size in fixtures.probes]
+    for i in range(0, len(inputs), MALFORMED_EVERY):
+        inputs[i] = inputs[i].replace(' ', '', 1)
+
+    def run() -> None:
+        with contextlib.redirect_stdout(_NullStream()):
+            for text in inputs:
+                process_move(text, config)
+    return Timing(run, len(inputs))
+
+
+def bench_check_move(fixtures: Fixtures) -> Timing:
+    '''
+    Inputs
+        fixtures: The positions and games of a variant (type Fixtures)
+    Outputs
+        Times check_move of a random move on every position; Returns the
+        ... timing (type Timing)
+    '''
+    cases = [(board, naught_pieces, move) for (board, naught_pieces, _), move
+             in zip(fixtures.positions, fixtures.probes)]
+
+    def run() -> None:
+        for board, pieces, move in cases:
+            check_move(board, pieces, move)
+    return Timing(run, len(cases))
+
+
+def bench_place_piece(fixtures: Fixtures) -> Timing:
+    '''
+    Inputs
+        fixtures: The positions and games of a variant (type Fixtures)
+    Outputs
+        Times place_piece of every move of the fixture games, each replayed
+        ... on a new board; Returns the timing (type Timing)
+    '''
+    config = fixtures.config
+    games = fixtures.games
+
+    # Every game is replayed on a new board, made before the clock starts
+    def setup() -> list[tuple[Board, Pieces, Pieces]]:
+        return [(config.initial_state(), config.initial_pieces(),
+                 config.initial_pieces()) for _ in games]
+
+    def run(starts: list[tuple[Board, Pieces, Pieces]]) -> None:
+        for (board, naught_pieces, cross_pieces), moves in zip(starts, games):
+            for player, move in moves:
+                place_piece(board, player, naught_pieces if player == NAUGHT
+                            else cross_pieces, move)
+    return Timing(run, sum(len(moves) for moves in games), setup)
+
+
+def bench_make_unmake(fixtures: Fixtures) -> Timing:
+    '''
+    Inputs
+        fixtures: The positions and games of a variant (type Fixtures)
+    Outputs
+        Times GameState.place_piece then undo() of every move of the
+        ... fixture games; Returns the timing (type Timing)
+    '''
+    config = fixtures.config
+    games = fixtures.games
+
+    def run() -> None:
+        state = GameState(config)
+        for moves in games:
+            for player, move in moves:
+                state.place_piece(player, move)
+            for _ in moves:
+                state.undo()
+    return Timing(run, 2 * sum(len(moves) for moves in games))
+
+
+def bench_check_win(fixtures: Fixtures) -> Timing:
+    '''
+    Inputs
+        fixtures: The positions and games of a variant (type Fixtures)
+    Outputs
+        Times check_win on every position; Returns the timing (type Timing)
+    '''
+    boards = [board for board, _, _ in fixtures.positions]
+
+    def run() -> None:
+        for board in boards:
+            check_win(board)
+    return Timing(run, len(boards))
+
+
+def bench_check_stalemate(fixtures: Fixtures) -> Timing:
+    '''
+    Inputs
+        fixtures: The positions and games of a variant (type Fixtures)
+    Outputs
+        Times check_stalemate on every position; Returns the timing
+        ... (type Timing)
+    '''
+    positions = fixtures.positions
+
+    def run() -> None:
+        for board, naught_pieces, cross_pieces in positions:
+            check_stalemate(board, naught_pieces, cross_pieces)
+    return Timing(run, len(positions))
+
+
+def bench_print_game(fixtures: Fixtures) -> Timing:
+    '''
+    Inputs
+        fixtures: The positions and games of a variant (type Fixtures)
+    Outputs
+        Times print_game of every position, to a stream discarding it;
+        ... Returns the timing (type Timing)
+    '''
+    positions = fixtures.positions
+
+    def run() -> None:
+        with contextlib.redirect_stdout(_NullStream()):
+            for board, naught_pieces, cross_pieces in positions:
+                print_game(board, naught_pieces, cross_pieces)
+    return Timing(run, len(positions))
+
+
+def bench_playout(fixtures: Fixtures) -> Timing:
+    '''
+    Inputs
+        fixtures: The positions and games of a variant (type Fixtures)
+    Outputs
+        Times whole random games through GameState, as main() plays
+        ... them; Returns the timing (type Timing)
+    '''
+    config = fixtures.config
+    games = len(fixtures.games)
+
+    def run() -> None:
+        rng = random.Random(0)
+        for _ in range(games):
+            _random_game(GameState(config), rng)
+    return Timing(run, games)
+
+
+def bench_selfplay(fixtures: Fixtures) -> Timing:
+    '''
+    Inputs
+        fixtures: The positions and games of a variant (type Fixtures)
+    Outputs
+        Times whole random games on a bitboard, as selfplay.py plays them;
+        ... Returns the timing (type Timing)
+    '''
+    config = fixtures.config
+    games = len(fixtures.games)
+
+    def run() -> None:
+        rng = random.Random(0)
+        for _ in range(games):
+            play_game(random_policy, random_policy, config.grid_size,
+                      config.pieces_per_player, rng)
+    return Timing(run, games)
+
+
+BENCHMARKS: dict[str, Benchmark] = {
+    'process_move': bench_process_move,
+    'check_move': bench_check_move,
+    'place_piece': bench_place_piece,
+    'make_unmake': bench_make_unmake,
+    'check_win': bench_check_win,
+    'check_stalemate': bench_check_stalemate,
+    'print_game': bench_print_game,
+    'playout': bench_playout,
+    'selfplay': bench_selfplay,
+}
+
+
+def measure(timing: Timing, repeat: int) -> float:
+    '''
+    Inputs
+        timing: The code to time (type Timing)
+        repeat: How many times to time it (type int)
+    Outputs
+        Returns the fastest time per operation in nanoseconds; the fastest
+        ... run is the one least disturbed by the rest of the machine
+        ... (type float)
+    '''
+    best = None
+    for _ in range(repeat):
+        args = () if timing.setup is None else (timing.setup(),)
+        start = time.perf_counter_ns()
+        timing.run(*args)
+        elapsed = time.perf_counter_ns() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / max(timing.operations, 1)
+
+
+def variant_name(grid_size: int, pieces_per_player: int) -> str:
+    '''
+    Inputs
+        grid_size: The number of rows (and columns) of the board (type int)
+        pieces_per_player: The number of pieces of each player (type int)
+    Outputs
+        Returns the name results of the variant are kept under (type str)
+    '''
+    return f"{grid_size}x{pieces_per_player}"
+
+
+def run_benchmarks(names: list[str], grid_sizes: list[int],
+                   pieces: list[int], repeat: int = 5
+                   ) -> dict[str, dict[str, float]]:
+    '''
+    Inputs
+        names: The benchmarks to run, keys of BENCHMARKS (type list[str])
+        grid_sizes, pieces: The variants to run them on (type list[int])
+        repeat: How many times to time each (type int)
+    Outputs
+        Returns the nanoseconds per operation of every benchmark, by
+        ... benchmark and variant name (type dict[str, dict[str, float]])
+    '''
+    results = {name: {} for name in names}
+    for grid_size in grid_sizes:
+        for pieces_per_player in pieces:
+            fixtures = make_fixtures(grid_size, pieces_per_player)
+            variant = variant_name(grid_size, pieces_per_player)
+            for name in names:
+                timing = BENCHMARKS[name](fixtures)
+                # One untimed run warms up caches and the allocator
+                measure(timing, 1)
+                results[name][variant] = measure(timing, repeat)
+    return results
+
+
+def save_results(path: str, results: dict[str, dict[str, float]],
+                 repeat: int) -> None:
+    '''
+    Inputs
+        path: Where to write the baseline (type str)
+        results: As returned by run_benchmarks (type dict)
+        repeat: How many times each benchmark was timed (type int)
+    Outputs
+        Writes the results as JSON, with where they were measured; Returns
+        ... None
+    '''
+    baseline = {
+        'version': FORMAT_VERSION,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'repeat': repeat,
+        'unit': 'ns/op',
+        'results': results,
+    }
+    with open(path, 'w') as file:
+        json.dump(baseline, file, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def load_results(path: str) -> dict[str, dict[str, float]]:
+    '''
+    Inputs
+        path: A baseline written by save_results (type str)
+    Outputs
+        Returns its results (type dict[str, dict[str, float]])
+        Raises ValueError if the file is not a baseline of this version
+    '''
+    with open(path) as file:
+        baseline = json.load(file)
+    if baseline.get('version') != FORMAT_VERSION:
+        raise ValueError(f'{path}: not a version {FORMAT_VERSION} baseline')
+    return baseline['results']
+
+
+def compare(results: dict[str, dict[str, float]],
+            baseline: dict[str, dict[str, float]], tolerance: float
+            ) -> list[tuple[str, str, float]]:
+    '''
+    Inputs
+        results, baseline: Results of run_benchmarks, now and before
+        ... (type dict[str, dict[str, float]])
+        tolerance: How much slower than the baseline counts as noise, as a
+        ... fraction (type float)
+    Outputs
+        Returns every benchmark and variant slower than the tolerance allows,
+        ... with how many times slower it is (type list[tuple[str, str,
+        ... float]])
+    '''
+    regressions = []
+    for name, variants in results.items():
+        for variant, nanoseconds in variants.items():
+            before = baseline.get(name, {}).get(variant)
+            if before and nanoseconds > before * (1 + tolerance):
+                regressions.append((name, variant, nanoseconds / before))
+    return regressions
+
+
+def _format_time(nanoseconds: float) -> str:
+    '''
+    Inputs
+        nanoseconds: A time in nanoseconds (type float)
+    Outputs
+        Returns the time in the most readable unit, e.g. "1.50us" (type str)
+    '''
+    if nanoseconds >= 1e6:
+        return f"{nanoseconds / 1e6:.2f}ms"
+    if nanoseconds >= 1e3:
+        return f"{nanoseconds / 1e3:.2f}us"
+    return f"{nanoseconds:.0f}ns"
+
+
+def print_results(results: dict[str, dict[str, float]],
+                  baseline: dict[str, dict[str, float]] | None,
+                  grid_sizes: list[int], pieces: list[int]) -> None:
+    '''
+    Inputs
+        results: As returned by run_benchmarks (type dict)
+        baseline: Results to show the change from, if any (type dict | None)
+        grid_sizes, pieces: The variants run (type list[int])
+    Outputs
+        Prints a table per benchmark, a row per grid size and a column per
+        ... number of pieces; Returns None
+    '''
+    width = 18 if baseline else 10
+    for name, variants in results.items():
+        print(f"\n{name} (per operation)")
+        print("grid " + ''.join(f"{f'{count} pieces':>{width}}"
+                                for count in pieces))
+        for grid_size in grid_sizes:
+            cells = []
+            for count in pieces:
+                variant = variant_name(grid_size, count)
+                cell = _format_time(variants[variant])
+                before = (baseline or {}).get(name, {}).get(variant)
+                if before:
+                    cell += f" ({variants[variant] / before - 1:+.0%})"
+                cells.append(f"{cell:>{width}}")
+            print(f"{grid_size:>4} " + ''.join(cells))
+
+
+def _parse_range(text: str) -> list[int]:
+    '''
+    Inputs
+        text: Numbers separated by commas, or a range such as "2-8"
+        ... (type str)
+    Outputs
+        Returns the numbers (type list[int])
+    '''
+    numbers = []
+    for part in text.split(','):
+        first, _, last = part.partition('-')
+        numbers.extend(range(int(first), int(last or first) + 1))
+    return numbers
+
+
+def main() -> None:
+    '''
+    Inputs: No input as parameters; reads the command line
+    Outputs
+        Runs the benchmarks, prints them, optionally saves them as a
+        ... baseline, and exits with status 1 if any is slower than a given
+        ... baseline beyond the tolerance; Returns None
+    '''
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--grid-sizes', type=_parse_range,
+                        default=list(GRID_SIZES), metavar='RANGE',
+                        help='e.g. 3 or 2-8 or 3,6,8')
+    parser.add_argument('--pieces', type=_parse_range, default=list(PIECES),
+                        metavar='RANGE', help='e.g. 6 or 5-9')
+    parser.add_argument('--only', action='append', choices=list(BENCHMARKS),
+                        help='run only this benchmark; may be repeated')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save', metavar='PATH',
+                        help='write the results as a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH',
+                        help='flag regressions against a JSON baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='slowdown taken as noise, as a fraction '
+                             '(default %(default)s)')
+    args = parser.parse_args()
+
+    baseline = load_results(args.compare) if args.compare else None
+    start = time.perf_counter()
+    results = run_benchmarks(args.only or list(BENCHMARKS), args.grid_sizes,
+                             args.pieces, args.repeat)
+    print_results(results, baseline, args.grid_sizes, args.pieces)
+    print(f"\n{len(args.grid_sizes) * len(args.pieces)} variants in "
+          f"{time.perf_counter() - start:.1f}s")
+    if args.save:
+        save_results(args.save, results, args.repeat)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for name, variant, ratio in regressions:
+            print(f"REGRESSION {name} {variant}: {ratio:.2f}x the baseline")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == '__main__':
+    main()
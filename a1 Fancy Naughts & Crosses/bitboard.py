@@ -0,0 +1,293 @@
+""" A bitboard backend for the fancy tic-tac-toe game of CSSE1001/7030 A1. """
+from functools import lru_cache
+
+from constants import *
+
+# Every cell owns a 5-bit field in the packed sizes integer: 4 bits hold the
+# piece size (0 for an empty cell, up to 9) and the top bit is a guard bit
+# which absorbs the carry when comparing all cells against a size at once
+FIELD_BITS = 5
+SIZE_MASK = 0b1111
+MIN_GRID_SIZE, MAX_GRID_SIZE = 2, 8
+# The directions a row, column or diagonal runs in, as (row, column) steps
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+def _line_masks(grid_size: int) -> tuple[int, ...]:
+    '''
+    Inputs
+        grid_size: The number of rows (and columns) of the board (type int)
+    Outputs
+        Returns the cell bitmasks of both diagonals, every row and every
+        ... column, in that order (type tuple[int, ...])
+    '''
+    cells = [[1 << (row * grid_size + col) for col in range(grid_size)]
+             for row in range(grid_size)]
+    diag = sum(cells[i][i] for i in range(grid_size))
+    rev_diag = sum(cells[i][grid_size - 1 - i] for i in range(grid_size))
+    rows = [sum(cells[i]) for i in range(grid_size)]
+    cols = [sum(cells[i][j] for i in range(grid_size))
+            for j in range(grid_size)]
+    return (diag, rev_diag) + tuple(rows) + tuple(cols)
+
+
+def _window_masks(grid_size: int, win_length: int) -> tuple[int, ...]:
+    '''
+    Inputs
+        grid_size: The number of rows (and columns) of the board (type int)
+        win_length: The number of cells in a row which wins (type int)
+    Outputs
+        Returns the cell bitmasks of every run of win_length cells along a
+        ... row, column or diagonal (type tuple[int, ...])
+    '''
+    masks = []
+    for row in range(grid_size):
+        for col in range(grid_size):
+            for row_step, col_step in DIRECTIONS:
+                end_row = row + row_step * (win_length - 1)
+                end_col = col + col_step * (win_length - 1)
+                if 0 <= end_row < grid_size and 0 <= end_col < grid_size:
+                    masks.append(sum(
+                        1 << ((row + row_step * i) * grid_size +
+                              col + col_step * i)
+                        for i in range(win_length)))
+    return tuple(masks)
+
+
+def _field_constant(grid_size: int, value: int) -> int:
+    '''
+    Inputs
+        grid_size: The number of rows (and columns) of the board (type int)
+        value: A value to repeat in every 5-bit field (type int)
+    Outputs
+        Returns a packed integer holding value in every cell field (type int)
+    '''
+    return sum(value << (FIELD_BITS * i) for i in range(grid_size ** 2))
+
+
+# Tables precomputed once for every supported grid size
+LINE_MASKS = {n: _line_masks(n)
+              for n in range(MIN_GRID_SIZE, MAX_GRID_SIZE + 1)}
+FULL_MASKS = {n: (1 << n * n) - 1
+              for n in range(MIN_GRID_SIZE, MAX_GRID_SIZE + 1)}
+FIELD_ONES = {n: _field_constant(n, 1)
+              for n in range(MIN_GRID_SIZE, MAX_GRID_SIZE + 1)}
+FIELD_GUARDS = {n: _field_constant(n, SIZE_MASK + 1)
+                for n in range(MIN_GRID_SIZE, MAX_GRID_SIZE + 1)}
+
+
+@lru_cache(maxsize=None)
+def line_masks(grid_size: int, win_length: int | None = None
+               ) -> tuple[int, ...]:
+    '''
+    Inputs
+        grid_size: The number of rows (and columns) of the board (type int)
+        win_length: The number of cells in a row which wins, the whole line
+        ... if None (type int | None)
+    Outputs
+        Returns the cell bitmasks a player wins by owning; LINE_MASKS for
+        ... the whole-line rule (type tuple[int, ...])
+    '''
+    if win_length is None or win_length == grid_size:
+        return LINE_MASKS[grid_size]
+    if not 1 <= win_length <= grid_size:
+        raise ValueError(f'Unsupported win length: {win_length}')
+    return _window_masks(grid_size, win_length)
+
+
+def pieces_mask(pieces: list[int]) -> int:
+    '''
+    Inputs
+        pieces: A player's available pieces (type Pieces)
+    Outputs
+        Returns a bitmask with bit (size) set for every available size
+        ... (type int)
+    '''
+    mask = 0
+    for size in pieces:
+        mask |= 1 << size
+    return mask
+
+
+def mask_pieces(mask: int) -> list[int]:
+    '''
+    Inputs
+        mask: A bitmask of available sizes, as built by pieces_mask (type int)
+    Outputs
+        Returns the available pieces, smallest first (type Pieces)
+    '''
+    return [size for size in range(1, mask.bit_length()) if mask >> size & 1]
+
+
+class BitBoard:
+    ''' A board stored as two owner bitmasks and a packed array of sizes.
+
+        Bit (row * grid_size + col) of naughts/crosses is set when that player
+        owns the cell. The board also reads like a Board (a list of rows of
+        strings such as "O3"), so print_game can display it unchanged.
+    '''
+    __slots__ = ('grid_size', 'naughts', 'crosses', 'sizes')
+
+    def __init__(self, grid_size: int = GRID_SIZE) -> None:
+        '''
+        Inputs
+            grid_size: The number of rows (and columns), from 2 to 8 (type int)
+        '''
+        if grid_size not in LINE_MASKS:
+            raise ValueError(f'Unsupported grid size: {grid_size}')
+        self.grid_size = grid_size
+        self.naughts = 0
+        self.crosses = 0
+        self.sizes = 0
+
+    @classmethod
+    def from_board(cls, board: list[list[str]]) -> 'BitBoard':
+        '''
+        Inputs
+            board: A squared board of cells which may contain pieces
+            ... (type Board)
+        Outputs
+            Returns the equivalent bitboard (type BitBoard)
+        '''
+        bitboard = cls(len(board))
+        for row, cells in enumerate(board):
+            for col, cell in enumerate(cells):
+                if cell != EMPTY:
+                    bitboard.place(cell[0], (row, col, int(cell[1:])))
+        return bitboard
+
+    def to_board(self) -> list[list[str]]:
+        '''
+        Outputs
+            Returns the equivalent list-of-strings board (type Board)
+        '''
+        return [self[row] for row in range(self.grid_size)]
+
+    def copy(self) -> 'BitBoard':
+        '''
+        Outputs
+            Returns an independent copy of this board (type BitBoard)
+        '''
+        other = BitBoard.__new__(BitBoard)
+        other.grid_size = self.grid_size
+        other.naughts, other.crosses = self.naughts, self.crosses
+        other.sizes = self.sizes
+        return other
+
+    def size_at(self, row: int, col: int) -> int:
+        '''
+        Inputs
+            row, col: A position on the board (type int)
+        Outputs
+            Returns the size of the piece at (row, col), 0 if empty (type int)
+        '''
+        shift = FIELD_BITS * (row * self.grid_size + col)
+        return (self.sizes >> shift) & SIZE_MASK
+
+    def cell(self, row: int, col: int) -> str:
+        '''
+        Inputs
+            row, col: A position on the board (type int)
+        Outputs
+            Returns the cell as it appears on a Board, e.g. "O3" (type str)
+        '''
+        bit = 1 << (row * self.grid_size + col)
+        if self.naughts & bit:
+            return NAUGHT + str(self.size_at(row, col))
+        elif self.crosses & bit:
+            return CROSS + str(self.size_at(row, col))
+        return EMPTY
+
+    def can_place(self, move: tuple[int, int, int]) -> bool:
+        '''
+        Inputs
+            move: Place a piece of (size) on (row, column) (type Move)
+        Outputs
+            Whether the piece is bigger than the one it would cover (type bool)
+        '''
+        row, col, size = move
+        shift = FIELD_BITS * (row * self.grid_size + col)
+        return size > (self.sizes >> shift) & SIZE_MASK
+
+    def place(self, player: str, move: tuple[int, int, int]) -> None:
+        '''
+        Inputs
+            player: NAUGHT or CROSS (type str)
+            move: Place a piece of (size) on (row, column) (type Move)
+        Outputs
+            Returns None
+        '''
+        row, col, size = move
+        index = row * self.grid_size + col
+        bit, shift = 1 << index, FIELD_BITS * index
+        if player == NAUGHT:
+            self.naughts |= bit
+            self.crosses &= ~bit
+        else:
+            self.crosses |= bit
+            self.naughts &= ~bit
+        self.sizes = (self.sizes & ~(SIZE_MASK << shift)) | (size << shift)
+
+    def winner(self, win_length: int | None = None) -> str | None:
+        '''
+        Inputs
+            win_length: The number of cells in a row which wins, the whole
+            ... line if None (type int | None)
+        Outputs
+            If a player owns a whole row, column or diagonal, or win_length
+            ... cells in a row along one: Returns that player (type str)
+            Otherwise: Returns None
+        '''
+        naughts, crosses = self.naughts, self.crosses
+        lines = LINE_MASKS[self.grid_size] if win_length is None else \
+            line_masks(self.grid_size, win_length)
+        for line in lines:
+            if naughts & line == line:
+                return NAUGHT
+            if crosses & line == line:
+                return CROSS
+        return None
+
+    def is_stalemate(self, naught_mask: int, cross_mask: int) -> bool:
+        '''
+        Inputs
+            naught_mask, cross_mask: Bitmasks of both players' available pieces,
+            ... as built by pieces_mask (type int)
+        Outputs
+            Whether no more moves can be made (type bool)
+        '''
+        # The biggest piece either player still holds (-1 when none are left)
+        biggest = (naught_mask | cross_mask).bit_length() - 1
+        if biggest <= 0:
+            return True
+        n = self.grid_size
+        if (self.naughts | self.crosses) != FULL_MASKS[n]:
+            return False
+        # Adding (16 - biggest) to every field sets its guard bit exactly when
+        # the size in that field is at least biggest
+        guards = FIELD_GUARDS[n]
+        offset = FIELD_ONES[n] * (SIZE_MASK + 1 - biggest)
+        return (self.sizes + offset) & guards == guards
+
+    def __len__(self) -> int:
+        return self.grid_size
+
+    def __getitem__(self, row: int) -> list[str]:
+        if not 0 <= row < self.grid_size:
+            raise IndexError(row)
+        return [self.cell(row, col) for col in range(self.grid_size)]
+
+    def __iter__(self):
+        return (self[row] for row in range(self.grid_size))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, BitBoard):
+            return (self.grid_size, self.naughts, self.crosses, self.sizes) == \
+                (other.grid_size, other.naughts, other.crosses, other.sizes)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((self.grid_size, self.naughts, self.crosses, self.sizes))
+
+    def __repr__(self) -> str:
+        return f'BitBoard({self.to_board()!r})'
@@ -0,0 +1,324 @@
+""" A memory-mapped opening book for the fancy tic-tac-toe (A1): every position
+within a few plies of the start, solved. Positions deeper than the book are
+searched live by solver.solve(). """
+import argparse
+import mmap
+import struct
+import sys
+import time
+from array import array
+
+from a1 import *
+from bitboard import FIELD_BITS, SIZE_MASK
+from solver import LOSS, WIN, TranspositionTable, solve
+from symmetry import (canonical_bitboard_key, from_canonical_move,
+                      to_canonical_move)
+
+# A book file is a header, then 2 ** bits position keys (unsigned 64-bit, 0
+# for an empty slot) and as many entries (unsigned 16-bit) in the same slots.
+# Both arrays are in the byte order recorded in the header. An entry is
+# (value + 1) << 8 | cell << 4 | size, the move being on the canonical board
+# with size 0 when there is none
+MAGIC = b'A1BK'
+VERSION = 1
+HEADER = struct.Struct('<4sBBBBB7xQ')
+BYTE_ORDERS = ('little', 'big')
+KEY_BITS = 64
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+# Slots are at most half full, so probes stay short
+MAX_LOAD = 0.5
+
+
+def pack_key(key: tuple, grid_size: int, pieces_per_player: int) -> int:
+    '''
+    Inputs
+        key: A canonical key from canonical_bitboard_key (type tuple)
+        grid_size: The number of rows (and columns) of the board (type int)
+        pieces_per_player: The number of pieces of each player (type int)
+    Outputs
+        Returns the key packed into an integer of KEY_BITS bits (type int)
+    '''
+    code, first_mask, second_mask, mover = key
+    pieces = pieces_per_player
+    return (code << (2 * pieces + 1) | (first_mask >> 1) << (pieces + 1) |
+            (second_mask >> 1) << 1 | (mover == CROSS))
+
+
+def _slot(key: int, bits: int) -> int:
+    '''
+    Inputs
+        key: A packed key (type int)
+        bits: The number of bits of a slot index (type int)
+    Outputs
+        Returns the slot where probing for key starts (type int)
+    '''
+    return ((key * HASH_MULTIPLIER) & ((1 << KEY_BITS) - 1)) >> \
+        (KEY_BITS - bits)
+
+
+def _key_fits(grid_size: int, pieces_per_player: int) -> bool:
+    '''
+    Inputs
+        grid_size: The number of rows (and columns) of the board (type int)
+        pieces_per_player: The number of pieces of each player (type int)
+    Outputs
+        Returns whether positions of that game pack into KEY_BITS bits
+        ... (type bool)
+    '''
+    return (grid_size ** 2 * FIELD_BITS + 2 * pieces_per_player + 1
+            <= KEY_BITS and pieces_per_player <= SIZE_MASK)
+
+
+class OpeningBook:
+    ''' A book file mapped into memory. It holds the positions up to the
+        depth it was built for; best_move() searches deeper ones live.
+
+        Nothing is read up front: each lookup touches one or two pages of the
+        file, and processes mapping the same file share it through the page
+        cache.
+    '''
+    def __init__(self, path: str) -> None:
+        '''
+        Inputs
+            path: The path to a book file written by build_opening_book
+            ... (type str)
+        '''
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.grid_size, self.pieces_per_player, byte_order, \
+            self._bits, self.positions = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f'{path}: not a book file')
+        if BYTE_ORDERS[byte_order] != sys.byteorder:
+            self._map.close()
+            raise ValueError(f'{path}: written with {BYTE_ORDERS[byte_order]}'
+                             f'-endian byte order')
+        slots = 1 << self._bits
+        view = memoryview(self._map)[HEADER.size:]
+        self._keys = view[:slots * 8].cast('Q')
+        self._entries = view[slots * 8:slots * 10].cast('H')
+
+    def __len__(self) -> int:
+        return self.positions
+
+    def close(self) -> None:
+        self._keys.release()
+        self._entries.release()
+        self._map.close()
+
+    def __enter__(self) -> 'OpeningBook':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def lookup(self, board: Board, naught_pieces: Pieces, cross_pieces: Pieces,
+               to_move: str) -> tuple[int, Move | None] | None:
+        '''
+        Inputs
+            board: A squared board of cells which may contain pieces
+            ... (type Board | BitBoard)
+            naught_pieces: The available pieces of player NAUGHT (type Pieces)
+            cross_pieces: The available pieces of player CROSS (type Pieces)
+            to_move: The player to move, NAUGHT or CROSS (type str)
+        Outputs
+            Returns the value of the position for to_move (WIN, DRAW or LOSS)
+            ... and a best move, or None if the position is not in the book
+            ... (type tuple[int, Move | None] | None)
+        '''
+        if not isinstance(board, BitBoard):
+            board = BitBoard.from_board(board)
+        if board.grid_size != self.grid_size:
+            return None
+        key, transform = canonical_bitboard_key(
+            board, pieces_mask(naught_pieces), pieces_mask(cross_pieces),
+            to_move)
+        packed = pack_key(key, self.grid_size, self.pieces_per_player)
+
+        keys, mask = self._keys, (1 << self._bits) - 1
+        slot = _slot(packed, self._bits)
+        while keys[slot]:
+            if keys[slot] == packed:
+                entry = self._entries[slot]
+                value = (entry >> 8) - 1
+                cell, size = entry >> 4 & 0xF, entry & 0xF
+                if not size:
+                    return value, None
+                move = (cell // self.grid_size, cell % self.grid_size, size)
+                return value, from_canonical_move(move, transform,
+                                                  self.grid_size)
+            slot = (slot + 1) & mask
+        return None
+
+    def best_move(self, board: Board, naught_pieces: Pieces,
+                  cross_pieces: Pieces, to_move: str) -> Move | None:
+        '''
+        Inputs
+            board: A board on which the game is not over yet
+            ... (type Board | BitBoard)
+            naught_pieces: The available pieces of player NAUGHT (type Pieces)
+            cross_pieces: The available pieces of player CROSS (type Pieces)
+            to_move: The player to move, NAUGHT or CROSS (type str)
+        Outputs
+            Returns a best move from the book, or from solve() once play has
+            ... left the book, or None if to_move has no valid move
+            ... (type Move | None)
+        '''
+        found = self.lookup(board, naught_pieces, cross_pieces, to_move)
+        if found is None:
+            found = solve(board, naught_pieces, cross_pieces, to_move)[:2]
+        return found[1]
+
+
+def opening_positions(grid_size: int, pieces_per_player: int, plies: int
+                      ) -> dict[int, tuple]:
+    '''
+    Inputs
+        grid_size: The number of rows (and columns) of the board (type int)
+        pieces_per_player: The number of pieces of each player (type int)
+        plies: How many moves deep to go from initial_state() (type int)
+    Outputs
+        Returns every position reachable within plies moves on which the game
+        ... is not over, one per class of equivalent positions, by packed
+        ... key: (board, naught_pieces, cross_pieces, to_move, transform)
+        ... (type dict[int, tuple])
+    '''
+    start = (BitBoard(grid_size), generate_initial_pieces(pieces_per_player),
+             generate_initial_pieces(pieces_per_player), NAUGHT)
+    positions = {}
+    frontier = [start]
+    for ply in range(plies + 1):
+        following = []
+        for board, naught_pieces, cross_pieces, to_move in frontier:
+            if check_stalemate(board, naught_pieces, cross_pieces) or \
+                    check_win(board) is not None:
+                continue
+            key, transform = canonical_bitboard_key(
+                board, pieces_mask(naught_pieces), pieces_mask(cross_pieces),
+                to_move)
+            packed = pack_key(key, grid_size, pieces_per_player)
+            if packed in positions:
+                continue
+            positions[packed] = (board, naught_pieces, cross_pieces, to_move,
+                                 transform)
+            if ply == plies:
+                continue
+
+            own = naught_pieces if to_move == NAUGHT else cross_pieces
+            opponent = CROSS if to_move == NAUGHT else NAUGHT
+            moved = False
+            for size in own:
+                for row in range(grid_size):
+                    for col in range(grid_size):
+                        move = (row, col, size)
+                        if not board.can_place(move):
+                            continue
+                        moved = True
+                        child = board.copy()
+                        child.place(to_move, move)
+                        remaining = [piece for piece in own if piece != size]
+                        if to_move == NAUGHT:
+                            following.append((child, remaining, cross_pieces,
+                                              opponent))
+                        else:
+                            following.append((child, naught_pieces, remaining,
+                                              opponent))
+            # A player without a valid move passes
+            if not moved:
+                following.append((board, naught_pieces, cross_pieces,
+                                  opponent))
+        frontier = following
+    return positions
+
+
+def build_opening_book(path: str, grid_size: int = GRID_SIZE,
+               pieces_per_player: int = PIECES_PER_PLAYER, plies: int = 3,
+               table: TranspositionTable | None = None) -> int:
+    '''
+    Inputs
+        path: Where to write the book file (type str)
+        grid_size: The number of rows (and columns) of the board (type int)
+        pieces_per_player: The number of pieces of each player (type int)
+        plies: How many moves deep from initial_state() to solve; the book
+        ... holds no deeper position (type int)
+        table: A transposition table shared by every solve (type
+        ... TranspositionTable | None)
+    Outputs
+        Solves every opening position and writes the book. Returns the
+        ... number of positions written (type int)
+        Raises ValueError if positions of the game do not fit a book key
+    '''
+    if not _key_fits(grid_size, pieces_per_player):
+        raise ValueError(f'A {grid_size}x{grid_size} game with '
+                         f'{pieces_per_player} pieces does not fit a book')
+    if table is None:
+        table = TranspositionTable()
+    positions = opening_positions(grid_size, pieces_per_player, plies)
+
+    bits = max(1, (int(len(positions) / MAX_LOAD) - 1).bit_length())
+    keys = array('Q', bytes(8 << bits))
+    entries = array('H', bytes(2 << bits))
+    mask = (1 << bits) - 1
+    for packed, (board, naught_pieces, cross_pieces, to_move, transform) \
+            in positions.items():
+        result = solve(board, naught_pieces, cross_pieces, to_move, table)
+        entry = (result.value + 1) << 8
+        if result.move is not None:
+            row, col, size = to_canonical_move(result.move, transform,
+                                               grid_size)
+            entry |= (row * grid_size + col) << 4 | size
+        slot = _slot(packed, bits)
+        while keys[slot]:
+            slot = (slot + 1) & mask
+        keys[slot], entries[slot] = packed, entry
+
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, grid_size, pieces_per_player,
+                               BYTE_ORDERS.index(sys.byteorder), bits,
+                               len(positions)))
+        keys.tofile(file)
+        entries.tofile(file)
+    return len(positions)
+
+
+def main() -> None:
+    '''
+    Inputs: No input as parameters; reads the command line
+    Outputs
+        Builds a book file, then reads every position back from it and
+        ... prints the lookup rate; Returns None
+    '''
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('path')
+    parser.add_argument('--grid-size', type=int, default=GRID_SIZE)
+    parser.add_argument('--pieces', type=int, default=PIECES_PER_PLAYER)
+    parser.add_argument('--plies', type=int, default=3,
+                        help='how many moves deep the book goes; deeper '
+                             'positions are searched live by the solver')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = build_opening_book(args.path, args.grid_size, args.pieces, args.plies)
+    print(f"{count} positions solved in {time.perf_counter() - start:.1f}s")
+
+    positions = opening_positions(args.grid_size, args.pieces, args.plies)
+    with OpeningBook(args.path) as book:
+        start = time.perf_counter()
+        for board, naught_pieces, cross_pieces, to_move, _ in \
+                positions.values():
+            if book.lookup(board, naught_pieces, cross_pieces,
+                           to_move) is None:
+                raise ValueError('A book position is missing')
+        seconds = time.perf_counter() - start
+        config = game_config(args.grid_size, args.pieces)
+        value, move = book.lookup(initial_state(config),
+                                  config.initial_pieces(),
+                                  config.initial_pieces(), NAUGHT)
+    outcome = {WIN: 'O wins', LOSS: 'X wins'}.get(value, 'Stalemate')
+    print(f"{outcome} with perfect play, best first move {move}")
+    print(f"{len(positions) / seconds:,.0f} lookups/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+""" Plays many concurrent random games against server.py and times moves. """
+import argparse
+import asyncio
+import random
+import time
+
+from a1 import *
+from movegen import legal_moves
+from server import ENCODING
+
+MOVE_PROMPT = "Enter your move: "
+AGAIN_PROMPT = "Play again? "
+PERCENTILES = (50, 90, 99)
+
+
+class LoadStats:
+    ''' Counters shared by every client session, and the time each move
+        took from sending it to receiving the next prompt.
+    '''
+    def __init__(self) -> None:
+        self.latencies = []
+        self.sessions = self.games = self.aborted = self.failed = 0
+
+    def percentile(self, percent: float) -> float:
+        '''
+        Inputs
+            percent: Which percentile, from 0 to 100 (type float)
+        Outputs
+            Returns the nearest-rank percentile of the move latencies in
+            ... seconds, 0.0 if there are none (type float)
+        '''
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        rank = max(1, -(-len(ordered) * percent // 100))
+        return ordered[int(rank) - 1]
+
+
+async def _read_prompt(reader: asyncio.StreamReader) -> tuple[str, str]:
+    '''
+    Inputs
+        reader: The connection from the server (type asyncio.StreamReader)
+    Outputs
+        Reads up to the next prompt. Returns the text before it and the
+        ... prompt, '' if the server closed the session (type tuple[str, str])
+    '''
+    text = ''
+    while True:
+        for prompt in (MOVE_PROMPT, AGAIN_PROMPT):
+            if text.endswith(prompt):
+                return text[:-len(prompt)], prompt
+        data = await reader.read(4096)
+        if not data:
+            return text, ''
+        text += data.decode(ENCODING)
+
+
+async def client(stats: LoadStats, config: GameConfig, games: int,
+                 rng: random.Random, host: str, port: int,
+                 path: str | None) -> None:
+    '''
+    Inputs
+        stats: Where to count the session (type LoadStats)
+        config: The variant of the game the server plays (type GameConfig)
+        games: How many games to play in the session (type int)
+        rng: Picks the moves (type random.Random)
+        host, port, path: The server's address, its Unix socket if path is
+        ... given (type str, int, str | None)
+    Outputs
+        Plays both players' moves at random until games are over; Returns
+        ... None
+    '''
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    try:
+        state = GameState(config)
+        played = 0
+        text, prompt = await _read_prompt(reader)
+        while prompt:
+            if prompt == AGAIN_PROMPT:
+                played += 1
+                stats.games += 1
+                state = GameState(config)
+                answer = "y" if played < games else "n"
+                writer.write(f"{answer}\n".encode(ENCODING))
+                text, prompt = await _read_prompt(reader)
+                continue
+
+            # The server names the player to move before every prompt
+            player = text[text.rindex(" turn to move") - 1]
+            own = state.naught_pieces if player == NAUGHT else \
+                state.cross_pieces
+            moves = list(legal_moves(state.board, own))
+            # The game keeps asking a player without a valid move
+            if not moves:
+                stats.aborted += 1
+                return None
+            row, col, size = rng.choice(moves)
+            state.place_piece(player, (row, col, size))
+            writer.write(f"{row + 1} {col + 1} {size}\n".encode(ENCODING))
+            start = time.perf_counter()
+            text, prompt = await _read_prompt(reader)
+            stats.latencies.append(time.perf_counter() - start)
+        stats.sessions += 1
+    finally:
+        writer.close()
+    return None
+
+
+async def run_load(sessions: int, games: int, config: GameConfig,
+                   host: str = '127.0.0.1', port: int = 7030,
+                   path: str | None = None, concurrency: int | None = None,
+                   seed: int | None = None) -> LoadStats:
+    '''
+    Inputs
+        sessions: How many client sessions to run (type int)
+        games: How many games each session plays (type int)
+        config: The variant of the game the server plays (type GameConfig)
+        host, port, path: The server's address, its Unix socket if path is
+        ... given (type str, int, str | None)
+        concurrency: The most sessions open at once, all if None
+        ... (type int | None)
+        seed: The seed of the random number generator (type int | None)
+    Outputs
+        Returns the statistics of the sessions (type LoadStats)
+    '''
+    stats = LoadStats()
+    rng = random.Random(seed)
+    limit = asyncio.Semaphore(concurrency or sessions)
+
+    async def limited() -> None:
+        async with limit:
+            try:
+                await client(stats, config, games, rng, host, port, path)
+            except (ConnectionError, OSError):
+                stats.failed += 1
+
+    await asyncio.gather(*(limited() for _ in range(sessions)))
+    return stats
+
+
+def main() -> None:
+    '''
+    Inputs: No input as parameters; reads the command line
+    Outputs
+        Runs the load and prints the move latency percentiles and rates;
+        ... Returns None
+    '''
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7030)
+    parser.add_argument('--unix', metavar='PATH', default=None)
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--games', type=int, default=1,
+                        help='games per session')
+    parser.add_argument('--concurrency', type=int, default=None)
+    parser.add_argument('--grid-size', type=int, default=GRID_SIZE)
+    parser.add_argument('--pieces', type=int, default=PIECES_PER_PLAYER)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    config = game_config(args.grid_size, args.pieces)
+    start = time.perf_counter()
+    stats = asyncio.run(run_load(args.sessions, args.games, config,
+                                 args.host, args.port, args.unix,
+                                 args.concurrency, args.seed))
+    seconds = time.perf_counter() - start
+    moves = len(stats.latencies)
+    print(f"{stats.sessions} sessions, {stats.games} games, {moves} moves "
+          f"in {seconds:.2f}s ({moves / seconds:,.0f} moves/s); "
+          f"{stats.aborted} aborted, {stats.failed} failed")
+    print("Move latency: " + ", ".join(
+        f"p{percent} {stats.percentile(percent) * 1000:.2f}ms"
+        for percent in PERCENTILES) +
+        f", max {max(stats.latencies, default=0.0) * 1000:.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
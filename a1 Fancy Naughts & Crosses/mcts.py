@@ -0,0 +1,441 @@
+""" A Monte-Carlo tree search player for the fancy tic-tac-toe game of A1. """
+import argparse
+import math
+import random
+import threading
+import time
+
+import a1
+from a1 import *
+from bitboard import FIELD_BITS, SIZE_MASK, mask_pieces
+from movegen import legal_moves
+from records import STALEMATE
+
+DEFAULT_EXPLORATION = math.sqrt(2)
+# Rewards for the player who made a move, by how the playout ended
+WIN_REWARD, DRAW_REWARD, LOSS_REWARD = 1.0, 0.5, 0.0
+# Random cells and sizes tried in a playout before listing every valid move
+PLAYOUT_TRIES = 8
+# The most playouts run while pondering on one move of the opponent, which
+# bounds the memory the tree takes while the user is away
+MAX_PONDER_PLAYOUTS = 200_000
+
+
+def _outcome(board: BitBoard, naught_mask: int, cross_mask: int
+             ) -> str | None:
+    '''
+    Inputs
+        board: The board after a move (type BitBoard)
+        naught_mask, cross_mask: Bitmasks of both players' available pieces
+        ... (type int)
+    Outputs
+        Returns STALEMATE on a stalemate, else the winner, or None if the game
+        ... goes on; stalemate is checked first, as in main() (type str | None)
+    '''
+    if board.is_stalemate(naught_mask, cross_mask):
+        return STALEMATE
+    return board.winner()
+
+
+def playout(board: BitBoard, naught_mask: int, cross_mask: int, player: str,
+            rng: random.Random) -> str:
+    '''
+    Inputs
+        board: A board on which the game is not over yet; it is played on
+        ... (type BitBoard)
+        naught_mask, cross_mask: Bitmasks of both players' available pieces
+        ... (type int)
+        player: The player to move (type str)
+        rng: The random number generator to draw from (type random.Random)
+    Outputs
+        Plays random valid moves to the end of the game. Returns the winner,
+        ... or STALEMATE (type str)
+    '''
+    n = board.grid_size
+    cells = n * n
+    masks = {NAUGHT: naught_mask, CROSS: cross_mask}
+    opponent = CROSS if player == NAUGHT else NAUGHT
+    while True:
+        mask = masks[player]
+        sizes = mask_pieces(mask)
+        move = None
+        # Most random cells take most pieces, so guessing is usually enough
+        if sizes:
+            for _ in range(PLAYOUT_TRIES):
+                index, size = rng.randrange(cells), rng.choice(sizes)
+                if size > (board.sizes >> (FIELD_BITS * index)) & SIZE_MASK:
+                    move = (index // n, index % n, size)
+                    break
+            else:
+                moves = list(legal_moves(board, sizes))
+                if moves:
+                    move = rng.choice(moves)
+        # A player without a valid move passes
+        if move is not None:
+            board.place(player, move)
+            masks[player] = mask & ~(1 << move[2])
+            result = _outcome(board, masks[NAUGHT], masks[CROSS])
+            if result is not None:
+                return result
+        player, opponent = opponent, player
+
+
+class Node:
+    ''' A position in the search tree, reached by move from its parent. '''
+    __slots__ = ('board', 'naught_mask', 'cross_mask', 'player', 'move',
+                 'parent', 'children', 'untried', 'visits', 'reward',
+                 'result')
+
+    def __init__(self, board: BitBoard, naught_mask: int, cross_mask: int,
+                 player: str, move: Move | None = None,
+                 parent: 'Node | None' = None,
+                 result: str | None = None) -> None:
+        '''
+        Inputs
+            board: The board of this position (type BitBoard)
+            naught_mask, cross_mask: Bitmasks of both players' available
+            ... pieces (type int)
+            player: The player to move (type str)
+            move: The move from the parent, None for a pass (type Move | None)
+            parent: The position before move (type Node | None)
+            result: How the game ended here, if it did (type str | None)
+        '''
+        self.board = board
+        self.naught_mask, self.cross_mask = naught_mask, cross_mask
+        self.player = player
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.visits = 0
+        self.reward = 0.0   # Total reward of the player who made move
+        self.result = result
+        self.untried = None  # Moves not expanded yet, listed on first visit
+
+    def key(self) -> tuple:
+        return (self.board.naughts, self.board.crosses, self.board.sizes,
+                self.naught_mask, self.cross_mask, self.player)
+
+    def expand(self, rng: random.Random) -> 'Node':
+        '''
+        Inputs
+            rng: The random number generator to draw from (type random.Random)
+        Outputs
+            Adds a child for one untried move, picked at random, and returns
+            ... it (type Node)
+        '''
+        if self.untried is None:
+            own, other = self.naught_mask, self.cross_mask
+            if self.player == CROSS:
+                own, other = other, own
+            # Equivalent moves are left out. A player without a valid move
+            # ... passes: its only move is None
+            self.untried = list(legal_moves(self.board, mask_pieces(own),
+                                            mask_pieces(other))) or [None]
+        i = rng.randrange(len(self.untried))
+        self.untried[i], self.untried[-1] = self.untried[-1], self.untried[i]
+        move = self.untried.pop()
+
+        board = self.board.copy()
+        naught_mask, cross_mask = self.naught_mask, self.cross_mask
+        result = None
+        if move is not None:
+            board.place(self.player, move)
+            if self.player == NAUGHT:
+                naught_mask &= ~(1 << move[2])
+            else:
+                cross_mask &= ~(1 << move[2])
+            result = _outcome(board, naught_mask, cross_mask)
+        opponent = CROSS if self.player == NAUGHT else NAUGHT
+        child = Node(board, naught_mask, cross_mask, opponent, move, self,
+                     result)
+        self.children.append(child)
+        return child
+
+    def best_child(self, exploration: float) -> 'Node':
+        '''
+        Inputs
+            exploration: The UCT exploration constant (type float)
+        Outputs
+            Returns the child with the highest upper confidence bound
+            ... (type Node)
+        '''
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: child.reward /
+                   child.visits + exploration *
+                   math.sqrt(log_visits / child.visits))
+
+
+class MCTSPlayer:
+    ''' Chooses moves by UCT search, within a budget of playouts, seconds
+        or both.
+
+        An instance is called like a main() agent, player(state, player),
+        e.g. main(agents={CROSS: MCTSPlayer(seconds=1.0)}). The tree below
+        the chosen move is kept, so the search carries over to the next
+        move once the opponent's reply is found in it.
+
+        With ponder=True the search goes on in a background thread on the
+        opponent's time, from the position after the chosen move, and is
+        stopped as soon as the player is called again. A playout budget
+        then counts the visits already made below the opponent's reply, so
+        the reply comes sooner at the same depth; a time budget is spent
+        in full and searches deeper.
+    '''
+    def __init__(self, playouts: int | None = None,
+                 seconds: float | None = None,
+                 exploration: float = DEFAULT_EXPLORATION,
+                 seed: int | None = None, ponder: bool = False) -> None:
+        '''
+        Inputs
+            playouts: The most playouts per move (type int | None)
+            seconds: The most time per move (type float | None)
+            exploration: The UCT exploration constant (type float)
+            seed: The seed of the random number generator (type int | None)
+            ponder: Whether to search on the opponent's time (type bool)
+        '''
+        if playouts is None and seconds is None:
+            playouts = 1000
+        self.playouts, self.seconds = playouts, seconds
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.root = None
+        self.ponder = ponder
+        self._ponderer = None
+        self._stop_pondering = threading.Event()
+        # Statistics of the last move chosen and of all of them
+        self.last_playouts, self.last_seconds = 0, 0.0
+        self.total_playouts, self.total_seconds = 0, 0.0
+        self.reused_visits = 0
+        self.pondered_playouts = 0
+
+    @property
+    def playouts_per_second(self) -> float:
+        ''' Playouts per second over every move chosen so far. '''
+        if not self.total_seconds:
+            return 0.0
+        return self.total_playouts / self.total_seconds
+
+    def _find_root(self, key: tuple) -> 'Node | None':
+        '''
+        Inputs
+            key: The key of the position to move from (type tuple)
+        Outputs
+            Returns the node of that position within two plies of the last
+            ... root, or None (type Node | None)
+        '''
+        if self.root is None:
+            return None
+        frontier = [self.root]
+        for _ in range(3):
+            following = []
+            for node in frontier:
+                if node.key() == key:
+                    return node
+                following.extend(node.children)
+            frontier = following
+        return None
+
+    def search(self, board: BitBoard, naught_mask: int, cross_mask: int,
+               player: str) -> Move | None:
+        '''
+        Inputs
+            board: A board on which the game is not over yet (type BitBoard)
+            naught_mask, cross_mask: Bitmasks of both players' available
+            ... pieces (type int)
+            player: The player to move (type str)
+        Outputs
+            Returns the most visited move, or None if player has no valid
+            ... move (type Move | None)
+        '''
+        # The opponent has moved: take the pondered tree back and re-root it
+        # ... at the reply, if it was searched
+        self.stop_pondering()
+        key = (board.naughts, board.crosses, board.sizes, naught_mask,
+               cross_mask, player)
+        root = self._find_root(key)
+        if root is None:
+            root = Node(board.copy(), naught_mask, cross_mask, player)
+        root.parent = None
+        self.root = root
+        self.reused_visits = root.visits
+
+        start = time.perf_counter()
+        deadline = None if self.seconds is None else start + self.seconds
+        budget = self.playouts
+        # Visits made while pondering count towards the budget
+        if self.ponder and budget is not None:
+            budget = max(0, budget - root.visits)
+        playouts = 0
+        # The root is always expanded, so a move is found even when the
+        # ... budget was spent pondering or the deadline has passed
+        while not root.children or \
+                (budget is None or playouts < budget) and \
+                (deadline is None or time.perf_counter() < deadline):
+            self._iterate(root)
+            playouts += 1
+
+        self.last_playouts = playouts
+        self.last_seconds = time.perf_counter() - start
+        self.total_playouts += playouts
+        self.total_seconds += self.last_seconds
+        if not root.children:
+            return None
+        best = max(root.children, key=lambda child: child.visits)
+        # Keep the chosen subtree for the next move
+        self.root = best
+        if self.ponder and best.result is None:
+            self._start_pondering(best)
+        return best.move
+
+    def _iterate(self, root: Node) -> None:
+        '''
+        Inputs
+            root: The node to search from (type Node)
+        Outputs
+            Runs one playout from root and scores it along the way down;
+            ... Returns None
+        '''
+        # Selection: follow the best bounds down to a node with moves left
+        # ... to try, or to the end of the game
+        node = root
+        while node.result is None and node.untried == [] and node.children:
+            node = node.best_child(self.exploration)
+        # Expansion and simulation
+        if node.result is None:
+            node = node.expand(self.rng)
+        result = node.result
+        if result is None:
+            result = playout(node.board.copy(), node.naught_mask,
+                             node.cross_mask, node.player, self.rng)
+        # Backpropagation, each node scored for the player who moved into it
+        while node is not None:
+            node.visits += 1
+            if node.parent is not None:
+                mover = node.parent.player
+                if result == STALEMATE:
+                    node.reward += DRAW_REWARD
+                elif result == mover:
+                    node.reward += WIN_REWARD
+                else:
+                    node.reward += LOSS_REWARD
+            node = node.parent
+        return None
+
+    def _start_pondering(self, root: Node) -> None:
+        '''
+        Inputs
+            root: The position after the chosen move, the opponent to move
+            ... (type Node)
+        Outputs
+            Searches from root in a background thread until stop_pondering()
+            ... or MAX_PONDER_PLAYOUTS; Returns None
+        '''
+        self._stop_pondering.clear()
+        self.pondered_playouts = 0
+        # The tree above is done with; only root's subtree is searched
+        root.parent = None
+
+        def ponder() -> None:
+            stop = self._stop_pondering
+            while not stop.is_set() and \
+                    self.pondered_playouts < MAX_PONDER_PLAYOUTS:
+                self._iterate(root)
+                self.pondered_playouts += 1
+
+        self._ponderer = threading.Thread(target=ponder, daemon=True,
+                                          name='mcts-ponder')
+        self._ponderer.start()
+
+    def stop_pondering(self) -> None:
+        '''
+        Outputs
+            Stops the background search, if any, and waits for its last
+            ... playout; the tree is then the caller's again. Returns None
+        '''
+        if self._ponderer is not None:
+            self._stop_pondering.set()
+            self._ponderer.join()
+            self._ponderer = None
+        return None
+
+    def end_game(self) -> None:
+        '''
+        Outputs
+            Stops pondering and forgets the tree, as the game is over;
+            ... Returns None
+        '''
+        self.stop_pondering()
+        self.root = None
+        return None
+
+    def __call__(self, state: GameState, player: str) -> Move | None:
+        '''
+        Inputs
+            state: The board and pieces of the current game (type GameState)
+            player: The player to move (type str)
+        Outputs
+            Returns the move chosen, or None to pass (type Move | None)
+        '''
+        return self.search(BitBoard.from_board(state.board),
+                           pieces_mask(state.naught_pieces),
+                           pieces_mask(state.cross_pieces), player)
+
+
+def main() -> None:
+    '''
+    Inputs: No input as parameters; reads the command line
+    Outputs
+        Plays one game between two MCTS players, or against the user with
+        ... --play, printing the playouts per second of each move; Returns
+        ... None
+    '''
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--grid-size', type=int, default=8)
+    parser.add_argument('--pieces', type=int, default=9)
+    parser.add_argument('--playouts', type=int, default=None)
+    parser.add_argument('--seconds', type=float, default=None)
+    parser.add_argument('--exploration', type=float,
+                        default=DEFAULT_EXPLORATION)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--play', action='store_true',
+                        help='play O against the computer as X')
+    parser.add_argument('--ponder', action='store_true',
+                        help='with --play, let the computer think on your '
+                             'time')
+    args = parser.parse_args()
+
+    if args.play:
+        computer = MCTSPlayer(args.playouts, args.seconds, args.exploration,
+                              args.seed, ponder=args.ponder)
+        a1.main(agents={CROSS: computer},
+                config=game_config(args.grid_size, args.pieces))
+        computer.stop_pondering()
+        if computer.total_playouts:
+            print(f"The computer took {computer.total_seconds:.2f}s in all "
+                  f"for {computer.total_playouts} playouts")
+        return
+
+    players = {player: MCTSPlayer(args.playouts, args.seconds,
+                                  args.exploration, args.seed)
+               for player in (NAUGHT, CROSS)}
+    state = GameState(game_config(args.grid_size, args.pieces))
+    player = NAUGHT
+    while not state.check_stalemate() and state.check_win() is None:
+        chooser = players[player]
+        move = chooser(state, player)
+        if move is not None:
+            state.place_piece(player, move)
+        print(f"{player} plays {move}: {chooser.last_playouts} playouts in "
+              f"{chooser.last_seconds:.2f}s "
+              f"({chooser.last_playouts / chooser.last_seconds:,.0f}/s, "
+              f"{chooser.reused_visits} reused)")
+        player = CROSS if player == NAUGHT else NAUGHT
+    print_game(state.board, state.naught_pieces, state.cross_pieces)
+    print("Stalemate!" if state.check_stalemate()
+          else f"{state.check_win()} wins!")
+    for player, chooser in players.items():
+        print(f"{player}: {chooser.playouts_per_second:,.0f} playouts/s")
+
+
+if __name__ == '__main__':
+    main()
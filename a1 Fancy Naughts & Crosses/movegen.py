@@ -0,0 +1,96 @@
+""" Legal move generation for the fancy tic-tac-toe game of A1. """
+from bisect import bisect_right
+from typing import Any, Callable, Iterator
+
+from a1 import *
+from bitboard import FIELD_BITS, SIZE_MASK
+
+# Orders in which legal_moves yields moves; a key function may be given
+# instead
+ROW_MAJOR = 'row-major'          # Cell by cell, each cell's sizes ascending
+SMALLEST_FIRST = 'smallest-first'  # Size by size, cells in row-major order
+BIGGEST_FIRST = 'biggest-first'    # As SMALLEST_FIRST, biggest size first
+Order = str | Callable[[Move], Any]
+
+
+def covered_sizes(board: Board) -> list[int]:
+    '''
+    Inputs
+        board: A squared board of cells which may contain pieces
+        ... (type Board | BitBoard)
+    Outputs
+        Returns the size of the piece on every cell, row by row, 0 for an
+        ... empty cell (type list[int])
+    '''
+    if isinstance(board, BitBoard):
+        sizes = board.sizes
+        return [(sizes >> (FIELD_BITS * i)) & SIZE_MASK
+                for i in range(board.grid_size ** 2)]
+    return [int(cell[1:]) if cell != EMPTY else 0
+            for row in board for cell in row]
+
+
+def min_legal_sizes(board: Board, pieces: Pieces) -> list[list[int | None]]:
+    '''
+    Inputs
+        board: A squared board of cells which may contain pieces
+        ... (type Board | BitBoard)
+        pieces: The available pieces of the player to move (type Pieces)
+    Outputs
+        Returns, for every cell, the smallest available piece which may be
+        ... placed there, or None if there is none (type list[list[int]])
+    '''
+    sizes = sorted(pieces)
+    n = len(board)
+    covered = covered_sizes(board)
+    smallest = [sizes[i] if i < len(sizes) else None
+                for i in (bisect_right(sizes, size) for size in covered)]
+    return [smallest[row * n:(row + 1) * n] for row in range(n)]
+
+
+def legal_moves(board: Board, pieces: Pieces,
+                opponent_pieces: Pieces | None = None,
+                order: Order = ROW_MAJOR) -> Iterator[Move]:
+    '''
+    Inputs
+        board: A squared board of cells which may contain pieces
+        ... (type Board | BitBoard)
+        pieces: The available pieces of the player to move (type Pieces)
+        opponent_pieces: The opponent's available pieces; if given, of the
+        ... sizes which no opponent piece can ever cover on a cell only the
+        ... smallest is yielded there, as the bigger ones only give away a
+        ... bigger piece (type Pieces | None)
+        order: ROW_MAJOR, SMALLEST_FIRST, BIGGEST_FIRST or a key function
+        ... to sort the moves by (type Order)
+    Outputs
+        Yields every move which passes check_move, without equivalent ones
+        ... if opponent_pieces is given (type Iterator[Move])
+    '''
+    sizes = sorted(set(pieces))
+    n = len(board)
+    covered = covered_sizes(board)
+    if opponent_pieces is None:
+        safe = len(sizes)
+    else:
+        # Sizes from sizes[safe] on beat every piece the opponent has left
+        safe = bisect_right(sizes, max(opponent_pieces, default=0))
+    # The sizes which may go on each cell are sizes[first[i]:last[i]]
+    first = [bisect_right(sizes, size) for size in covered]
+    last = [min(len(sizes), max(safe, i) + 1) for i in first]
+
+    if order == ROW_MAJOR:
+        for i, (start, stop) in enumerate(zip(first, last)):
+            row, col = divmod(i, n)
+            for size in sizes[start:stop]:
+                yield (row, col, size)
+    elif order in (SMALLEST_FIRST, BIGGEST_FIRST):
+        indices = range(len(sizes))
+        if order == BIGGEST_FIRST:
+            indices = reversed(indices)
+        for k in indices:
+            for i, (start, stop) in enumerate(zip(first, last)):
+                if start <= k < stop:
+                    yield (i // n, i % n, sizes[k])
+    else:
+        yield from sorted(legal_moves(board, pieces, opponent_pieces),
+                          key=order)
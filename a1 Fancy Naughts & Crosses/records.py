@@ -0,0 +1,234 @@
+""" A compact binary format for recorded games of the A1 tic-tac-toe. """
+import mmap
+import os
+import sys
+from typing import BinaryIO, Iterator, NamedTuple
+
+from a1 import *
+
+# A file is MAGIC followed by game records. Each record is three bytes:
+#   (grid_size << 4) | pieces_per_player, the number of moves, the result
+# followed by the moves packed 12 bits each, (row * grid_size + col) << 4 |
+# size, padded to a whole byte. A player who passes (has no valid move) is
+# not recorded, as replaying the moves shows when that happens.
+MAGIC = b'A1GR\x01'
+HEADER_SIZE = 3
+MOVE_BITS = 12
+STALEMATE = 'Stalemate'
+RESULT_CODES = {None: 0, NAUGHT: 1, CROSS: 2, STALEMATE: 3}
+RESULTS = {code: result for result, code in RESULT_CODES.items()}
+
+
+class GameRecord(NamedTuple):
+    ''' One recorded game. '''
+    grid_size: int
+    pieces_per_player: int
+    moves: list[Move]
+    result: str | None      # NAUGHT, CROSS, STALEMATE, or None if unfinished
+
+
+def _moves_size(count: int) -> int:
+    '''
+    Inputs
+        count: A number of moves (type int)
+    Outputs
+        Returns the number of bytes the packed moves take (type int)
+    '''
+    return (count * MOVE_BITS + 7) // 8
+
+
+def encode_game(record: GameRecord) -> bytes:
+    '''
+    Inputs
+        record: The game to encode (type GameRecord)
+    Outputs
+        Returns the record's bytes (type bytes)
+        Raises ValueError if the game does not fit the format
+    '''
+    n, pieces = record.grid_size, record.pieces_per_player
+    if not 2 <= n <= 8 or not 1 <= pieces <= 15:
+        raise ValueError(f'Cannot record a {n}x{n} game with {pieces} pieces')
+    if len(record.moves) > 255 or record.result not in RESULT_CODES:
+        raise ValueError('Cannot record this game')
+
+    packed = 0
+    for row, col, size in record.moves:
+        if not (0 <= row < n and 0 <= col < n and 1 <= size <= pieces):
+            raise ValueError(f'Cannot record the move {(row, col, size)}')
+        packed = packed << MOVE_BITS | (row * n + col) << 4 | size
+    length = _moves_size(len(record.moves))
+    packed <<= length * 8 - len(record.moves) * MOVE_BITS
+    header = bytes((n << 4 | pieces, len(record.moves),
+                    RESULT_CODES[record.result]))
+    return header + packed.to_bytes(length, 'big')
+
+
+def decode_moves(data: bytes, count: int, grid_size: int) -> list[Move]:
+    '''
+    Inputs
+        data: The packed moves (type bytes)
+        count: The number of moves packed (type int)
+        grid_size: The number of rows (and columns) of the board (type int)
+    Outputs
+        Returns the moves (type list[Move])
+    '''
+    packed = int.from_bytes(data, 'big') >> (len(data) * 8 - count * MOVE_BITS)
+    moves = []
+    for i in range(count - 1, -1, -1):
+        code = (packed >> (i * MOVE_BITS)) & ((1 << MOVE_BITS) - 1)
+        cell = code >> 4
+        moves.append((cell // grid_size, cell % grid_size, code & 0xF))
+    return moves
+
+
+class GameRecordWriter:
+    ''' Writes games to a binary stream, either whole or move by move as a
+        game loop plays them.
+    '''
+    def __init__(self, stream: BinaryIO) -> None:
+        '''
+        Inputs
+            stream: A binary stream open for writing (type BinaryIO)
+        '''
+        self._stream = stream
+        self._stream.write(MAGIC)
+        self._game = None
+        self.games = 0
+
+    def begin_game(self, grid_size: int = GRID_SIZE,
+                   pieces_per_player: int = PIECES_PER_PLAYER) -> None:
+        '''
+        Inputs
+            grid_size: The number of rows (and columns) of the board (type int)
+            pieces_per_player: The number of pieces of each player (type int)
+        '''
+        self._game = GameRecord(grid_size, pieces_per_player, [], None)
+
+    def add_move(self, move: Move) -> None:
+        '''
+        Inputs
+            move: The move just played in the current game (type Move)
+        '''
+        self._game.moves.append(move)
+
+    def end_game(self, result: str | None) -> None:
+        '''
+        Inputs
+            result: NAUGHT, CROSS, STALEMATE, or None if unfinished (type str)
+        '''
+        game, self._game = self._game, None
+        self.write_game(game._replace(result=result))
+
+    def write_game(self, record: GameRecord) -> None:
+        '''
+        Inputs
+            record: A whole game to write (type GameRecord)
+        '''
+        self._stream.write(encode_game(record))
+        self.games += 1
+
+    def close(self) -> None:
+        ''' Writes out an unfinished game, if any, and closes the stream. '''
+        if self._game is not None:
+            self.end_game(None)
+        self._stream.close()
+
+    def __enter__(self) -> 'GameRecordWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_games(stream: BinaryIO) -> Iterator[GameRecord]:
+    '''
+    Inputs
+        stream: A binary stream positioned at the start of a record file
+        ... (type BinaryIO)
+    Outputs
+        Yields the games one at a time, reading only as far as needed
+        ... (type Iterator[GameRecord])
+        Raises ValueError if the stream is not a record file or is truncated
+    '''
+    if stream.read(len(MAGIC)) != MAGIC:
+        raise ValueError('Not a game record file')
+    while True:
+        header = stream.read(HEADER_SIZE)
+        if not header:
+            return
+        if len(header) < HEADER_SIZE:
+            raise ValueError('Truncated game record')
+        config, count, result = header
+        data = stream.read(_moves_size(count))
+        if len(data) < _moves_size(count):
+            raise ValueError('Truncated game record')
+        yield GameRecord(config >> 4, config & 0xF,
+                         decode_moves(data, count, config >> 4),
+                         RESULTS[result])
+
+
+def iter_games(buffer: bytes | mmap.mmap) -> Iterator[GameRecord]:
+    '''
+    Inputs
+        buffer: A whole record file in memory or memory-mapped (type bytes |
+        ... mmap.mmap)
+    Outputs
+        Yields the games one at a time, decoding each only when reached
+        ... (type Iterator[GameRecord])
+        Raises ValueError if the buffer is not a record file or is truncated
+    '''
+    view = memoryview(buffer)
+    if bytes(view[:len(MAGIC)]) != MAGIC:
+        raise ValueError('Not a game record file')
+    offset, end = len(MAGIC), len(view)
+    while offset < end:
+        if offset + HEADER_SIZE > end:
+            raise ValueError('Truncated game record')
+        config, count, result = view[offset:offset + HEADER_SIZE]
+        start = offset + HEADER_SIZE
+        offset = start + _moves_size(count)
+        if offset > end:
+            raise ValueError('Truncated game record')
+        yield GameRecord(config >> 4, config & 0xF,
+                         decode_moves(bytes(view[start:offset]), count,
+                                      config >> 4),
+                         RESULTS[result])
+
+
+def open_games(path: str) -> Iterator[GameRecord]:
+    '''
+    Inputs
+        path: The path to a record file (type str)
+    Outputs
+        Yields the games of the file through a memory map, so files larger
+        ... than memory can be read (type Iterator[GameRecord])
+    '''
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            raise ValueError('Not a game record file')
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield from iter_games(buffer)
+
+
+def main() -> None:
+    '''
+    Inputs: No input as parameters; reads record file paths from the command
+    ... line
+    Outputs
+        Prints how many games each file holds, by result; Returns None
+    '''
+    for path in sys.argv[1:]:
+        results = {result: 0 for result in RESULT_CODES}
+        moves = 0
+        for game in open_games(path):
+            results[game.result] += 1
+            moves += len(game.moves)
+        games = sum(results.values())
+        print(f"{path}: {games} games, {moves} moves, "
+              f"{os.path.getsize(path) / max(games, 1):.1f} bytes/game; "
+              f"O {results[NAUGHT]}, X {results[CROSS]}, "
+              f"stalemate {results[STALEMATE]}, unfinished {results[None]}")
+
+
+if __name__ == '__main__':
+    main()
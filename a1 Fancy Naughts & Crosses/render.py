@@ -0,0 +1,95 @@
+""" Alternative renderers for print_game in the fancy tic-tac-toe of A1. """
+import sys
+from typing import TextIO
+
+from a1 import *
+
+CLEAR_SCREEN = '\x1b[2J\x1b[H'
+CLEAR_LINE_END = '\x1b[K'
+CLEAR_SCREEN_END = '\x1b[J'
+
+
+def _cursor_to(line: int, column: int) -> str:
+    '''
+    Inputs
+        line, column: A screen position, both counted from 0 (type int)
+    Outputs
+        Returns the ANSI sequence moving the cursor there (type str)
+    '''
+    return f'\x1b[{line + 1};{column + 1}H'
+
+
+def null_render(board: Board, naught_pieces: Pieces, cross_pieces: Pieces
+                ) -> None:
+    '''
+    Inputs
+        board: A squared board of cells which may contain pieces (type Board)
+        naught_pieces: The available pieces of player NAUGHT (type Pieces)
+        cross_pieces: The available pieces of player CROSS (type Pieces)
+    Outputs
+        Displays nothing, for headless runs; Returns None
+    '''
+    return None
+
+
+class DiffRenderer:
+    ''' Draws the game at the top of an ANSI terminal and, after the first
+        frame, rewrites only the characters which changed.
+
+        An instance is called like print_game, e.g. main(show=DiffRenderer()).
+        Each frame is still emitted in a single write.
+    '''
+    def __init__(self, stream: TextIO | None = None) -> None:
+        '''
+        Inputs
+            stream: Where to write, sys.stdout at the time of each frame if
+            ... None (type TextIO | None)
+        '''
+        self._stream = stream
+        self._previous = None
+
+    def reset(self) -> None:
+        ''' Forgets the last frame, so the next one is drawn in full. '''
+        self._previous = None
+
+    def __call__(self, board: Board, naught_pieces: Pieces,
+                 cross_pieces: Pieces) -> None:
+        '''
+        Inputs
+            board: A squared board of cells which may contain pieces
+            ... (type Board)
+            naught_pieces: The available pieces of player NAUGHT (type Pieces)
+            cross_pieces: The available pieces of player CROSS (type Pieces)
+        Outputs
+            Writes the frame or its changes; Returns None
+        '''
+        lines = render_game(board, naught_pieces, cross_pieces).split('\n')
+        previous, self._previous = self._previous, lines
+
+        if previous is None or len(previous) != len(lines):
+            parts = [CLEAR_SCREEN, '\n'.join(lines)]
+        else:
+            parts = []
+            for i, (old, new) in enumerate(zip(previous, lines)):
+                if old == new:
+                    continue
+                if len(old) != len(new):
+                    # Lines listing the pieces shrink: rewrite them whole
+                    parts.append(_cursor_to(i, 0) + new + CLEAR_LINE_END)
+                    continue
+                # Rewrite each run of changed characters, e.g. one cell
+                j = 0
+                while j < len(new):
+                    if old[j] == new[j]:
+                        j += 1
+                        continue
+                    k = j
+                    while k < len(new) and old[k] != new[k]:
+                        k += 1
+                    parts.append(_cursor_to(i, j) + new[j:k])
+                    j = k
+            # Whatever followed the last frame (prompts, messages) is cleared
+            parts.append(_cursor_to(len(lines) - 1, 0) + CLEAR_SCREEN_END)
+
+        (self._stream or sys.stdout).write(''.join(parts))
+        return None
@@ -0,0 +1,157 @@
+""" Replays recorded A1 sessions from gameplay/ against the game logic. """
+import argparse
+import contextlib
+import glob
+import io
+import re
+import time
+from typing import NamedTuple
+
+import a1
+
+_INPUT_PATTERN = re.compile(r'(?:Enter your move: |Play again\? )(.*)')
+_FRAME_PATTERN = re.compile(r'(?m)^(?=O has:)')
+
+
+class ReplayMismatch(AssertionError):
+    ''' Raised when a replayed session renders differently from its record. '''
+
+
+class Transcript(NamedTuple):
+    ''' A recorded session: its configuration, inputs and expected output. '''
+    name: str
+    grid_size: int
+    pieces_per_player: int
+    inputs: list[str]
+    text: str
+
+
+class ReplayResult(NamedTuple):
+    ''' The outcome of replaying one transcript. '''
+    name: str
+    frames: int     # Boards rendered and compared
+    inputs: int     # Lines fed to the game
+
+
+def parse_transcript(text: str, name: str = '<transcript>') -> Transcript:
+    '''
+    Inputs
+        text: A recorded session, prompts and answers included (type str)
+        name: A name to report the transcript by (type str)
+    Outputs
+        Returns the parsed transcript; the grid size is read from the column
+        ... header and the pieces per player from the first "O has:" line
+        ... (type Transcript)
+    '''
+    pieces = re.search(r'^O has: (.*)$', text, re.MULTILINE)
+    header = re.search(r'^ {3}1(?: +\d+)*$', text, re.MULTILINE)
+    if pieces is None or header is None:
+        raise ValueError(f'{name}: no board found in transcript')
+    return Transcript(name, len(header.group().split()),
+                      len(pieces.group(1).split(', ')),
+                      _INPUT_PATTERN.findall(text), text)
+
+
+def load_transcript(path: str) -> Transcript:
+    '''
+    Inputs
+        path: The path to a transcript file (type str)
+    Outputs
+        Returns the parsed transcript (type Transcript)
+    '''
+    with open(path) as file:
+        return parse_transcript(file.read(), path)
+
+
+def _recorded_reader(transcript: Transcript, output: io.StringIO
+                     ) -> a1.Reader:
+    '''
+    Inputs
+        transcript: The session to answer prompts from (type Transcript)
+        output: Where the game prints (type io.StringIO)
+    Outputs
+        Returns a reader echoing the recorded answers as a terminal shows
+        ... them; once they run out, whatever was printed after the last
+        ... answer is dropped, as the record stops there (type Reader)
+    '''
+    read_answer = a1.line_reader(transcript.inputs, echo=True)
+    recorded = 0
+
+    def read(prompt: str = '') -> str:
+        nonlocal recorded
+        try:
+            answer = read_answer(prompt)
+        except EOFError:
+            output.seek(recorded)
+            output.truncate()
+            raise
+        recorded = output.tell()
+        return answer
+
+    return read
+
+
+def replay(transcript: Transcript) -> ReplayResult:
+    '''
+    Inputs
+        transcript: The session to replay (type Transcript)
+    Outputs
+        Plays the recorded answers through a1.main() and compares every
+        ... rendered frame with the record. Returns the replay counts
+        ... (type ReplayResult)
+        Raises ReplayMismatch at the first frame that differs
+    '''
+    output = io.StringIO()
+    # A record may stop mid-session, e.g. right after "Play again? y", which
+    # ... ends main() as the answers run out
+    config = a1.game_config(transcript.grid_size, transcript.pieces_per_player)
+    with contextlib.redirect_stdout(output):
+        a1.main(_recorded_reader(transcript, output), config=config)
+
+    expected = _FRAME_PATTERN.split(transcript.text.rstrip('\n'))
+    actual = _FRAME_PATTERN.split(output.getvalue().rstrip('\n'))
+    for i, (want, got) in enumerate(zip(expected, actual)):
+        if want != got:
+            raise ReplayMismatch(f'{transcript.name}: frame {i} differs\n'
+                                 f'--- expected\n{want}\n--- got\n{got}')
+    if len(expected) != len(actual):
+        raise ReplayMismatch(f'{transcript.name}: expected {len(expected)} '
+                             f'frames, got {len(actual)}')
+    return ReplayResult(transcript.name, len(expected) - 1,
+                        len(transcript.inputs))
+
+
+def main() -> None:
+    '''
+    Inputs: No input as parameters; reads the command line
+    Outputs
+        Replays each transcript, checking it, then replays them all
+        ... repeatedly and prints the throughput; Returns None
+    '''
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('paths', nargs='*',
+                        default=sorted(glob.glob('gameplay/*.txt')))
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    transcripts = [load_transcript(path) for path in args.paths]
+    for transcript in transcripts:
+        result = replay(transcript)
+        print(f"{result.name}: OK ({result.frames} frames, "
+              f"{result.inputs} inputs)")
+
+    start = time.perf_counter()
+    frames = inputs = 0
+    for _ in range(args.repeat):
+        for transcript in transcripts:
+            result = replay(transcript)
+            frames += result.frames
+            inputs += result.inputs
+    seconds = time.perf_counter() - start
+    print(f"\n{args.repeat} x {len(transcripts)} transcripts in "
+          f"{seconds:.2f}s: {inputs / seconds:,.0f} inputs/s, "
+          f"{frames / seconds:,.0f} frames/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+""" Headless self-play for the fancy tic-tac-toe game of CSSE1001/7030 A1. """
+import argparse
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Iterator
+
+from a1 import *
+from movegen import legal_moves
+from records import STALEMATE, GameRecord, GameRecordWriter
+
+# A policy picks a valid move for player, or returns None when it has none.
+# It is called as policy(board, player, own_pieces, other_pieces, rng)
+Policy = Callable[[Board, str, Pieces, Pieces, random.Random], Move | None]
+
+
+def valid_moves(board: Board, pieces: Pieces) -> list[Move]:
+    '''
+    Inputs
+        board: A squared board of cells which may contain pieces (type Board)
+        pieces: The available pieces of the player to move (type Pieces)
+    Outputs
+        Returns every move which passes check_move (type list[Move])
+    '''
+    return list(legal_moves(board, pieces))
+
+
+def random_policy(board: Board, player: str, own_pieces: Pieces,
+                  other_pieces: Pieces, rng: random.Random) -> Move | None:
+    '''
+    Inputs
+        board: A squared board of cells which may contain pieces (type Board)
+        player: The player to move (type str)
+        own_pieces, other_pieces: The available pieces of the player to move
+        ... and of the opponent (type Pieces)
+        rng: The random number generator of the game (type random.Random)
+    Outputs
+        Returns a uniformly random valid move, or None (type Move | None)
+    '''
+    moves = valid_moves(board, own_pieces)
+    return rng.choice(moves) if moves else None
+
+
+def greedy_policy(board: Board, player: str, own_pieces: Pieces,
+                  other_pieces: Pieces, rng: random.Random) -> Move | None:
+    '''
+    Inputs
+        board: A squared board of cells which may contain pieces (type Board)
+        player: The player to move (type str)
+        own_pieces, other_pieces: The available pieces of the player to move
+        ... and of the opponent (type Pieces)
+        rng: The random number generator of the game (type random.Random)
+    Outputs
+        Returns a move which wins on the spot if there is one, otherwise a
+        ... random valid move, or None (type Move | None)
+    '''
+    moves = valid_moves(board, own_pieces)
+    if not isinstance(board, BitBoard):
+        board = BitBoard.from_board(board)
+    for move in moves:
+        trial = board.copy()
+        trial.place(player, move)
+        if check_win(trial) == player:
+            return move
+    return rng.choice(moves) if moves else None
+
+
+POLICIES = {
+    'random': random_policy,
+    'greedy': greedy_policy,
+}
+
+
+def play_game(naught_policy: Policy, cross_policy: Policy, grid_size: int,
+              pieces_per_player: int, rng: random.Random,
+              moves: list[Move] | None = None) -> tuple[str, int]:
+    '''
+    Inputs
+        naught_policy, cross_policy: The policies playing O and X (type Policy)
+        grid_size: The number of rows (and columns) of the board (type int)
+        pieces_per_player: The number of pieces of each player (type int)
+        rng: The random number generator of the game (type random.Random)
+        moves: A list to append each move played to, if any
+        ... (type list[Move] | None)
+    Outputs
+        Returns the winner (NAUGHT or CROSS) or STALEMATE, and the number of
+        ... pieces placed (type tuple[str, int])
+    '''
+    # The bitboard is initial_state() for any grid size; check_move,
+    # ... place_piece, check_win and check_stalemate all accept it
+    board = BitBoard(grid_size)
+    naught_pieces = generate_initial_pieces(pieces_per_player)
+    cross_pieces = generate_initial_pieces(pieces_per_player)
+    players = [(NAUGHT, naught_policy, naught_pieces, cross_pieces),
+               (CROSS, cross_policy, cross_pieces, naught_pieces)]
+    i = length = 0
+
+    while True:
+        player, policy, own_pieces, other_pieces = players[i % 2]
+        i += 1
+        move = policy(board, player, own_pieces, other_pieces, rng)
+        # A player without a valid move passes; the game is not a stalemate,
+        # ... so the opponent can still move
+        if move is None:
+            continue
+        if not check_move(board, own_pieces, move):
+            raise ValueError(f'{player} policy made an invalid move: {move}')
+        place_piece(board, player, own_pieces, move)
+        length += 1
+        if moves is not None:
+            moves.append(move)
+
+        if check_stalemate(board, naught_pieces, cross_pieces):
+            return STALEMATE, length
+        winner = check_win(board)
+        if winner is not None:
+            return winner, length
+
+
+class SelfPlayStats:
+    ''' Results aggregated over any number of self-play games. '''
+    def __init__(self) -> None:
+        self.results = Counter()    # NAUGHT, CROSS or STALEMATE -> games
+        self.lengths = Counter()    # Pieces placed -> games
+        self.seconds = 0.0
+        self.records = []           # GameRecord of each game, if recorded
+
+    @property
+    def games(self) -> int:
+        return sum(self.results.values())
+
+    def add_game(self, result: str, length: int) -> None:
+        '''
+        Inputs
+            result: NAUGHT, CROSS or STALEMATE (type str)
+            length: The number of pieces placed in the game (type int)
+        '''
+        self.results[result] += 1
+        self.lengths[length] += 1
+
+    def merge(self, other: 'SelfPlayStats') -> None:
+        '''
+        Inputs
+            other: Statistics of more games to add to these (type SelfPlayStats)
+        '''
+        self.results.update(other.results)
+        self.lengths.update(other.lengths)
+
+    def rate(self, result: str) -> float:
+        '''
+        Inputs
+            result: NAUGHT, CROSS or STALEMATE (type str)
+        Outputs
+            Returns the share of games ending with result (type float)
+        '''
+        return self.results[result] / self.games if self.games else 0.0
+
+    def games_per_second(self) -> float:
+        return self.games / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        '''
+        Outputs
+            Returns a one-line summary of the results (type str)
+        '''
+        return (f"{self.games} games: O wins {self.rate(NAUGHT):.1%}, "
+                f"X wins {self.rate(CROSS):.1%}, "
+                f"stalemates {self.rate(STALEMATE):.1%}, "
+                f"{self.games_per_second():,.0f} games/s")
+
+    def histogram(self, width: int = 40) -> str:
+        '''
+        Inputs
+            width: The length of the longest bar (type int)
+        Outputs
+            Returns a text histogram of game lengths (type str)
+        '''
+        if not self.lengths:
+            return ''
+        most = max(self.lengths.values())
+        return '\n'.join(f"{length:3}|{'#' * max(1, count * width // most)} "
+                         f"{count}"
+                         for length, count in sorted(self.lengths.items()))
+
+
+def play_batch(naught_policy: Policy, cross_policy: Policy, grid_size: int,
+               pieces_per_player: int, games: int, seed: str,
+               record: bool = False) -> SelfPlayStats:
+    '''
+    Inputs
+        naught_policy, cross_policy: The policies playing O and X (type Policy)
+        grid_size: The number of rows (and columns) of the board (type int)
+        pieces_per_player: The number of pieces of each player (type int)
+        games: The number of games to play (type int)
+        seed: The seed of this batch's random number generator (type str)
+        record: Whether to keep the moves of every game (type bool)
+    Outputs
+        Returns the results of the batch, with its games in records if
+        ... recorded (type SelfPlayStats)
+    '''
+    rng = random.Random(seed)
+    stats = SelfPlayStats()
+    for _ in range(games):
+        moves = [] if record else None
+        result, length = play_game(naught_policy, cross_policy, grid_size,
+                                   pieces_per_player, rng, moves)
+        stats.add_game(result, length)
+        if record:
+            stats.records.append(GameRecord(grid_size, pieces_per_player,
+                                            moves, result))
+    return stats
+
+
+def run_selfplay(games: int, naught_policy: Policy = random_policy,
+                 cross_policy: Policy = random_policy,
+                 grid_size: int = GRID_SIZE,
+                 pieces_per_player: int = PIECES_PER_PLAYER,
+                 workers: int | None = None, batch_size: int = 1000,
+                 seed: int = 0, writer: GameRecordWriter | None = None
+                 ) -> Iterator[SelfPlayStats]:
+    '''
+    Inputs
+        games: The number of games to play (type int)
+        naught_policy, cross_policy: Module-level policies playing O and X,
+        ... so they can be sent to worker processes (type Policy)
+        grid_size: The number of rows (and columns) of the board (type int)
+        pieces_per_player: The number of pieces of each player (type int)
+        workers: The number of worker processes, all CPUs if None (type int)
+        batch_size: The number of games per task sent to a worker (type int)
+        seed: The seed from which every batch's seed is derived (type int)
+        writer: Where to record every game as its batch finishes, if
+        ... anywhere (type GameRecordWriter | None)
+    Outputs
+        Yields the running totals each time a batch finishes; the last one
+        ... covers every game (type Iterator[SelfPlayStats])
+    '''
+    total = SelfPlayStats()
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for batch, first in enumerate(range(0, games, batch_size)):
+            futures.append(executor.submit(
+                play_batch, naught_policy, cross_policy, grid_size,
+                pieces_per_player, min(batch_size, games - first),
+                f'{seed}-{batch}', writer is not None))
+        for future in as_completed(futures):
+            stats = future.result()
+            for record in stats.records:
+                writer.write_game(record)
+            total.merge(stats)
+            total.seconds = time.perf_counter() - start
+            yield total
+
+
+def main() -> None:
+    '''
+    Inputs: No input as parameters; reads the command line
+    Outputs
+        Plays the requested games, printing running totals and finally a
+        ... histogram of game lengths; Returns None
+    '''
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('games', type=int)
+    parser.add_argument('--naught', choices=POLICIES, default='random')
+    parser.add_argument('--cross', choices=POLICIES, default='random')
+    parser.add_argument('--grid-size', type=int, default=GRID_SIZE)
+    parser.add_argument('--pieces', type=int, default=PIECES_PER_PLAYER)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--record', metavar='PATH',
+                        help='write every game to a binary record file')
+    args = parser.parse_args()
+
+    writer = GameRecordWriter(open(args.record, 'wb')) if args.record else None
+    stats = SelfPlayStats()
+    try:
+        for stats in run_selfplay(args.games, POLICIES[args.naught],
+                                  POLICIES[args.cross], args.grid_size,
+                                  args.pieces, args.workers, args.batch_size,
+                                  args.seed, writer):
+            print(stats.summary(), flush=True)
+    finally:
+        if writer is not None:
+            writer.close()
+    print("\nGame lengths (pieces placed):")
+    print(stats.histogram())
+
+
+if __name__ == '__main__':
+    main()
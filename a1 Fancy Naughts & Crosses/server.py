@@ -0,0 +1,171 @@
+""" Hosts many concurrent games of the A1 tic-tac-toe over a local socket. """
+import argparse
+import asyncio
+import io
+import time
+from contextlib import redirect_stdout
+
+from a1 import *
+
+# The protocol mirrors the terminal: the server sends everything main() would
+# print followed by a prompt ("Enter your move: " or "Play again? ", without a
+# newline) and the client answers with one line. The server closes the
+# connection once the user declines to play again
+ENCODING = 'utf-8'
+# The longest answer line read; anything longer ends the session
+LINE_LIMIT = 1024
+
+
+class GameServer:
+    ''' Runs one game_session() per connection, each in its own task.
+
+        Every session advances synchronously from one answer to the next
+        prompt, so its output can be captured by redirecting sys.stdout: no
+        other session runs until the step is done.
+    '''
+    def __init__(self, config: GameConfig | None = None,
+                 show: Renderer = print_game) -> None:
+        '''
+        Inputs
+            config: The variant of the game, default_config() if None
+            ... (type GameConfig | None)
+            show: Displays the game to the client, print_game() by default
+            ... (type Renderer)
+        '''
+        self.config = config or default_config()
+        self.show = show
+        # Statistics of the sessions served
+        self.active = self.sessions = self.answers = 0
+
+    def _step(self, session: Prompts[None], answer: str | None
+              ) -> tuple[str, str | None]:
+        '''
+        Inputs
+            session: The conversation with a client (type Prompts)
+            answer: The client's answer to the last prompt, None to start
+            ... (type str | None)
+        Outputs
+            Advances the session to its next prompt. Returns what it printed
+            ... and the prompt, None once the session is over
+            ... (type tuple[str, str | None])
+        '''
+        output = io.StringIO()
+        with redirect_stdout(output):
+            try:
+                prompt = next(session) if answer is None else \
+                    session.send(answer)
+            except StopIteration:
+                prompt = None
+        return output.getvalue(), prompt
+
+    async def handle(self, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter) -> None:
+        '''
+        Inputs
+            reader, writer: The connection to a client
+            ... (type asyncio.StreamReader, asyncio.StreamWriter)
+        Outputs
+            Plays games with the client until it declines to play again or
+            ... disconnects; Returns None
+        '''
+        self.active += 1
+        self.sessions += 1
+        session = game_session(self.show, config=self.config)
+        try:
+            output, prompt = self._step(session, None)
+            while prompt is not None:
+                writer.write((output + prompt).encode(ENCODING))
+                await writer.drain()
+                line = await reader.readline()
+                # As for input(), the end of the stream ends the session
+                if not line:
+                    return None
+                self.answers += 1
+                answer = line.decode(ENCODING, 'replace').rstrip('\r\n')
+                output, prompt = self._step(session, answer)
+            writer.write(output.encode(ENCODING))
+            await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            self.active -= 1
+            session.close()
+            writer.close()
+        return None
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 0,
+                    path: str | None = None) -> asyncio.Server:
+        '''
+        Inputs
+            host, port: The TCP address to listen on, any free port if 0
+            ... (type str, int)
+            path: A Unix socket to listen on instead, if given
+            ... (type str | None)
+        Outputs
+            Returns the listening server (type asyncio.Server)
+        '''
+        if path is not None:
+            return await asyncio.start_unix_server(self.handle, path,
+                                                   limit=LINE_LIMIT)
+        return await asyncio.start_server(self.handle, host, port,
+                                          limit=LINE_LIMIT, backlog=4096)
+
+
+async def _report(server: GameServer, every: float) -> None:
+    '''
+    Inputs
+        server: The server to report on (type GameServer)
+        every: Seconds between reports (type float)
+    Outputs
+        Prints the active sessions and answers per second forever
+    '''
+    answers, start = server.answers, time.perf_counter()
+    while True:
+        await asyncio.sleep(every)
+        now = time.perf_counter()
+        print(f"{server.active} active of {server.sessions} sessions, "
+              f"{(server.answers - answers) / (now - start):,.0f} answers/s",
+              flush=True)
+        answers, start = server.answers, now
+
+
+async def _main(args: argparse.Namespace) -> None:
+    config = game_config(args.grid_size, args.pieces, args.win_length)
+    server = GameServer(config)
+    listener = await server.serve(args.host, args.port, args.unix)
+    for sock in listener.sockets:
+        print(f"Serving {config} on {sock.getsockname()}", flush=True)
+    async with listener:
+        if args.report:
+            asyncio.get_running_loop().create_task(
+                _report(server, args.report))
+        await listener.serve_forever()
+
+
+def main() -> None:
+    '''
+    Inputs: No input as parameters; reads the command line
+    Outputs
+        Serves games until interrupted; Returns None
+    '''
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7030)
+    parser.add_argument('--unix', metavar='PATH', default=None,
+                        help='listen on a Unix socket instead of TCP')
+    parser.add_argument('--grid-size', type=int, default=GRID_SIZE)
+    parser.add_argument('--pieces', type=int, default=PIECES_PER_PLAYER)
+    parser.add_argument('--win-length', type=int, default=None,
+                        help='cells in a row which win (default: a whole '
+                             'line)')
+    parser.add_argument('--report', type=float, default=0.0,
+                        metavar='SECONDS',
+                        help='print session statistics this often')
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
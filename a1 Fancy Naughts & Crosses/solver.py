@@ -0,0 +1,753 @@
+""" An alpha-beta solver for the fancy tic-tac-toe game of CSSE1001/7030 A1. """
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import NamedTuple
+
+from a1 import *
+from bitboard import FIELD_BITS, LINE_MASKS, SIZE_MASK
+from symmetry import (IDENTITY, canonical_bitboard_key, from_canonical_move,
+                      to_canonical_move)
+
+WIN, DRAW, LOSS = 1, 0, -1
+
+# Transposition table entry flags: the stored value is exact, or only a
+# lower/upper bound because the search of that position was cut off
+EXACT, LOWER, UPPER = 0, 1, 2
+DEFAULT_TT_SIZE = 1 << 20
+
+# Symmetric keys cost more than they save deep in the tree, where positions
+# are cheap to search, so only the first few plies from the root use them
+SYMMETRY_PLIES = 4
+
+# Parallel workers look for a cancelled task once per this many nodes
+CANCEL_CHECK_NODES = 1024
+
+
+class SolveResult(NamedTuple):
+    ''' The outcome of solve() together with its search statistics. '''
+    value: int          # WIN, DRAW or LOSS for the player to move
+    move: Move | None   # A best move, or None if the game is already over
+    nodes: int          # Positions searched
+    seconds: float      # Wall-clock time of the search
+    tt_probes: int      # Transposition table lookups
+    tt_hits: int        # Lookups which found the position
+    # Positions searched by each worker process, by process id, when solved
+    # with solve_parallel()
+    worker_nodes: dict[int, int] | None = None
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+    @property
+    def tt_hit_rate(self) -> float:
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+
+class TranspositionTable:
+    ''' A bounded, always-replace transposition table.
+
+        Each position hashes to one of a fixed number of slots, so memory stays
+        constant however large the search grows.
+    '''
+    def __init__(self, size: int = DEFAULT_TT_SIZE) -> None:
+        '''
+        Inputs
+            size: The number of slots, rounded up to a power of two (type int)
+        '''
+        self._mask = (1 << max(size - 1, 1).bit_length()) - 1
+        self._slots = [None] * (self._mask + 1)
+        self.probes, self.hits = 0, 0
+
+    def get(self, key: tuple) -> tuple | None:
+        '''
+        Inputs
+            key: A position key (type tuple)
+        Outputs
+            Returns the stored (flag, value, move) of the position, or None
+            ... (type tuple | None)
+        '''
+        self.probes += 1
+        entry = self._slots[hash(key) & self._mask]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1:]
+        return None
+
+    def put(self, key: tuple, flag: int, value: int, move: Move | None
+            ) -> None:
+        '''
+        Inputs
+            key: A position key (type tuple)
+            flag: EXACT, LOWER or UPPER (type int)
+            value: The value found for the position (type int)
+            move: The best move found for the position (type Move | None)
+        '''
+        self._slots[hash(key) & self._mask] = (key, flag, value, move)
+
+
+class _Search:
+    ''' Negamax search state shared by every node of one solve() call. '''
+    def __init__(self, grid_size: int, table: TranspositionTable,
+                 symmetric_pieces: int) -> None:
+        self.grid_size = grid_size
+        # Positions with at least this many pieces left use symmetric keys
+        self.symmetric_pieces = symmetric_pieces
+        self.lines = LINE_MASKS[grid_size]
+        self.table = table
+        self.nodes = 0
+        # Moves which caused cut-offs anywhere in the tree are tried earlier
+        self.history = {}
+
+    def moves(self, board: BitBoard, mover_mask: int, other_mask: int
+              ) -> list[Move]:
+        '''
+        Inputs
+            board: The current board (type BitBoard)
+            mover_mask, other_mask: Available pieces of the player to move and
+            ... of the opponent (type int)
+        Outputs
+            Returns every valid move, biggest pieces first, without those
+            ... which movegen.legal_moves prunes as equivalent (type
+            ... list[Move])
+        '''
+        n = self.grid_size
+        sizes = board.sizes
+        covered = [(sizes >> (FIELD_BITS * i)) & SIZE_MASK
+                   for i in range(n * n)]
+        # Sizes above the opponent's biggest piece can never be covered by
+        # it, so only the smallest of them is tried on each cell
+        safe = max(other_mask.bit_length() - 1, 0)
+        lowest = []
+        for cell_size in covered:
+            floor = max(cell_size, safe) + 1
+            usable = mover_mask >> floor
+            lowest.append(floor + (usable & -usable).bit_length() - 1
+                          if usable else 0)
+        moves = []
+        for size in range(mover_mask.bit_length() - 1, 0, -1):
+            if mover_mask >> size & 1:
+                for i, cell_size in enumerate(covered):
+                    if size > cell_size and (size <= safe or
+                                             size == lowest[i]):
+                        moves.append((i // n, i % n, size))
+        return moves
+
+    def winning_move(self, board: BitBoard, player: str, mover_mask: int,
+                     other_mask: int) -> Move | None:
+        '''
+        Inputs
+            board: The current board (type BitBoard)
+            player: The player to move (type str)
+            mover_mask, other_mask: Available pieces of the player to move and
+            ... of the opponent (type int)
+        Outputs
+            Returns a move which wins on the spot, or None (type Move | None)
+        '''
+        owned = board.naughts if player == NAUGHT else board.crosses
+        n = self.grid_size
+        for line in self.lines:
+            # Only lines missing exactly one cell can be completed in one move
+            missing = line & ~owned
+            if not missing or missing & (missing - 1):
+                continue
+            index = missing.bit_length() - 1
+            covered = (board.sizes >> (FIELD_BITS * index)) & SIZE_MASK
+            # Use the smallest piece that still covers the missing cell
+            usable = mover_mask >> (covered + 1)
+            if not usable:
+                continue
+            size = covered + 1 + ((usable & -usable).bit_length() - 1)
+            move = (index // n, index % n, size)
+            saved = board.naughts, board.crosses, board.sizes
+            board.place(player, move)
+            drawn = board.is_stalemate(mover_mask & ~(1 << size), other_mask)
+            board.naughts, board.crosses, board.sizes = saved
+            if not drawn:
+                return move
+        return None
+
+    def negamax(self, board: BitBoard, player: str, mover_mask: int,
+                other_mask: int, alpha: int, beta: int
+                ) -> tuple[int, Move | None]:
+        '''
+        Inputs
+            board: A board on which the game is not over yet (type BitBoard)
+            player: The player to move (type str)
+            mover_mask, other_mask: Available pieces of the player to move and
+            ... of the opponent (type int)
+            alpha, beta: The search window (type int)
+        Outputs
+            Returns the value of the position for player and a best move
+            ... (type tuple[int, Move | None])
+        '''
+        self.nodes += 1
+        n = self.grid_size
+        pieces_left = mover_mask.bit_count() + other_mask.bit_count()
+        if pieces_left >= self.symmetric_pieces:
+            # Equivalent positions under rotation, reflection and swapping
+            # colours share one entry, with moves stored on the canonical board
+            if player == NAUGHT:
+                key, transform = canonical_bitboard_key(
+                    board, mover_mask, other_mask, player)
+            else:
+                key, transform = canonical_bitboard_key(
+                    board, other_mask, mover_mask, player)
+        else:
+            key = (board.naughts, board.crosses, board.sizes, player,
+                   mover_mask, other_mask)
+            transform = IDENTITY
+        entry = self.table.get(key)
+        tt_move = None
+        if entry is not None:
+            flag, value, tt_move = entry
+            if tt_move is not None:
+                tt_move = from_canonical_move(tt_move, transform, n)
+            if flag == EXACT or (flag == LOWER and value >= beta) or \
+                    (flag == UPPER and value <= alpha):
+                return value, tt_move
+
+        # A move which completes a line ends the search straight away
+        move = self.winning_move(board, player, mover_mask, other_mask)
+        if move is not None:
+            self.table.put(key, EXACT, WIN,
+                           to_canonical_move(move, transform, n))
+            return WIN, move
+
+        opponent = CROSS if player == NAUGHT else NAUGHT
+        moves = self.moves(board, mover_mask, other_mask)
+
+        # A player who cannot move passes; the opponent must then have a move
+        # since the position is not a stalemate
+        if not moves:
+            value, _ = self.negamax(board, opponent, other_mask, mover_mask,
+                                    -beta, -alpha)
+            return -value, None
+
+        # Moves are tried by cut-off history, ties keeping the biggest pieces
+        # first, after the best move remembered for this position
+        history = self.history
+        moves.sort(key=lambda move: history.get(move, 0), reverse=True)
+        if tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+
+        original_alpha = alpha
+        best_value, best_move = LOSS - 1, None
+        saved = board.naughts, board.crosses, board.sizes
+        for move in moves:
+            board.place(player, move)
+            remaining = mover_mask & ~(1 << move[2])
+            # Stalemate is checked before a win, as in the game loop of main().
+            # No move here can win without a stalemate, otherwise winning_move
+            # would have found one, so check_win is not needed
+            if board.is_stalemate(remaining, other_mask):
+                value = DRAW
+            else:
+                value = -self.negamax(board, opponent, other_mask, remaining,
+                                      -beta, -alpha)[0]
+            board.naughts, board.crosses, board.sizes = saved
+
+            if value > best_value:
+                best_value, best_move = value, move
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                # Cut-offs closer to the root, with more pieces left to play,
+                # are worth more
+                history[move] = history.get(move, 0) + pieces_left ** 2
+                break
+
+        if best_value <= original_alpha:
+            flag = UPPER
+        elif best_value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table.put(key, flag, best_value,
+                       to_canonical_move(best_move, transform, n))
+        return best_value, best_move
+
+
+def solve(board: Board, naught_pieces: Pieces, cross_pieces: Pieces,
+          to_move: str, table: TranspositionTable | None = None,
+          symmetry: bool = True) -> SolveResult:
+    '''
+    Inputs
+        board: A squared board of cells which may contain pieces
+        ... (type Board | BitBoard)
+        naught_pieces: The available pieces of player NAUGHT (type Pieces)
+        cross_pieces: The available pieces of player CROSS (type Pieces)
+        to_move: The player to move, NAUGHT or CROSS (type str)
+        table: A transposition table to reuse between calls (type
+        ... TranspositionTable | None)
+        symmetry: Whether equivalent positions share table entries (type bool)
+    Outputs
+        Returns the game-theoretic value for to_move under perfect play, a
+        ... best move and the search statistics (type SolveResult)
+    '''
+    if isinstance(board, BitBoard):
+        bitboard = board.copy()
+    else:
+        bitboard = BitBoard.from_board(board)
+    if table is None:
+        table = TranspositionTable()
+    probes, hits = table.probes, table.hits
+
+    start = time.perf_counter()
+    naught_mask, cross_mask = pieces_mask(naught_pieces), \
+        pieces_mask(cross_pieces)
+    # Without symmetry the threshold is above the pieces left at the root
+    root_pieces = len(naught_pieces) + len(cross_pieces)
+    if symmetry:
+        symmetric_pieces = root_pieces - SYMMETRY_PLIES
+    else:
+        symmetric_pieces = root_pieces + 1
+    search = _Search(bitboard.grid_size, table, symmetric_pieces)
+    winner = check_win(bitboard)
+    if check_stalemate(bitboard, naught_pieces, cross_pieces):
+        value, move = DRAW, None
+    elif winner is not None:
+        value, move = (WIN if winner == to_move else LOSS), None
+    elif to_move == NAUGHT:
+        value, move = search.negamax(bitboard, NAUGHT, naught_mask,
+                                     cross_mask, LOSS, WIN)
+    else:
+        value, move = search.negamax(bitboard, CROSS, cross_mask,
+                                     naught_mask, LOSS, WIN)
+    seconds = time.perf_counter() - start
+
+    return SolveResult(value, move, search.nodes, seconds,
+                       table.probes - probes, table.hits - hits)
+
+
+class SearchCancelled(Exception):
+    ''' Raised inside a worker when its task is no longer needed. '''
+
+
+class _ParallelSearch(_Search):
+    ''' A search which gives up once the master cancels its task. '''
+    def __init__(self, grid_size: int, table: TranspositionTable,
+                 symmetric_pieces: int, task: int) -> None:
+        super().__init__(grid_size, table, symmetric_pieces)
+        self.task = task
+
+    def negamax(self, board: BitBoard, player: str, mover_mask: int,
+                other_mask: int, alpha: int, beta: int
+                ) -> tuple[int, Move | None]:
+        if not self.nodes % CANCEL_CHECK_NODES and _cancelled[self.task]:
+            raise SearchCancelled
+        return super().negamax(board, player, mover_mask, other_mask, alpha,
+                               beta)
+
+    def search_task(self, board: BitBoard, player: str, mover_mask: int,
+                    other_mask: int, root_player: str
+                    ) -> tuple[int, tuple[int, int]] | None:
+        '''
+        Inputs
+            board: A board on which the game is not over yet and no move
+            ... wins on the spot (type BitBoard)
+            player: The player to move (type str)
+            mover_mask, other_mask: Available pieces of the player to move
+            ... and of the opponent (type int)
+            root_player: The player to move at the root of the split
+            ... (type str)
+        Outputs
+            Returns the value for player and the last window it was searched
+            ... with, or None if the window closed before any move was
+            ... searched. The shared root bound is read again before every
+            ... move, so a bound proven by another worker narrows the rest
+            ... of this search (type tuple[int, tuple[int, int]] | None)
+        '''
+        self.nodes += 1
+        opponent = CROSS if player == NAUGHT else NAUGHT
+        window = _task_window(player, root_player)
+        moves = self.moves(board, mover_mask, other_mask)
+        if not moves:
+            if window[0] >= window[1]:
+                return None
+            value = -self.negamax(board, opponent, other_mask, mover_mask,
+                                  -window[1], -window[0])[0]
+            return value, window
+
+        # The windows only ever narrow, so a best value inside the last one
+        # ... is exact and any other is a bound, as for a single window
+        best_value = LOSS - 1
+        saved = board.naughts, board.crosses, board.sizes
+        for move in moves:
+            window = _task_window(player, root_player)
+            alpha, beta = max(window[0], best_value), window[1]
+            if alpha >= beta:
+                break
+            board.place(player, move)
+            remaining = mover_mask & ~(1 << move[2])
+            if board.is_stalemate(remaining, other_mask):
+                value = DRAW
+            else:
+                value = -self.negamax(board, opponent, other_mask, remaining,
+                                      -beta, -alpha)[0]
+            board.naughts, board.crosses, board.sizes = saved
+            best_value = max(best_value, value)
+        if best_value < LOSS:
+            return None
+        return best_value, window
+
+
+# State of a worker process, set by _start_worker
+_cancelled = None       # One flag per task, set by the master to cancel it
+_root_alpha = None      # The best value proven so far for the root player
+_worker_table = None
+_symmetric_pieces = 0
+
+
+def _start_worker(cancelled, root_alpha, table_size: int,
+                  symmetric_pieces: int) -> None:
+    '''
+    Inputs
+        cancelled: Shared flags, one per task (type multiprocessing.RawArray)
+        root_alpha: The shared root bound (type multiprocessing.RawValue)
+        table_size: The number of transposition table slots (type int)
+        symmetric_pieces: Positions with at least this many pieces left use
+        ... symmetric keys (type int)
+    Outputs
+        Sets up the worker process; its transposition table is kept for
+        ... every task it runs. Returns None
+    '''
+    global _cancelled, _root_alpha, _worker_table, _symmetric_pieces
+    _cancelled, _root_alpha = cancelled, root_alpha
+    _worker_table = TranspositionTable(table_size)
+    _symmetric_pieces = symmetric_pieces
+
+
+def _task_window(player: str, root_player: str) -> tuple[int, int]:
+    '''
+    Inputs
+        player: The player to move in a task's position (type str)
+        root_player: The player to move at the root of the split (type str)
+    Outputs
+        Returns the window for player's value: the root's bound holds for
+        ... every position below it, so only values which would beat the
+        ... best root move found so far need to be exact (type tuple[int, int])
+    '''
+    alpha = _root_alpha.value
+    if player == root_player:
+        return max(alpha, LOSS), WIN
+    return LOSS, min(-alpha, WIN)
+
+
+def _search_task(task: int, board: BitBoard, player: str, mover_mask: int,
+                 other_mask: int, root_player: str
+                 ) -> tuple[int, int | None, bool, int, int, int, int]:
+    '''
+    Inputs
+        task: The index of the task (type int)
+        board: A board on which the game is not over yet (type BitBoard)
+        player: The player to move (type str)
+        mover_mask, other_mask: Available pieces of the player to move and
+        ... of the opponent (type int)
+        root_player: The player to move at the root of the split (type str)
+    Outputs
+        Returns the task index, the value for player (None if cancelled)
+        ... and whether it is exact rather than a bound, then the nodes
+        ... searched, the table probes and hits, and the worker's process id
+        ... (type tuple)
+    '''
+    search = _ParallelSearch(board.grid_size, _worker_table,
+                             _symmetric_pieces, task)
+    probes, hits = _worker_table.probes, _worker_table.hits
+    value = window = None
+    if not _cancelled[task]:
+        try:
+            found = search.search_task(board, player, mover_mask, other_mask,
+                                       root_player)
+        except SearchCancelled:
+            found = None
+        if found is not None:
+            value, window = found
+    # Outside the window the value is only a bound, except at the extremes
+    exact = value is not None and (value > window[0] or value == LOSS) and \
+        (value < window[1] or value == WIN)
+    return (task, value, exact, search.nodes, _worker_table.probes - probes,
+            _worker_table.hits - hits, os.getpid())
+
+
+class _SplitNode:
+    ''' A position in the first plies of a parallel search.
+
+        Tasks searched with the shared root bound may only return a bound:
+        an upper bound on the value for the root player, which is all the
+        root needs to rule a move out. Each value therefore records whether
+        it is exact.
+    '''
+    def __init__(self, player: str, parent: '_SplitNode | None',
+                 move: Move | None, root_player: str) -> None:
+        self.player = player
+        self.parent = parent
+        self.move = move            # The move from the parent to here
+        self.root_player = root_player
+        self.children = []
+        self.values = []            # Each child's value for this player
+        self.exact = []             # Whether each child's value is exact
+        self.value = None
+        self.is_exact = False
+        self.best_move = None
+        self.tasks = []             # Indices of the tasks below this node
+        self.expanded = False       # Whether every child has been added
+
+    def add_child(self, child: '_SplitNode', value: int | None = None
+                  ) -> None:
+        '''
+        Inputs
+            child: The node after one of the moves from here (type _SplitNode)
+            value: Its exact value for this player, if already known
+            ... (type int | None)
+        '''
+        self.children.append(child)
+        self.values.append(value)
+        self.exact.append(value is not None)
+
+    def set_value(self, value: int, exact: bool) -> None:
+        '''
+        Inputs
+            value: The value of this node for its player (type int)
+            exact: Whether value is exact rather than a bound (type bool)
+        Outputs
+            Records the value and works out the parents' values as far as
+            ... the known values allow. Returns None
+        '''
+        self.value, self.is_exact = value, exact
+        parent = self.parent
+        if parent is None:
+            return
+        i = parent.children.index(self)
+        parent.values[i] = value if parent.player == self.player else -value
+        parent.exact[i] = exact
+        parent.resolve()
+
+    def resolve(self) -> None:
+        ''' Sets the value of this node once a child wins or every child
+            is known.
+        '''
+        if self.value is not None or not self.expanded:
+            return
+        known = [(value, exact) for value, exact in zip(self.values,
+                                                        self.exact)
+                 if value is not None]
+        if (WIN, True) not in known and len(known) < len(self.values):
+            return
+        # An exact best value is preferred to a bound equal to it
+        value, exact = max(known)
+        self.best_move = self.children[
+            list(zip(self.values, self.exact)).index((value, exact))].move
+        if self.player != self.root_player and value != WIN:
+            # Bounds below this node are lower bounds for its player, so its
+            # value is only exact if every child's is
+            exact = all(exact for _, exact in known)
+        self.set_value(value, exact)
+
+
+def _split(search: _Search, node: _SplitNode, board: BitBoard,
+           mover_mask: int, other_mask: int, plies: int, tasks: list
+           ) -> None:
+    '''
+    Inputs
+        search: Supplies move generation (type _Search)
+        node: The node of the position (type _SplitNode)
+        board: A board on which the game is not over yet (type BitBoard)
+        mover_mask, other_mask: Available pieces of the player to move and
+        ... of the opponent (type int)
+        plies: How many more plies to split (type int)
+        tasks: The tasks found so far, to which the leaves below node are
+        ... appended as (node, board, player, mover_mask, other_mask)
+        ... (type list)
+    Outputs
+        Expands node by one ply, or makes it a task when no plies are left.
+        ... Returns None
+    '''
+    player = node.player
+    opponent = CROSS if player == NAUGHT else NAUGHT
+    move = search.winning_move(board, player, mover_mask, other_mask)
+    if plies == 0 or move is not None:
+        if move is not None:
+            node.best_move = move
+            node.set_value(WIN, True)
+        else:
+            tasks.append((node, board, player, mover_mask, other_mask))
+        return
+
+    moves = search.moves(board, mover_mask, other_mask)
+    if not moves:
+        # A player who cannot move passes
+        child = _SplitNode(opponent, node, None, node.root_player)
+        node.add_child(child)
+        _split(search, child, board, other_mask, mover_mask, plies - 1,
+               tasks)
+        node.expanded = True
+        node.resolve()
+        return
+
+    seen = set()
+    for move in moves:
+        child_board = board.copy()
+        child_board.place(player, move)
+        remaining = mover_mask & ~(1 << move[2])
+        # Moves leading to equivalent positions need only be searched once
+        if player == NAUGHT:
+            key = canonical_bitboard_key(child_board, remaining, other_mask,
+                                         opponent)[0]
+        else:
+            key = canonical_bitboard_key(child_board, other_mask, remaining,
+                                         opponent)[0]
+        if key in seen:
+            continue
+        seen.add(key)
+
+        child = _SplitNode(opponent, node, move, node.root_player)
+        if child_board.is_stalemate(remaining, other_mask):
+            node.add_child(child, DRAW)
+        else:
+            node.add_child(child)
+            _split(search, child, child_board, other_mask, remaining,
+                   plies - 1, tasks)
+    node.expanded = True
+    node.resolve()
+
+
+def solve_parallel(board: Board, naught_pieces: Pieces, cross_pieces: Pieces,
+                   to_move: str, workers: int | None = None,
+                   split_plies: int = 1,
+                   table_size: int = DEFAULT_TT_SIZE) -> SolveResult:
+    '''
+    Inputs
+        board: A squared board of cells which may contain pieces
+        ... (type Board | BitBoard)
+        naught_pieces: The available pieces of player NAUGHT (type Pieces)
+        cross_pieces: The available pieces of player CROSS (type Pieces)
+        to_move: The player to move, NAUGHT or CROSS (type str)
+        workers: The number of worker processes, all CPUs if None (type int)
+        split_plies: How many plies from the root are split into separate
+        ... tasks (type int)
+        table_size: The transposition table slots of each worker (type int)
+    Outputs
+        Returns the same value as solve(), searching the positions
+        ... split_plies moves from the root in parallel. Workers share the
+        ... best root value found so far and give up on tasks which can no
+        ... longer matter (type SolveResult)
+    '''
+    if isinstance(board, BitBoard):
+        bitboard = board.copy()
+    else:
+        bitboard = BitBoard.from_board(board)
+    start = time.perf_counter()
+    winner = check_win(bitboard)
+    if check_stalemate(bitboard, naught_pieces, cross_pieces):
+        return SolveResult(DRAW, None, 0, time.perf_counter() - start, 0, 0,
+                           {})
+    if winner is not None:
+        return SolveResult(WIN if winner == to_move else LOSS, None, 0,
+                           time.perf_counter() - start, 0, 0, {})
+
+    naught_mask, cross_mask = pieces_mask(naught_pieces), \
+        pieces_mask(cross_pieces)
+    if to_move == NAUGHT:
+        mover_mask, other_mask = naught_mask, cross_mask
+    else:
+        mover_mask, other_mask = cross_mask, naught_mask
+    root = _SplitNode(to_move, None, None, to_move)
+    tasks = []
+    _split(_Search(bitboard.grid_size, TranspositionTable(1), 0), root,
+           bitboard, mover_mask, other_mask, max(split_plies, 1), tasks)
+    needed = []
+    for i, (node, *_) in enumerate(tasks):
+        parent, known = node, False
+        while parent is not None:
+            parent.tasks.append(i)
+            known = known or parent.value is not None
+            parent = parent.parent
+        if not known:
+            needed.append(i)
+
+    root_pieces = len(naught_pieces) + len(cross_pieces)
+    cancelled = multiprocessing.RawArray('b', len(tasks))
+    root_alpha = multiprocessing.RawValue('b', LOSS)
+    worker_nodes = {}
+    probes = hits = 0
+    with ProcessPoolExecutor(
+            max_workers=workers, initializer=_start_worker,
+            initargs=(cancelled, root_alpha, table_size,
+                      root_pieces - SYMMETRY_PLIES)) as executor:
+        futures = {i: executor.submit(_search_task, i, *tasks[i][1:],
+                                      to_move) for i in needed}
+        for future in as_completed(futures.values()):
+            if future.cancelled():
+                continue
+            task, value, exact, nodes, task_probes, task_hits, pid = \
+                future.result()
+            worker_nodes[pid] = worker_nodes.get(pid, 0) + nodes
+            probes, hits = probes + task_probes, hits + task_hits
+            node = tasks[task][0]
+            if value is None or node.value is not None:
+                continue
+            node.set_value(value, exact)
+
+            # Every node now known no longer needs the tasks below it
+            parent = node.parent
+            while parent is not None and parent.value is not None:
+                for i in parent.tasks:
+                    cancelled[i] = 1
+                    if i in futures:
+                        futures[i].cancel()
+                parent = parent.parent
+            known = [value for value, exact in zip(root.values, root.exact)
+                     if value is not None and exact]
+            if known and max(known) > root_alpha.value:
+                root_alpha.value = max(known)
+            if root.value is not None:
+                break
+    seconds = time.perf_counter() - start
+
+    return SolveResult(root.value, root.best_move,
+                       sum(worker_nodes.values()), seconds, probes, hits,
+                       worker_nodes)
+
+
+def main() -> None:
+    '''
+    Inputs: No input as parameters; reads the command line
+    Outputs
+        Solves the opening position and prints the value, the best move and
+        ... the search statistics; Returns None
+    '''
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--grid-size', type=int, default=GRID_SIZE)
+    parser.add_argument('--pieces', type=int, default=PIECES_PER_PLAYER)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='worker processes; 0 for all CPUs')
+    parser.add_argument('--split-plies', type=int, default=1)
+    args = parser.parse_args()
+
+    board = BitBoard(args.grid_size)
+    pieces = generate_initial_pieces(args.pieces)
+    if args.workers == 1:
+        result = solve(board, pieces, pieces, NAUGHT)
+    else:
+        result = solve_parallel(board, pieces, pieces, NAUGHT,
+                                args.workers or None, args.split_plies)
+    outcome = {WIN: 'O wins', DRAW: 'Stalemate', LOSS: 'X wins'}[result.value]
+    print(f"{args.grid_size}x{args.grid_size} with {args.pieces} pieces: "
+          f"{outcome} with perfect play")
+    if result.move is not None:
+        row, col, size = result.move
+        print(f"Best first move: {row + 1} {col + 1} {size}")
+    print(f"{result.nodes} nodes in {result.seconds:.2f}s "
+          f"({result.nodes_per_second:,.0f} nodes/s), "
+          f"TT hit rate {result.tt_hit_rate:.1%}")
+    if result.worker_nodes:
+        for pid, nodes in sorted(result.worker_nodes.items()):
+            print(f"  worker {pid}: {nodes} nodes")
+
+
+if __name__ == '__main__':
+    main()
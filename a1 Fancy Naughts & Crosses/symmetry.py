@@ -0,0 +1,226 @@
+""" Symmetry-canonical position keys for the fancy tic-tac-toe game of A1. """
+from constants import *
+from bitboard import (BitBoard, FIELD_BITS, MAX_GRID_SIZE, MIN_GRID_SIZE,
+                      SIZE_MASK, pieces_mask)
+
+# A transform is (symmetry, swapped): one of the 8 symmetries of the square,
+# as an index into SYMMETRIES, and whether NAUGHT and CROSS swap colours
+Transform = tuple[int, bool]
+IDENTITY = (0, False)
+
+# Each symmetry maps (row, col) on a board of size n to its new position
+SYMMETRIES = (
+    lambda row, col, n: (row, col),                  # identity
+    lambda row, col, n: (col, n - 1 - row),          # rotate 90 clockwise
+    lambda row, col, n: (n - 1 - row, n - 1 - col),  # rotate 180
+    lambda row, col, n: (n - 1 - col, row),          # rotate 270 clockwise
+    lambda row, col, n: (row, n - 1 - col),          # mirror left-right
+    lambda row, col, n: (n - 1 - row, col),          # mirror top-bottom
+    lambda row, col, n: (col, row),                  # main diagonal
+    lambda row, col, n: (n - 1 - col, n - 1 - row),  # anti-diagonal
+)
+# The symmetry which undoes each symmetry above
+INVERSES = (0, 3, 2, 1, 4, 5, 6, 7)
+
+# Cells are permuted two at a time through lookup tables, so one table entry
+# covers two 5-bit fields
+CHUNK_CELLS = 2
+CHUNK_BITS = CHUNK_CELLS * FIELD_BITS
+OWNER_BIT = SIZE_MASK + 1
+
+
+def _spread_table() -> list[int]:
+    '''
+    Outputs
+        Returns, for every byte of a cell bitmask, the same cells as set owner
+        ... bits of their 5-bit fields (type list[int])
+    '''
+    return [sum(OWNER_BIT << (FIELD_BITS * bit) for bit in range(8)
+                if byte >> bit & 1) for byte in range(256)]
+
+
+def _chunk_tables(grid_size: int) -> list[list[list[int]]]:
+    '''
+    Inputs
+        grid_size: The number of rows (and columns) of the board (type int)
+    Outputs
+        Returns tables[symmetry][chunk][value]: the fields of one chunk of
+        ... cells moved to where the symmetry sends them (type list)
+    '''
+    n = grid_size
+    destinations = [[FIELD_BITS * (r * n + c)
+                     for r, c in (SYMMETRIES[s](i // n, i % n, n)
+                                  for i in range(n * n))]
+                    for s in range(len(SYMMETRIES))]
+    chunks = -(-n * n // CHUNK_CELLS)
+    tables = []
+    for shifts in destinations:
+        symmetry_tables = []
+        for chunk in range(chunks):
+            cells = range(chunk * CHUNK_CELLS,
+                          min((chunk + 1) * CHUNK_CELLS, n * n))
+            table = []
+            for value in range(1 << CHUNK_BITS):
+                moved = 0
+                for k, cell in enumerate(cells):
+                    field = (value >> (FIELD_BITS * k)) & (2 * SIZE_MASK + 1)
+                    moved |= field << shifts[cell]
+                table.append(moved)
+            symmetry_tables.append(table)
+        tables.append(symmetry_tables)
+    return tables
+
+
+SPREAD = _spread_table()
+_TABLES = {}
+
+
+def _tables(grid_size: int) -> list[list[list[int]]]:
+    '''
+    Inputs
+        grid_size: The number of rows (and columns) of the board (type int)
+    Outputs
+        Returns the chunk tables of that grid size, built on first use
+        ... (type list[list[list[int]]])
+    '''
+    if grid_size not in _TABLES:
+        if not MIN_GRID_SIZE <= grid_size <= MAX_GRID_SIZE:
+            raise ValueError(f'Unsupported grid size: {grid_size}')
+        _TABLES[grid_size] = _chunk_tables(grid_size)
+    return _TABLES[grid_size]
+
+
+def _owner_fields(mask: int) -> int:
+    '''
+    Inputs
+        mask: A bitmask of cells (type int)
+    Outputs
+        Returns the owner bit of every 5-bit field whose cell is in mask
+        ... (type int)
+    '''
+    fields, shift = 0, 0
+    while mask:
+        fields |= SPREAD[mask & 0xFF] << shift
+        mask >>= 8
+        shift += 8 * FIELD_BITS
+    return fields
+
+
+def _permute(code: int, symmetry_tables: list[list[int]]) -> int:
+    '''
+    Inputs
+        code: Packed 5-bit fields of a board (type int)
+        symmetry_tables: The chunk tables of one symmetry (type list)
+    Outputs
+        Returns the packed fields moved by that symmetry (type int)
+    '''
+    chunk_mask = (1 << CHUNK_BITS) - 1
+    moved = 0
+    for table in symmetry_tables:
+        moved |= table[code & chunk_mask]
+        code >>= CHUNK_BITS
+    return moved
+
+
+def canonical_bitboard_key(bitboard: BitBoard, naught_mask: int,
+                           cross_mask: int, to_move: str | None = None
+                           ) -> tuple[tuple, Transform]:
+    '''
+    Inputs
+        bitboard: A board (type BitBoard)
+        naught_mask, cross_mask: Bitmasks of both players' available pieces,
+        ... as built by pieces_mask (type int)
+        to_move: The player to move, if it is part of the position (type str)
+    Outputs
+        Returns the smallest key among all 16 equivalent positions and the
+        ... transform which maps this position onto it
+        ... (type tuple[tuple, Transform])
+    '''
+    # Each cell becomes a 5-bit code: its size, plus the owner bit for CROSS
+    sizes = bitboard.sizes
+    codes = (sizes | _owner_fields(bitboard.crosses),
+             sizes | _owner_fields(bitboard.naughts))
+    masks = ((naught_mask, cross_mask), (cross_mask, naught_mask))
+    movers = (to_move, {NAUGHT: CROSS, CROSS: NAUGHT}.get(to_move))
+
+    best_key, best_transform = None, IDENTITY
+    for symmetry, symmetry_tables in enumerate(_tables(bitboard.grid_size)):
+        for swapped in (False, True):
+            key = (_permute(codes[swapped], symmetry_tables),
+                   *masks[swapped], movers[swapped])
+            if best_key is None or key < best_key:
+                best_key, best_transform = key, (symmetry, swapped)
+    return best_key, best_transform
+
+
+def canonical_key(board: list[list[str]], naught_pieces: list[int],
+                  cross_pieces: list[int], to_move: str | None = None
+                  ) -> tuple[tuple, Transform]:
+    '''
+    Inputs
+        board: A squared board of cells which may contain pieces
+        ... (type Board | BitBoard)
+        naught_pieces: The available pieces of player NAUGHT (type Pieces)
+        cross_pieces: The available pieces of player CROSS (type Pieces)
+        to_move: The player to move, if it is part of the position (type str)
+    Outputs
+        Returns the canonical key of the position and the transform which
+        ... maps it onto the canonical position (type tuple[tuple, Transform])
+    '''
+    if not isinstance(board, BitBoard):
+        board = BitBoard.from_board(board)
+    return canonical_bitboard_key(board, pieces_mask(naught_pieces),
+                                  pieces_mask(cross_pieces), to_move)
+
+
+def to_canonical_move(move: tuple[int, int, int], transform: Transform,
+                      grid_size: int = GRID_SIZE) -> tuple[int, int, int]:
+    '''
+    Inputs
+        move: A move on the original board (type Move)
+        transform: The transform returned with the canonical key (type
+        ... Transform)
+        grid_size: The number of rows (and columns) of the board (type int)
+    Outputs
+        Returns the same move on the canonical board (type Move)
+    '''
+    row, col, size = move
+    return SYMMETRIES[transform[0]](row, col, grid_size) + (size,)
+
+
+def from_canonical_move(move: tuple[int, int, int], transform: Transform,
+                        grid_size: int = GRID_SIZE) -> tuple[int, int, int]:
+    '''
+    Inputs
+        move: A move on the canonical board (type Move)
+        transform: The transform returned with the canonical key (type
+        ... Transform)
+        grid_size: The number of rows (and columns) of the board (type int)
+    Outputs
+        Returns the same move on the original board (type Move)
+    '''
+    row, col, size = move
+    return SYMMETRIES[INVERSES[transform[0]]](row, col, grid_size) + (size,)
+
+
+def transform_board(bitboard: BitBoard, transform: Transform) -> BitBoard:
+    '''
+    Inputs
+        bitboard: A board (type BitBoard)
+        transform: A transform to apply (type Transform)
+    Outputs
+        Returns a new board with the transform applied (type BitBoard)
+    '''
+    symmetry, swapped = transform
+    n = bitboard.grid_size
+    result = BitBoard(n)
+    for row in range(n):
+        for col in range(n):
+            cell = bitboard.cell(row, col)
+            if cell != EMPTY:
+                player = cell[0]
+                if swapped:
+                    player = CROSS if player == NAUGHT else NAUGHT
+                new_row, new_col = SYMMETRIES[symmetry](row, col, n)
+                result.place(player, (new_row, new_col, int(cell[1:])))
+    return result
@@ -0,0 +1,169 @@
+''' Tests of the incremental GameState: its wins, stalemates and undo. '''
+import random
+import unittest
+
+from a1 import *
+
+# (grid size, pieces per player, win length)
+CONFIGS = ((2, 5, 2), (3, 3, 3), (3, 6, 3), (4, 5, 4), (5, 9, 5), (6, 5, 4),
+           (3, 6, 2))
+
+
+def random_move(state: GameState, player: str, rng: random.Random
+                ) -> Move | None:
+    '''
+    Inputs
+        state: A game (type GameState)
+        player: The player to move (type str)
+        rng: Picks the move (type random.Random)
+    Outputs
+        Returns a random valid move of player, or None if there is none
+        ... (type Move | None)
+    '''
+    n = state.grid_size
+    moves = [(row, col, size) for row in range(n) for col in range(n)
+             for size in state.pieces_of(player)
+             if state.check_move(player, (row, col, size))]
+    return rng.choice(moves) if moves else None
+
+
+def snapshot(state: GameState) -> tuple:
+    ''' Returns everything undo and redo must restore, as plain values. '''
+    return ([list(row) for row in state.board], list(state.naught_pieces),
+            list(state.cross_pieces), [list(stack) for stack in state.stacks],
+            state.last_move, state.check_win(), state.check_stalemate(),
+            {player: list(owned) for player, owned in state._owned.items()},
+            list(state._size_counts), state._min_size)
+
+
+class IncrementalTrackingTest(unittest.TestCase):
+    ''' GameState finds the wins and stalemates a full rescan does. '''
+    def test_random_games(self) -> None:
+        rng = random.Random(4)
+        for grid_size, pieces, win_length in CONFIGS:
+            config = game_config(grid_size, pieces, win_length)
+            for _ in range(40):
+                state, player = GameState(config), NAUGHT
+                while True:
+                    winner = check_win(state.board, win_length)
+                    stalemate = check_stalemate(state.board,
+                                                state.naught_pieces,
+                                                state.cross_pieces)
+                    self.assertEqual(state.check_win(), winner)
+                    self.assertEqual(state.check_stalemate(), stalemate)
+                    self.assertEqual(state.has_valid_move(player),
+                                     random_move(state, player, rng)
+                                     is not None)
+                    if winner is not None or stalemate:
+                        break
+                    move = random_move(state, player, rng)
+                    if move is not None:
+                        state.place_piece(player, move)
+                    player = CROSS if player == NAUGHT else NAUGHT
+
+    def test_covered_line_is_lost(self) -> None:
+        state = GameState(game_config(3, 5))
+        for player, move in ((NAUGHT, (0, 0, 1)), (CROSS, (1, 0, 1)),
+                             (NAUGHT, (0, 1, 2)), (CROSS, (0, 1, 3)),
+                             (NAUGHT, (0, 2, 3))):
+            state.place_piece(player, move)
+        # NAUGHT's top row was broken by the cover on (0, 1)
+        self.assertIsNone(state.check_win())
+        state.place_piece(CROSS, (1, 1, 2))
+        state.place_piece(NAUGHT, (0, 1, 4))
+        self.assertEqual(state.check_win(), NAUGHT)
+        self.assertEqual(check_win(state.board), NAUGHT)
+
+    def test_win_and_stalemate(self) -> None:
+        state = GameState(game_config(2, 2))
+        for player, move in ((NAUGHT, (0, 0, 1)), (CROSS, (1, 1, 1)),
+                             (NAUGHT, (0, 1, 2))):
+            state.place_piece(player, move)
+        self.assertEqual(state.check_win(), NAUGHT)
+        self.assertFalse(state.check_stalemate())
+        # Both players run out of pieces without a line
+        state = GameState(game_config(3, 2))
+        for player, move in ((NAUGHT, (0, 0, 2)), (CROSS, (1, 1, 2)),
+                             (NAUGHT, (2, 2, 1)), (CROSS, (0, 2, 1))):
+            state.place_piece(player, move)
+        self.assertIsNone(state.check_win())
+        self.assertTrue(state.check_stalemate())
+
+    def test_stalemate_with_pieces_left(self) -> None:
+        state = GameState(game_config(3, 6))
+        moves = ((NAUGHT, (0, 0, 1)), (CROSS, (0, 0, 2)), (NAUGHT, (0, 1, 3)),
+                 (CROSS, (0, 2, 3)), (NAUGHT, (1, 1, 4)), (CROSS, (1, 0, 4)),
+                 (NAUGHT, (1, 2, 5)), (CROSS, (2, 1, 5)), (NAUGHT, (2, 0, 6)),
+                 (CROSS, (2, 2, 6)))
+        for player, move in moves:
+            self.assertFalse(state.check_stalemate())
+            state.place_piece(player, move)
+        # Every top piece is bigger than the 2 and the 1 still available
+        self.assertEqual((state.naught_pieces, state.cross_pieces), ([2], [1]))
+        self.assertIsNone(state.check_win())
+        self.assertTrue(state.check_stalemate())
+        self.assertFalse(state.has_valid_move(NAUGHT))
+        self.assertFalse(state.has_valid_move(CROSS))
+
+
+class UndoRedoTest(unittest.TestCase):
+    ''' undo() and redo() step through the moves played. '''
+    def test_nothing_to_undo_or_redo(self) -> None:
+        state = GameState()
+        start = snapshot(state)
+        self.assertIsNone(state.undo())
+        self.assertIsNone(state.redo())
+        self.assertEqual(snapshot(state), start)
+
+    def test_undo_to_start_and_redo_to_end(self) -> None:
+        rng = random.Random(19)
+        for grid_size, pieces, win_length in CONFIGS:
+            config = game_config(grid_size, pieces, win_length)
+            for _ in range(10):
+                state, player = GameState(config), NAUGHT
+                states, played = [snapshot(state)], []
+                while state.check_win() is None and \
+                        not state.check_stalemate():
+                    move = random_move(state, player, rng)
+                    if move is not None:
+                        state.place_piece(player, move)
+                        states.append(snapshot(state))
+                        played.append((player, move))
+                    player = CROSS if player == NAUGHT else NAUGHT
+
+                for before, last in zip(reversed(states[:-1]),
+                                        reversed(played)):
+                    self.assertEqual(state.undo(), last)
+                    self.assertEqual(snapshot(state), before)
+                self.assertIsNone(state.undo())
+                for after, last in zip(states[1:], played):
+                    self.assertEqual(state.redo(), last)
+                    self.assertEqual(snapshot(state), after)
+                self.assertIsNone(state.redo())
+
+    def test_undo_reveals_covered_piece(self) -> None:
+        state = GameState(game_config(3, 5))
+        state.place_piece(NAUGHT, (1, 1, 1))
+        covered = snapshot(state)
+        state.place_piece(CROSS, (1, 1, 4))
+        state.place_piece(NAUGHT, (1, 1, 5))
+        self.assertEqual(state.stacks[4], [(NAUGHT, 1), (CROSS, 4),
+                                           (NAUGHT, 5)])
+        state.undo()
+        self.assertEqual(state.board[1][1], CROSS + '4')
+        state.undo()
+        self.assertEqual(snapshot(state), covered)
+        self.assertEqual(state.board[1][1], NAUGHT + '1')
+        self.assertEqual(state.cross_pieces, [1, 2, 3, 4, 5])
+
+    def test_move_forgets_moves_undone(self) -> None:
+        state = GameState()
+        state.place_piece(NAUGHT, (0, 0, 3))
+        state.undo()
+        state.place_piece(NAUGHT, (2, 2, 3))
+        self.assertIsNone(state.redo())
+        self.assertEqual(state.board[0][0], EMPTY)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+''' Tests of the bitboard against the list-of-strings board functions. '''
+import random
+import unittest
+
+from a1 import *
+from bitboard import BitBoard, mask_pieces, pieces_mask
+
+
+class BitBoardTest(unittest.TestCase):
+    ''' A BitBoard plays and reads like the Board it stands for. '''
+    def test_random_games(self) -> None:
+        rng = random.Random(1)
+        for grid_size in range(2, 9):
+            for win_length in sorted({2, min(3, grid_size), grid_size}):
+                config = game_config(grid_size, 9, win_length)
+                for _ in range(10):
+                    board = config.initial_state()
+                    bitboard = BitBoard(grid_size)
+                    pieces = {NAUGHT: config.initial_pieces(),
+                              CROSS: config.initial_pieces()}
+                    player = NAUGHT
+                    while True:
+                        self.assertEqual(bitboard.to_board(), board)
+                        self.assertEqual(BitBoard.from_board(board),
+                                         bitboard)
+                        self.assertEqual(bitboard.winner(win_length),
+                                         check_win(board, win_length))
+                        self.assertEqual(
+                            bitboard.is_stalemate(pieces_mask(pieces[NAUGHT]),
+                                                  pieces_mask(pieces[CROSS])),
+                            check_stalemate(board, pieces[NAUGHT],
+                                            pieces[CROSS]))
+                        if check_win(board, win_length) is not None or \
+                                check_stalemate(board, pieces[NAUGHT],
+                                                pieces[CROSS]):
+                            break
+                        moves = [(row, col, size)
+                                 for row in range(grid_size)
+                                 for col in range(grid_size)
+                                 for size in pieces[player]]
+                        for move in rng.sample(moves, min(len(moves), 5)):
+                            self.assertEqual(
+                                bitboard.can_place(move),
+                                check_move(board, pieces[player], move))
+                        moves = [move for move in moves
+                                 if check_move(board, pieces[player], move)]
+                        if moves:
+                            move = rng.choice(moves)
+                            bitboard.place(player, move)
+                            place_piece(board, player, pieces[player], move)
+                        player = CROSS if player == NAUGHT else NAUGHT
+
+    def test_copy_is_independent(self) -> None:
+        bitboard = BitBoard(3)
+        bitboard.place(NAUGHT, (0, 0, 2))
+        other = bitboard.copy()
+        other.place(CROSS, (0, 0, 4))
+        self.assertEqual(bitboard.cell(0, 0), NAUGHT + '2')
+        self.assertEqual(other[0], [CROSS + '4', EMPTY, EMPTY])
+        self.assertNotEqual(bitboard, other)
+
+    def test_pieces_mask(self) -> None:
+        for pieces in ([], [1], [2, 5, 9], list(range(1, 16))):
+            self.assertEqual(mask_pieces(pieces_mask(pieces)), pieces)
+
+    def test_unsupported_grid_size(self) -> None:
+        for grid_size in (1, 9):
+            with self.assertRaises(ValueError):
+                BitBoard(grid_size)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+''' Tests of the memory-mapped opening book. '''
+import os
+import tempfile
+import unittest
+
+from a1 import *
+from book import OpeningBook, build_opening_book, opening_positions
+from solver import solve
+
+GRID, PIECES, PLIES = 3, 3, 2
+
+
+class OpeningBookTest(unittest.TestCase):
+    ''' The book holds the solved values of the opening positions. '''
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, 'test.book')
+        cls.count = build_opening_book(cls.path, GRID, PIECES, PLIES)
+        cls.positions = opening_positions(GRID, PIECES, PLIES)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.directory.cleanup()
+
+    def test_header(self) -> None:
+        with OpeningBook(self.path) as book:
+            self.assertEqual(len(book), self.count)
+            self.assertEqual(len(book), len(self.positions))
+            self.assertEqual((book.grid_size, book.pieces_per_player),
+                             (GRID, PIECES))
+
+    def test_values_and_moves(self) -> None:
+        with OpeningBook(self.path) as book:
+            for board, naught_pieces, cross_pieces, to_move, _ in \
+                    self.positions.values():
+                expected = solve(board, naught_pieces, cross_pieces, to_move)
+                value, move = book.lookup(board, naught_pieces, cross_pieces,
+                                          to_move)
+                self.assertEqual(value, expected.value)
+                # The move is given on the board as it was looked up
+                own = naught_pieces if to_move == NAUGHT else cross_pieces
+                self.assertTrue(check_move(board, own, move))
+
+    def test_deeper_positions_searched_live(self) -> None:
+        deeper = opening_positions(GRID, PIECES, PLIES + 1)
+        with OpeningBook(self.path) as book:
+            outside = [position for key, position in deeper.items()
+                       if key not in self.positions]
+            self.assertTrue(outside)
+            board, naught_pieces, cross_pieces, to_move, _ = outside[0]
+            self.assertIsNone(book.lookup(board, naught_pieces, cross_pieces,
+                                          to_move))
+            move = book.best_move(board, naught_pieces, cross_pieces,
+                                  to_move)
+            self.assertEqual(move, solve(board, naught_pieces, cross_pieces,
+                                         to_move).move)
+
+    def test_not_a_book(self) -> None:
+        path = os.path.join(self.directory.name, 'not.book')
+        with open(path, 'wb') as file:
+            file.write(bytes(64))
+        with self.assertRaises(ValueError):
+            OpeningBook(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+''' Tests of the MCTS player and of how game_session drives agents. '''
+import io
+import threading
+import unittest
+from contextlib import redirect_stdout
+
+from a1 import *
+from bitboard import BitBoard
+from mcts import MCTSPlayer, Node
+
+
+class CornerAgent:
+    ''' Plays its smallest piece on the last cell it can, and counts the
+        games it was told are over.
+    '''
+    def __init__(self) -> None:
+        self.games_ended = 0
+
+    def __call__(self, state: GameState, player: str) -> Move | None:
+        grid = state.grid_size
+        for size in state.pieces_of(player):
+            for cell in reversed(range(grid ** 2)):
+                move = (cell // grid, cell % grid, size)
+                if state.check_move(player, move):
+                    return move
+        return None
+
+    def end_game(self) -> None:
+        self.games_ended += 1
+
+
+def ponder_threads() -> list[threading.Thread]:
+    return [thread for thread in threading.enumerate()
+            if thread.name == 'mcts-ponder']
+
+
+class EndGameTest(unittest.TestCase):
+    ''' Agents are told as soon as a game is over. '''
+    def test_game_won_on_users_move(self) -> None:
+        agent = CornerAgent()
+        session = game_session(show=lambda *args: None,
+                               agents={CROSS: agent})
+        with redirect_stdout(io.StringIO()) as output:
+            prompt = next(session)
+            for answer in ("1 1 6", "1 2 5", "1 3 4"):
+                self.assertEqual(prompt, "Enter your move: ")
+                prompt = session.send(answer)
+        self.assertEqual(prompt, "Play again? ")
+        self.assertIn("O wins!", output.getvalue())
+        self.assertEqual(agent.games_ended, 1)
+        session.close()
+
+    def test_session_closed_during_game(self) -> None:
+        agent = CornerAgent()
+        session = game_session(show=lambda *args: None,
+                               agents={CROSS: agent})
+        with redirect_stdout(io.StringIO()):
+            next(session)
+            session.send("1 1 6")
+        session.close()
+        self.assertEqual(agent.games_ended, 1)
+
+    def test_pondering_stops_when_user_wins(self) -> None:
+        computer = MCTSPlayer(playouts=50, seed=0, ponder=True)
+        shown = []
+
+        def read(prompt: str) -> str:
+            # Two in a row win: a 6 in the corner cannot be covered, and
+            # ... the computer can take only one of its three neighbours
+            if prompt != "Enter your move: ":
+                return "n"
+            if len(shown) == 1:
+                return "1 1 6"
+            board = shown[-1]
+            row, col = next(cell for cell in ((0, 1), (1, 0), (1, 1))
+                            if board[cell[0]][cell[1]] == EMPTY)
+            return f"{row + 1} {col + 1} 5"
+
+        with redirect_stdout(io.StringIO()) as output:
+            main(read=read, show=lambda board, *pieces: shown.append(
+                     [list(row) for row in board]),
+                 agents={CROSS: computer}, config=game_config(3, 6, 2))
+        self.assertIn("O wins!", output.getvalue())
+        self.assertIsNone(computer._ponderer)
+        self.assertEqual(ponder_threads(), [])
+
+    def test_agent_passing_with_valid_move(self) -> None:
+        session = game_session(show=lambda *args: None,
+                               agents={NAUGHT: lambda state, player: None})
+        with redirect_stdout(io.StringIO()):
+            with self.assertRaises(ValueError):
+                next(session)
+
+
+class SearchTest(unittest.TestCase):
+    ''' A search always finds a move when there is one. '''
+    def setUp(self) -> None:
+        state = GameState()
+        self.board = BitBoard.from_board(state.board)
+        self.mask = pieces_mask(state.naught_pieces)
+
+    def test_pondered_root_without_children(self) -> None:
+        player = MCTSPlayer(playouts=1, seed=0, ponder=True)
+        root = Node(self.board.copy(), self.mask, self.mask, NAUGHT)
+        # Visited once while pondering, never expanded
+        root.visits = 1
+        player.root = root
+        move = player.search(self.board, self.mask, self.mask, NAUGHT)
+        self.assertIsNotNone(move)
+        player.end_game()
+
+    def test_deadline_passed(self) -> None:
+        player = MCTSPlayer(seconds=0.0, seed=0)
+        self.assertIsNotNone(player.search(self.board, self.mask, self.mask,
+                                           NAUGHT))
+
+    def test_end_game_stops_pondering(self) -> None:
+        player = MCTSPlayer(playouts=20, seed=0, ponder=True)
+        player.search(self.board, self.mask, self.mask, NAUGHT)
+        self.assertIsNotNone(player._ponderer)
+        player.end_game()
+        self.assertIsNone(player._ponderer)
+        self.assertIsNone(player.root)
+        self.assertEqual(ponder_threads(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
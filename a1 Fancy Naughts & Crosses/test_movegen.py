@@ -0,0 +1,99 @@
+''' Tests of the legal move generator. '''
+import random
+import unittest
+
+from a1 import *
+from bitboard import BitBoard
+from movegen import (BIGGEST_FIRST, ROW_MAJOR, SMALLEST_FIRST, legal_moves,
+                     min_legal_sizes)
+
+
+def random_positions(count: int, seed: int
+                     ) -> list[tuple[Board, Pieces, Pieces]]:
+    '''
+    Inputs
+        count: How many positions to return (type int)
+        seed: The seed of the random number generator (type int)
+    Outputs
+        Returns positions of random games on every grid size, each with the
+        ... pieces of the player to move and of the opponent
+        ... (type list[tuple[Board, Pieces, Pieces]])
+    '''
+    rng = random.Random(seed)
+    positions = []
+    for _ in range(count):
+        grid_size = rng.randrange(2, 7)
+        state = GameState(game_config(grid_size, rng.randrange(1, 10)))
+        player = NAUGHT
+        for _ in range(rng.randrange(grid_size ** 2)):
+            moves = [(row, col, size) for row in range(grid_size)
+                     for col in range(grid_size)
+                     for size in state.pieces_of(player)
+                     if state.check_move(player, (row, col, size))]
+            if not moves:
+                break
+            state.place_piece(player, rng.choice(moves))
+            player = CROSS if player == NAUGHT else NAUGHT
+        opponent = CROSS if player == NAUGHT else NAUGHT
+        positions.append(([list(row) for row in state.board],
+                          list(state.pieces_of(player)),
+                          list(state.pieces_of(opponent))))
+    return positions
+
+
+def valid_moves(board: Board, pieces: Pieces) -> set[Move]:
+    ''' Returns every move check_move accepts, by trying each in turn. '''
+    n = len(board)
+    return {(row, col, size) for row in range(n) for col in range(n)
+            for size in pieces if check_move(board, pieces, (row, col, size))}
+
+
+class LegalMovesTest(unittest.TestCase):
+    ''' legal_moves() yields the valid moves, each once, in order. '''
+    def test_every_valid_move_once(self) -> None:
+        for board, pieces, _ in random_positions(200, 14):
+            for source in (board, BitBoard.from_board(board)):
+                moves = list(legal_moves(source, pieces))
+                self.assertEqual(len(moves), len(set(moves)))
+                self.assertEqual(set(moves), valid_moves(board, pieces))
+
+    def test_orders(self) -> None:
+        for board, pieces, _ in random_positions(50, 15):
+            moves = list(legal_moves(board, pieces, order=ROW_MAJOR))
+            self.assertEqual(moves, sorted(moves))
+            self.assertEqual(list(legal_moves(board, pieces,
+                                              order=SMALLEST_FIRST)),
+                             sorted(moves, key=lambda move: move[2]))
+            self.assertEqual(list(legal_moves(board, pieces,
+                                              order=BIGGEST_FIRST)),
+                             sorted(moves, key=lambda move: -move[2]))
+            self.assertEqual(list(legal_moves(board, pieces,
+                                              order=lambda move: -move[0])),
+                             sorted(moves, key=lambda move: -move[0]))
+
+    def test_pruned_moves(self) -> None:
+        for board, pieces, opponent_pieces in random_positions(200, 16):
+            pruned = list(legal_moves(board, pieces, opponent_pieces))
+            moves = valid_moves(board, pieces)
+            self.assertLessEqual(set(pruned), moves)
+            biggest = max(opponent_pieces, default=0)
+            for row, col, size in moves:
+                # Only the smallest size the opponent can never cover is kept
+                uncoverable = [other for other in pieces
+                               if other > biggest and
+                               (row, col, other) in moves]
+                expected = size <= biggest or size == min(uncoverable)
+                self.assertEqual((row, col, size) in pruned, expected)
+
+    def test_min_legal_sizes(self) -> None:
+        for board, pieces, _ in random_positions(100, 17):
+            moves = valid_moves(board, pieces)
+            n = len(board)
+            self.assertEqual(
+                min_legal_sizes(board, pieces),
+                [[min((size for size in pieces if (row, col, size) in moves),
+                      default=None) for col in range(n)] for row in range(n)])
+
+
+if __name__ == '__main__':
+    unittest.main()
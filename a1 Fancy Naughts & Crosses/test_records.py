@@ -0,0 +1,123 @@
+''' Tests of the binary game-record format. '''
+import io
+import os
+import random
+import tempfile
+import unittest
+
+from a1 import *
+from records import (MAGIC, STALEMATE, GameRecord, GameRecordWriter,
+                     encode_game, iter_games, open_games, read_games)
+
+
+def random_record(grid_size: int, pieces: int, rng: random.Random
+                  ) -> GameRecord:
+    '''
+    Inputs
+        grid_size: The number of rows (and columns) of the board (type int)
+        pieces: The number of pieces of each player (type int)
+        rng: Picks the moves (type random.Random)
+    Outputs
+        Returns a random game played to its end (type GameRecord)
+    '''
+    state, player = GameState(game_config(grid_size, pieces)), NAUGHT
+    moves = []
+    while not state.check_stalemate() and state.check_win() is None:
+        choices = [(row, col, size) for row in range(grid_size)
+                   for col in range(grid_size)
+                   for size in state.pieces_of(player)
+                   if state.check_move(player, (row, col, size))]
+        if choices:
+            move = rng.choice(choices)
+            state.place_piece(player, move)
+            moves.append(move)
+        player = CROSS if player == NAUGHT else NAUGHT
+    result = STALEMATE if state.check_stalemate() else state.check_win()
+    return GameRecord(grid_size, pieces, moves, result)
+
+
+def write_records(records: list[GameRecord]) -> bytes:
+    ''' Returns a record file of the games, as GameRecordWriter writes it. '''
+    stream = io.BytesIO()
+    writer = GameRecordWriter(stream)
+    for record in records:
+        writer.write_game(record)
+    return stream.getvalue()
+
+
+class RoundTripTest(unittest.TestCase):
+    ''' Every reader gives back the games written. '''
+    @classmethod
+    def setUpClass(cls) -> None:
+        rng = random.Random(10)
+        cls.records = [random_record(grid_size, pieces, rng)
+                       for grid_size in (2, 3, 5, 8)
+                       for pieces in (1, 5, 9, 15) for _ in range(5)]
+        cls.records.append(GameRecord(3, 5, [], None))
+        cls.data = write_records(cls.records)
+
+    def test_read_games(self) -> None:
+        self.assertEqual(list(read_games(io.BytesIO(self.data))),
+                         self.records)
+
+    def test_iter_games(self) -> None:
+        self.assertEqual(list(iter_games(self.data)), self.records)
+
+    def test_open_games(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'games.a1gr')
+            with open(path, 'wb') as file:
+                file.write(self.data)
+            self.assertEqual(list(open_games(path)), self.records)
+
+    def test_size(self) -> None:
+        # Three header bytes and 12 bits a move, padded to a whole byte
+        record = GameRecord(3, 5, [(0, 0, 5), (1, 1, 4), (2, 2, 3)], None)
+        self.assertEqual(len(encode_game(record)), 3 + 5)
+
+    def test_moves_written_one_at_a_time(self) -> None:
+        record = self.records[0]
+        unfinished = GameRecord(4, 6, [(3, 3, 6)], None)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'games.a1gr')
+            with GameRecordWriter(open(path, 'wb')) as writer:
+                writer.begin_game(record.grid_size, record.pieces_per_player)
+                for move in record.moves:
+                    writer.add_move(move)
+                writer.end_game(record.result)
+                # The unfinished game is written out as the writer closes
+                writer.begin_game(4, 6)
+                writer.add_move((3, 3, 6))
+            self.assertEqual(writer.games, 2)
+            self.assertEqual(list(open_games(path)), [record, unfinished])
+
+
+class InvalidRecordTest(unittest.TestCase):
+    ''' Games and files outside the format are rejected. '''
+    def test_truncated(self) -> None:
+        data = write_records([GameRecord(3, 5, [(0, 0, 5), (1, 1, 4)],
+                                         NAUGHT)])
+        for cut in (1, 4):
+            with self.assertRaises(ValueError):
+                list(read_games(io.BytesIO(data[:-cut])))
+            with self.assertRaises(ValueError):
+                list(iter_games(data[:-cut]))
+
+    def test_not_a_record_file(self) -> None:
+        with self.assertRaises(ValueError):
+            list(iter_games(b'not a record file'))
+        with self.assertRaises(ValueError):
+            list(read_games(io.BytesIO(MAGIC[:-1])))
+
+    def test_game_outside_format(self) -> None:
+        for record in (GameRecord(9, 5, [], None),
+                       GameRecord(3, 16, [], None),
+                       GameRecord(3, 5, [(3, 0, 1)], None),
+                       GameRecord(3, 5, [(0, 0, 6)], None),
+                       GameRecord(3, 5, [], 'Draw')):
+            with self.assertRaises(ValueError):
+                encode_game(record)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+''' Tests of the alpha-beta solver, sequential and parallel. '''
+import random
+import unittest
+
+from a1 import *
+from solver import (DRAW, LOSS, WIN, TranspositionTable, solve,
+                    solve_parallel)
+
+
+def random_positions(config: GameConfig, plies: int, count: int, seed: int
+                     ) -> list[tuple[GameState, str]]:
+    '''
+    Inputs
+        config: The variant of the game (type GameConfig)
+        plies: How many random moves to play from the start (type int)
+        count: How many positions to return (type int)
+        seed: The seed of the random number generator (type int)
+    Outputs
+        Returns positions on which the game is not over, with the player to
+        ... move (type list[tuple[GameState, str]])
+    '''
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        state, player = GameState(config), NAUGHT
+        for _ in range(plies):
+            moves = [(row, col, size) for row in range(config.grid_size)
+                     for col in range(config.grid_size)
+                     for size in state.pieces_of(player)
+                     if state.check_move(player, (row, col, size))]
+            if moves:
+                state.place_piece(player, rng.choice(moves))
+            player = CROSS if player == NAUGHT else NAUGHT
+            if state.check_win() is not None or state.check_stalemate():
+                break
+        if state.check_win() is None and not state.check_stalemate():
+            positions.append((state, player))
+    return positions
+
+
+def brute_force(state: GameState, player: str) -> int:
+    '''
+    Inputs
+        state: A game which is not over, searched by making and undoing
+        ... moves on it (type GameState)
+        player: The player to move (type str)
+    Outputs
+        Returns the value of the game for player by plain minimax over every
+        ... valid move, with no pruning and no table (type int)
+    '''
+    opponent = CROSS if player == NAUGHT else NAUGHT
+    moves = [(row, col, size) for row in range(state.grid_size)
+             for col in range(state.grid_size)
+             for size in set(state.pieces_of(player))
+             if state.check_move(player, (row, col, size))]
+    # A player without a valid move passes
+    if not moves:
+        return -brute_force(state, opponent)
+    best = LOSS
+    for move in moves:
+        state.place_piece(player, move)
+        # Stalemate is checked before a win, as in the game loop of main()
+        if state.check_stalemate():
+            value = DRAW
+        elif state.check_win() is not None:
+            value = WIN
+        else:
+            value = -brute_force(state, opponent)
+        state.undo()
+        best = max(best, value)
+    return best
+
+
+class SolveTest(unittest.TestCase):
+    ''' solve() finds the game-theoretic value and a move achieving it. '''
+    def test_opening_values(self) -> None:
+        # The first player wins on a 2x2 board; 3x3 games are drawn
+        for grid_size, pieces, expected in ((2, 3, WIN), (2, 5, WIN),
+                                            (3, 3, DRAW), (3, 4, DRAW)):
+            state = GameState(game_config(grid_size, pieces))
+            result = solve(state.board, state.naught_pieces,
+                           state.cross_pieces, NAUGHT)
+            self.assertEqual(result.value, expected)
+            self.assertTrue(state.check_move(NAUGHT, result.move))
+
+    def test_matches_brute_force(self) -> None:
+        for grid_size, pieces, plies in ((2, 3, 0), (2, 4, 1), (3, 3, 2),
+                                         (3, 4, 4)):
+            config = game_config(grid_size, pieces)
+            for state, player in random_positions(config, plies, 4, plies):
+                expected = brute_force(state, player)
+                for symmetry in (True, False):
+                    result = solve(state.board, state.naught_pieces,
+                                   state.cross_pieces, player,
+                                   symmetry=symmetry)
+                    self.assertEqual(result.value, expected)
+
+    def test_move_achieves_value(self) -> None:
+        config = game_config(3, 4)
+        for state, player in random_positions(config, 3, 6, 7):
+            result = solve(state.board, state.naught_pieces,
+                           state.cross_pieces, player)
+            if result.move is None:
+                continue
+            state.place_piece(player, result.move)
+            if state.check_stalemate():
+                value = DRAW
+            elif state.check_win() is not None:
+                value = WIN
+            else:
+                opponent = CROSS if player == NAUGHT else NAUGHT
+                value = -solve(state.board, state.naught_pieces,
+                               state.cross_pieces, opponent).value
+            self.assertEqual(value, result.value)
+
+    def test_game_over(self) -> None:
+        state = GameState(game_config(3, 3))
+        for player, move in ((NAUGHT, (0, 0, 3)), (CROSS, (1, 0, 1)),
+                             (NAUGHT, (0, 1, 2)), (CROSS, (1, 1, 2)),
+                             (NAUGHT, (0, 2, 1))):
+            state.place_piece(player, move)
+        self.assertEqual(state.check_win(), NAUGHT)
+        for player, expected in ((NAUGHT, WIN), (CROSS, LOSS)):
+            result = solve(state.board, state.naught_pieces,
+                           state.cross_pieces, player)
+            self.assertEqual((result.value, result.move), (expected, None))
+
+    def test_shared_table(self) -> None:
+        table = TranspositionTable(1 << 10)
+        state = GameState(game_config(3, 3))
+        first = solve(state.board, state.naught_pieces, state.cross_pieces,
+                      NAUGHT, table)
+        again = solve(state.board, state.naught_pieces, state.cross_pieces,
+                      NAUGHT, table)
+        self.assertEqual(again.value, first.value)
+        self.assertGreater(again.tt_hits, 0)
+
+
+class ParallelSolveTest(unittest.TestCase):
+    ''' solve_parallel() finds the values solve() does. '''
+    def test_matches_solve(self) -> None:
+        for pieces, plies in ((3, 0), (4, 1), (5, 3)):
+            config = game_config(3, pieces)
+            for state, player in random_positions(config, plies, 3, pieces):
+                expected = solve(state.board, state.naught_pieces,
+                                 state.cross_pieces, player).value
+                for split_plies in (1, 2):
+                    result = solve_parallel(
+                        state.board, state.naught_pieces, state.cross_pieces,
+                        player, workers=2, split_plies=split_plies)
+                    self.assertEqual(result.value, expected)
+                    self.assertIn(result.value, (WIN, DRAW, LOSS))
+                    self.assertIsNotNone(result.move)
+
+
+if __name__ == '__main__':
+    unittest.main()
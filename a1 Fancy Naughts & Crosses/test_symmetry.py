@@ -0,0 +1,130 @@
+''' Tests of the symmetry-canonical position keys. '''
+import random
+import unittest
+
+from a1 import *
+from bitboard import BitBoard
+from symmetry import (IDENTITY, SYMMETRIES, canonical_bitboard_key,
+                      canonical_key, from_canonical_move, to_canonical_move,
+                      transform_board)
+
+TRANSFORMS = [(symmetry, swapped) for symmetry in range(len(SYMMETRIES))
+              for swapped in (False, True)]
+
+
+def random_position(grid_size: int, plies: int, rng: random.Random
+                    ) -> tuple[BitBoard, Pieces, Pieces, str]:
+    '''
+    Inputs
+        grid_size: The number of rows (and columns) of the board (type int)
+        plies: How many random valid moves to play (type int)
+        rng: Picks the moves (type random.Random)
+    Outputs
+        Returns the board, both players' pieces and the player to move
+        ... (type tuple[BitBoard, Pieces, Pieces, str])
+    '''
+    state, player = GameState(game_config(grid_size, 5)), NAUGHT
+    for _ in range(plies):
+        moves = [(row, col, size) for row in range(grid_size)
+                 for col in range(grid_size)
+                 for size in state.pieces_of(player) if state.check_move(player, (row, col, size))]
+        if moves:
+            state.place_piece(player, rng.choice(moves))
+        player = CROSS if player == NAUGHT else NAUGHT
+    return (BitBoard.from_board(state.board), list(state.naught_pieces),
+            list(state.cross_pieces), player)
+
+
+def key_of(board: BitBoard, naught_pieces: Pieces, cross_pieces: Pieces,
+           to_move: str) -> tuple:
+    ''' Returns only the canonical key of the position. '''
+    return canonical_key(board, naught_pieces, cross_pieces, to_move)[0]
+
+
+class CanonicalKeyTest(unittest.TestCase):
+    ''' Equivalent positions share a key, and others do not. '''
+    def test_equivalent_positions(self) -> None:
+        rng = random.Random(3)
+        for grid_size in (2, 3, 4, 5):
+            for plies in range(0, 8):
+                board, naughts, crosses, to_move = random_position(
+                    grid_size, plies, rng)
+                key = key_of(board, naughts, crosses, to_move)
+                for transform in TRANSFORMS:
+                    other = transform_board(board, transform)
+                    if transform[1]:
+                        # Swapping colours swaps the pieces and the mover
+                        moved = key_of(other, crosses, naughts,
+                                       CROSS if to_move == NAUGHT else NAUGHT)
+                    else:
+                        moved = key_of(other, naughts, crosses, to_move)
+                    self.assertEqual(moved, key)
+
+    def test_different_positions(self) -> None:
+        pieces = [1, 2, 3]
+        corner, centre, edge = BitBoard(3), BitBoard(3), BitBoard(3)
+        corner.place(NAUGHT, (0, 0, 3))
+        centre.place(NAUGHT, (1, 1, 3))
+        edge.place(NAUGHT, (0, 1, 3))
+        keys = {key_of(board, pieces[:2], pieces, CROSS)
+                for board in (corner, centre, edge)}
+        self.assertEqual(len(keys), 3)
+        # The player to move and the pieces left are part of the position
+        self.assertNotEqual(key_of(corner, pieces[:2], pieces, CROSS),
+                            key_of(corner, pieces[:2], pieces, NAUGHT))
+        self.assertNotEqual(key_of(corner, pieces[:2], pieces, CROSS),
+                            key_of(corner, [1, 3], pieces, CROSS))
+
+    def test_list_and_bitboard_keys(self) -> None:
+        board, naughts, crosses, to_move = random_position(
+            3, 4, random.Random(5))
+        self.assertEqual(
+            canonical_key(board.to_board(), naughts, crosses, to_move),
+            canonical_bitboard_key(board, pieces_mask(naughts),
+                                   pieces_mask(crosses), to_move))
+
+
+class CanonicalMoveTest(unittest.TestCase):
+    ''' Moves map between a position and its canonical position. '''
+    def test_round_trip(self) -> None:
+        for grid_size in (2, 3, 6):
+            for transform in TRANSFORMS:
+                for row in range(grid_size):
+                    for col in range(grid_size):
+                        move = (row, col, 2)
+                        canonical = to_canonical_move(move, transform,
+                                                      grid_size)
+                        self.assertEqual(from_canonical_move(
+                            canonical, transform, grid_size), move)
+        self.assertEqual(to_canonical_move((0, 1, 3), IDENTITY, 3), (0, 1, 3))
+
+    def test_move_on_canonical_board(self) -> None:
+        rng = random.Random(7)
+        for grid_size in (3, 4):
+            for plies in range(0, 6):
+                board, naughts, crosses, to_move = random_position(
+                    grid_size, plies, rng)
+                key, transform = canonical_key(board, naughts, crosses,
+                                               to_move)
+                canonical = transform_board(board, transform)
+                move = next((row, col, size) for size in (5, 4, 3)
+                            for row in range(grid_size)
+                            for col in range(grid_size)
+                            if board.can_place((row, col, size)))
+                played = board.copy()
+                played.place(to_move, move)
+                # The same move on the canonical board reaches an equivalent
+                # ... position, with the mover's colour swapped if need be
+                mover = CROSS if (to_move == CROSS) != transform[1] \
+                    else NAUGHT
+                canonical.place(mover, to_canonical_move(move, transform,
+                                                         grid_size))
+                self.assertEqual(
+                    canonical_key(played, naughts, crosses)[0],
+                    canonical_key(canonical, *((crosses, naughts)
+                                               if transform[1] else
+                                               (naughts, crosses)))[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,6 +5,8 @@ from a2_support import *
 class Tile():
     """ abstract class for tiles
     """
+    __slots__ = ()
+
     def __init__(self) -> None:
         """ attributes of Tile
         """
@@ -44,6 +46,8 @@ class Tile():
 class Floor(Tile):
     """ tiles as empty spaces which do not block moving instances
     """
+    __slots__ = ()
+
     def get_type(self) -> str:
         return ' '
 
@@ -52,6 +56,8 @@ class Floor(Tile):
 class Wall(Tile):
     """ tiles as walls which block moving instances
     """
+    __slots__ = ()
+
     def is_blocking(self) -> bool:
         """ a wall default to be blocking
 
@@ -65,11 +71,24 @@ class Wall(Tile):
 class Goal(Tile):
     """ tiles as a goal location for a crate
     """
-    def __init__(self) -> None:
+    __slots__ = ('_filled',)
+
+    def __init__(self, filled: bool = False) -> None:
         """ attributes of Goal: _filled: whether a goal is filled
+
+        Inputs:
+            filled: whether the goal starts filled (bool)
         """
         super().__init__()
-        self._filled = False
+        self._filled = filled
+    
+    def get_type(self) -> str:
+        """ get the type of a goal, filled or not
+
+        Outputs:
+            : GOAL (str)
+        """
+        return GOAL
     
     def fill(self) -> None:
         """ set a goal to be filled
@@ -110,9 +129,30 @@ class Goal(Tile):
 
 
 
+class SharedGoal(Goal):
+    """ goals shared by every cell of every maze, which can therefore be
+        neither filled nor unfilled: the model fills a goal by putting the
+        filled shared goal in its cell
+    """
+    __slots__ = ()
+    
+    def fill(self) -> None:
+        """ raises TypeError, as a shared goal cannot change
+        """
+        raise TypeError('a shared goal cannot be filled')
+    
+    def unfill(self) -> None:
+        """ raises TypeError, as a shared goal cannot change
+        """
+        raise TypeError('a shared goal cannot be unfilled')
+
+
+
 class Entity():
     """ abstract class for entities
     """
+    __slots__ = ()
+
     def __init__(self) -> None:
         """ entities has no attributes beyond self
         """
@@ -152,6 +192,8 @@ class Entity():
 class Crate(Entity):
     """ entities as crates
     """
+    __slots__ = ('_strength',)
+
     def __init__(self, strength: int) -> None:
         """ attributes of crates
 
@@ -194,6 +236,8 @@ class Crate(Entity):
 class Potion(Entity):
     """ entities as potions
     """
+    __slots__ = ()
+
     def __init__(self) -> None:
         """ potions has no attributes beyond self
         """
@@ -223,6 +267,8 @@ class Potion(Entity):
 class StrengthPotion(Potion):
     """ entities as potions of type StrengthPotion
     """
+    __slots__ = ()
+
     def effect(self) -> dict[str, int]:
         """ a strength potion adds 2 'strength's
 
@@ -236,6 +282,8 @@ class StrengthPotion(Potion):
 class MovePotion(Potion):
     """ entities as potions of type MovePotion
     """
+    __slots__ = ()
+
     def effect(self) -> dict[str, int]:
         """ a move potion adds 5 'move's
 
@@ -249,6 +297,8 @@ class MovePotion(Potion):
 class FancyPotion(Potion):
     """ entities as potions of type FancyPotion
     """
+    __slots__ = ()
+
     def effect(self) -> dict[str, int]:
         """ a fancy potion adds 2 'strength's and 2 'move's
 
@@ -262,6 +312,8 @@ class FancyPotion(Potion):
 class Player(Entity):
     """ entities as players
     """
+    __slots__ = ('_strength', '_moves_remaining')
+
     def __init__(self, start_strength: int, moves_remaining: int) -> None:
         """ attributes of a player
 
@@ -328,6 +380,13 @@ class Player(Entity):
 
 
 
+# one instance of each tile is shared by every cell of every maze
+FLOOR_TILE = Floor()
+WALL_TILE = Wall()
+GOAL_TILES = {False: SharedGoal(), True: SharedGoal(filled=True)}
+
+
+
 def convert_maze(game: list[list[str]]) -> tuple[Grid, Entities, Position]:
     """ convert string representation of a maze to be an object-oriented one,
         and re-locate entities and player position information from the maze
@@ -351,7 +410,7 @@ def convert_maze(game: list[list[str]]) -> tuple[Grid, Entities, Position]:
             i: row of the position (int)
             j: col of the position (int)
         """
-        game[i][j] = Floor()
+        game[i][j] = FLOOR_TILE
         return 
 
     # handle the raw maze cell by cell
@@ -383,9 +442,9 @@ def convert_maze(game: list[list[str]]) -> tuple[Grid, Entities, Position]:
             
             # handle any tiles
             elif game[i][j] == WALL:
-                game[i][j] = Wall()
+                game[i][j] = WALL_TILE
             elif game[i][j] == GOAL:
-                game[i][j] = Goal()
+                game[i][j] = GOAL_TILES[False]
             elif game[i][j] == FLOOR:
                 make_floor(i, j)
             
@@ -411,6 +470,10 @@ class SokobanModel():
             convert_maze(raw_maze)
         self._player = Player(strength, moves)
         
+        # the number of goals unfilled, so has_won need not scan the maze
+        self._unfilled_goals = sum(tile is GOAL_TILES[False]
+                                   for row in self._maze for tile in row)
+        
         # attributes for undo
         self._player_position_history = [self._player_position]
         self._gone_crate_history, self._gone_potion_history = dict(), []
@@ -547,13 +610,14 @@ class SokobanModel():
                     del self._entities[next_position]
                     
                     # if next position of a crate stands an unfilled goal
-                    if type(self._maze[row_2][col_2]) == Goal and \
+                    if isinstance(self._maze[row_2][col_2], Goal) and \
                         not self._maze[row_2][col_2].is_filled():
                         self._player_last_hit = 'CRATE then GOAL'
                         self._gone_crate_history[(row_2, col_2)] = \
                             self._entities[(row_2, col_2)]
                         del self._entities[(row_2, col_2)]
-                        self._maze[row_2][col_2].fill()
+                        self._maze[row_2][col_2] = GOAL_TILES[True]
+                        self._unfilled_goals -= 1
 
             # if next position of player stands a potion
             elif type(self._entities[next_position]) in \
@@ -582,8 +646,7 @@ class SokobanModel():
         Outputs:
             : if the game has been won (bool)
         """
-        return not any(isinstance(tile, Goal) and not tile.is_filled()
-                       for row in self._maze for tile in row)
+        return self._unfilled_goals == 0
     
     def undo(self) -> None:
         """ undo all the effects by the last valid move, w.r.t. crates, goals,
@@ -601,7 +664,10 @@ class SokobanModel():
             position_crate, crate = list(self._gone_crate_history.items())[-1]
             row, col = position_crate
             self._entities[(row-row_move, col-col_move)] = crate
-            self._maze[row][col].unfill()
+            # undo may be repeated, but the goal is only unfilled once
+            if self._maze[row][col] is GOAL_TILES[True]:
+                self._unfilled_goals += 1
+            self._maze[row][col] = GOAL_TILES[False]
 
         # if next position of player stood a crate 
         elif self._player_last_hit == CRATE:
@@ -0,0 +1,73 @@
+""" Tests of the a2 SokobanModel's goals and undo. """
+import os
+import unittest
+
+from a2 import *
+
+MAZE_FILES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          'maze_files')
+# Moves winning maze1, the last one pushing the crate onto the goal
+MAZE1_WIN = 'dssasdddsdw'
+
+
+def unfilled_goals(model: SokobanModel) -> int:
+    """ returns the number of unfilled goals, found by scanning the maze
+    """
+    return sum(isinstance(tile, Goal) and not tile.is_filled()
+               for row in model.get_maze() for tile in row)
+
+
+class GoalCountTest(unittest.TestCase):
+    """ has_won reads a count of unfilled goals kept by moves and undo
+    """
+    def setUp(self) -> None:
+        self.model = SokobanModel(os.path.join(MAZE_FILES, 'maze1.txt'))
+
+    def play(self, moves: str) -> None:
+        for move in moves:
+            self.assertTrue(self.model.attempt_move(move))
+
+    def test_win(self) -> None:
+        self.assertFalse(self.model.has_won())
+        self.play(MAZE1_WIN)
+        self.assertTrue(self.model.has_won())
+        self.assertEqual(unfilled_goals(self.model), 0)
+
+    def test_undo_unfills_goal(self) -> None:
+        self.play(MAZE1_WIN)
+        self.model.undo()
+        self.assertFalse(self.model.has_won())
+        self.assertEqual(unfilled_goals(self.model), 1)
+        self.play('w')
+        self.assertTrue(self.model.has_won())
+
+    def test_repeated_undo_then_push(self) -> None:
+        self.play(MAZE1_WIN)
+        self.model.undo()
+        self.model.undo()
+        self.assertEqual(self.model._unfilled_goals, unfilled_goals(self.model))
+        self.play('w')
+        self.assertTrue(self.model.has_won())
+        self.assertEqual(unfilled_goals(self.model), 0)
+
+    def test_models_share_no_goal_state(self) -> None:
+        other = SokobanModel(os.path.join(MAZE_FILES, 'maze1.txt'))
+        self.play(MAZE1_WIN)
+        self.assertFalse(other.has_won())
+        self.assertEqual(unfilled_goals(other), 1)
+
+    def test_shared_goals_cannot_change(self) -> None:
+        for tile in GOAL_TILES.values():
+            with self.assertRaises(TypeError):
+                tile.fill()
+            with self.assertRaises(TypeError):
+                tile.unfill()
+        goal = Goal()
+        goal.fill()
+        self.assertTrue(goal.is_filled())
+        goal.unfill()
+        self.assertFalse(goal.is_filled())
+
+
+if __name__ == '__main__':
+    unittest.main()
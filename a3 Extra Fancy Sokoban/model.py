@@ -1,11 +1,39 @@
+import hashlib
+from functools import lru_cache
+from typing import NamedTuple
+
 from a2_support import *
 
 COIN = '$'
 COIN_AMOUNT = 5
+ZOBRIST_BITS = 64
+
+
+@lru_cache(maxsize=None)
+def zobrist(feature: str, value: object) -> int:
+    """ Returns the Zobrist number of a feature of a game state, e.g. a crate
+        of strength 3 at (2, 4) is zobrist('3', (2, 4)) and 5 moves remaining
+        is zobrist('moves', 5).
+
+    The number is derived from the feature by BLAKE2b rather than drawn at
+    random, so it is the same in every process and keys may be stored.
+
+    Parameters:
+        feature: The kind of feature: an entity's string, PLAYER, FILLED_GOAL
+                 or one of the player's stats ('strength', 'moves', 'money').
+        value: Where the feature is, or the value of a stat.
+
+    Returns:
+        A ZOBRIST_BITS-bit number.
+    """
+    digest = hashlib.blake2b(f'{feature}@{value}'.encode(),
+                             digest_size=ZOBRIST_BITS // 8).digest()
+    return int.from_bytes(digest, 'big')
 
 
 class Tile:
     """ Abstract class for a tile in the maze. """
+    __slots__ = ()
     TYPE = 'Abstract Tile'
     BLOCKING = False
 
@@ -26,23 +54,30 @@ class Tile:
 
 class Floor(Tile):
     """ A basic floor tile (non-blocking) in the maze. """
+    __slots__ = ()
     TYPE = FLOOR
 
 
 class Wall(Tile):
     """ A basic wall tile (blocking) in the maze. """
+    __slots__ = ()
     TYPE = WALL
     BLOCKING = True
 
 
 class Goal(Tile):
     """ A goal tile onto which crates should be pushed in the maze. """
+    __slots__ = ('_is_filled',)
     TYPE = GOAL
 
-    def __init__(self) -> None:
-        """ Constructor for Goal. Goal is initially unfilled. """
+    def __init__(self, filled: bool = False) -> None:
+        """ Constructor for Goal. Goal is initially unfilled.
+
+        Parameters:
+            filled: Whether the goal starts filled instead.
+        """
         super().__init__()
-        self._is_filled = False
+        self._is_filled = filled
 
     def fill(self) -> None:
         """ Fills this goal. """
@@ -60,8 +95,25 @@ class Goal(Tile):
         return FILLED_GOAL if self._is_filled else self.get_type()
 
 
+class SharedGoal(Goal):
+    """ A goal tile shared by every cell of every maze, which can therefore be
+        neither filled nor unfilled: the model fills a goal by putting the
+        filled shared goal in its cell.
+    """
+    __slots__ = ()
+
+    def fill(self) -> None:
+        """ Raises TypeError, as a shared goal cannot change. """
+        raise TypeError('A shared goal cannot be filled')
+
+    def unfill(self) -> None:
+        """ Raises TypeError, as a shared goal cannot change. """
+        raise TypeError('A shared goal cannot be unfilled')
+
+
 class Entity:
     """ Abstract class for an entity in the maze. """
+    __slots__ = ()
     TYPE = 'Abstract Entity'
     MOVABLE = False
 
@@ -82,6 +134,7 @@ class Entity:
 
 class Crate(Entity):
     """ A crate entity in the maze. """
+    __slots__ = ('_strength',)
     TYPE = CRATE
     MOVABLE = True
 
@@ -106,11 +159,13 @@ class Coin(Entity):
     """ A coin entity in the maze, which can be collected by a player to
         increase their money.
     """
+    __slots__ = ()
     TYPE = COIN
 
 
 class Potion(Entity):
     """ Abstract class for a potion entity in the maze. """
+    __slots__ = ()
     TYPE = 'Potion'
     EFFECT = {}
 
@@ -123,12 +178,14 @@ class Potion(Entity):
 
 class StrengthPotion(Potion):
     """ A potion that increases the strength of the player. """
+    __slots__ = ()
     TYPE = STRENGTH_POTION
     EFFECT = {'strength': 2}
 
 
 class MovePotion(Potion):
     """ A potion that increases the moves remaining for the player. """
+    __slots__ = ()
     TYPE = MOVE_POTION
     EFFECT = {'moves': 5}
 
@@ -137,12 +194,14 @@ class FancyPotion(Potion):
     """ A potion that increases both the strength and moves remaining for the
         player.
     """
+    __slots__ = ()
     TYPE = FANCY_POTION
     EFFECT = {'strength': 2, 'moves': 2}
 
 
 class Player(Entity):
     """ A player entity in the maze. """
+    __slots__ = ('_strength', '_moves_remaining', '_money')
     TYPE = PLAYER
 
     def __init__(self, start_strength: int, moves_remaining: int) -> None:
@@ -215,6 +274,18 @@ TILE_IDS_TO_CLASS = {
     FILLED_GOAL: Goal,
 }
 
+# One instance of each tile is shared by every cell of every maze, and the
+# model keeps which goals are filled
+FLOOR_TILE = Floor()
+WALL_TILE = Wall()
+GOAL_TILES = {False: SharedGoal(), True: SharedGoal(filled=True)}
+TILE_IDS_TO_TILE = {
+    FLOOR: FLOOR_TILE,
+    WALL: WALL_TILE,
+    GOAL: GOAL_TILES[False],
+    FILLED_GOAL: GOAL_TILES[True],
+}
+
 ENTITY_IDS_TO_CLASS = {
     CRATE: Crate,
     COIN: Coin,
@@ -246,11 +317,7 @@ def convert_maze(raw_maze: list[list[str]]) -> tuple[Grid, Entities, Position]:
     for i, row in enumerate(raw_maze):
         new_row = []
         for j, tile_type in enumerate(row):
-            tile = TILE_IDS_TO_CLASS.get(tile_type, Floor)()
-            if tile_type == FILLED_GOAL:
-                tile.fill()
-
-            new_row.append(tile)
+            new_row.append(TILE_IDS_TO_TILE.get(tile_type, FLOOR_TILE))
             if not TILE_IDS_TO_CLASS.get(tile_type):
                 if tile_type == PLAYER:
                     player_position = (i, j)
@@ -266,6 +333,22 @@ def convert_maze(raw_maze: list[list[str]]) -> tuple[Grid, Entities, Position]:
     return proper_maze, entities, player_position
 
 
+class MoveDelta(NamedTuple):
+    """ What one move or purchase changed, which is all undo and redo need
+        to know. A crate pushed and an entity taken were both at the player's
+        end position before the move. A purchase only changes the stats.
+    """
+    start: Position                 # The player's position before the move
+    end: Position                   # The player's position after the move
+    strength: int                   # The change to the player's strength
+    moves: int                      # The change to the player's moves
+    money: int                      # The change to the player's money
+    crate: Entity | None            # The crate pushed, if any
+    crate_end: Position | None      # Where the crate was pushed to
+    filled: bool                    # True iff the crate filled a goal there
+    taken: Entity | None            # The coin or potion taken, if any
+
+
 class SokobanModel:
     """ A model for a Sokoban game. """
     ITEM_COSTS = {
@@ -289,14 +372,49 @@ class SokobanModel:
         self._maze, self._entities, self._player_position = convert_maze(
             raw_maze)
         self._player = Player(*player_stats)
-
-        self._last_state = {
-            'maze': [[item for item in row] for row in self._maze],
-            'entities': {key: value for key, value in self._entities.items()},
-            'player_stats': player_stats,
-            'player_position': self._player_position,
-            'last_filled': None,
-        }
+        # The positions of the filled goals
+        self._filled_goals = {
+            (row, col) for row, tiles in enumerate(self._maze)
+            for col, tile in enumerate(tiles) if tile is GOAL_TILES[True]}
+        # The number of goals still to fill, so has_won need not scan the maze
+        self._unfilled_goals = sum(tile is GOAL_TILES[False]
+                                   for tiles in self._maze for tile in tiles)
+        self._key = self._compute_key()
+
+        # The moves and purchases made, most recent last, and those undone
+        # since the last one made, most recently undone last
+        self._journal = []
+        self._undone = []
+
+    def _compute_key(self) -> int:
+        """ Returns the Zobrist key of the current state, computed from
+            scratch: the XOR of the numbers of the player's position and
+            stats, every entity and every filled goal.
+        """
+        key = zobrist(PLAYER, self._player_position) ^ self._stats_key()
+        for position, entity in self._entities.items():
+            key ^= zobrist(str(entity), position)
+        for position in self._filled_goals:
+            key ^= zobrist(FILLED_GOAL, position)
+        return key
+
+    def _stats_key(self) -> int:
+        """ Returns the part of the Zobrist key given by the player's stats.
+        """
+        return (zobrist('strength', self._player.get_strength()) ^
+                zobrist('moves', self._player.get_moves_remaining()) ^
+                zobrist('money', self._player.get_money()))
+
+    def get_state_key(self) -> int:
+        """ Returns a 64-bit Zobrist key of the game state: the player's
+            position and stats, the entities and the filled goals. Equal
+            states have equal keys, in any process and after reset(), so
+            keys may be used as cache keys on disk.
+
+        The key is kept up to date by every move, purchase, undo and redo in
+        constant time.
+        """
+        return self._key
 
     def get_shop_items(self) -> dict[str, int]:
         """ Returns a dictionary mapping item names to their cost. """
@@ -311,9 +429,26 @@ class SokobanModel:
         if self._player.get_money() < self.ITEM_COSTS.get(item):
             return False
 
+        # The potion is drunk on the spot, so only the stats change
+        stats_key = self._stats_key()
+        strength = self._player.get_strength()
+        moves = self._player.get_moves_remaining()
+        money = self._player.get_money()
         self._player.add_money(-self.ITEM_COSTS[item])
         self._entities[self._player_position] = ENTITY_IDS_TO_CLASS[item]()
+        self._key ^= zobrist(item, self._player_position)
         self._handle_potion(self._player_position)
+        self._key ^= stats_key ^ self._stats_key()
+
+        # A purchase is journalled like a move which stays put, so undo and
+        # redo never spend money twice or give it back twice
+        self._undone.clear()
+        self._journal.append(MoveDelta(
+            self._player_position, self._player_position,
+            self._player.get_strength() - strength,
+            self._player.get_moves_remaining() - moves,
+            self._player.get_money() - money,
+            None, None, False, None))
         return True
 
     def get_maze(self) -> Grid:
@@ -347,41 +482,96 @@ class SokobanModel:
         """ Returns the amount of money the player has. """
         return self._player.get_money()
 
-    def undo_move(self) -> None:
-        """ Undoes the last valid move made by the player. """
-        self._maze = self._last_state['maze']
-        self._entities = self._last_state['entities']
-        self._player_position = self._last_state['player_position']
-        self._player = Player(*self._last_state['player_stats'])
-        if self._last_state['last_filled'] is not None:
-            row, col = self._last_state['last_filled']
-            self._get_tile(row, col).unfill()
+    def undo_move(self) -> bool:
+        """ Undoes the last valid move or purchase made by the player which
+            has not been undone.
+
+        Returns:
+            True iff there was a move to undo.
+        """
+        if not self._journal:
+            return False
+        delta = self._journal.pop()
+        self._apply_delta(delta, undo=True)
+        self._undone.append(delta)
+        return True
+
+    def redo_move(self) -> bool:
+        """ Makes the last move or purchase undone again, unless a move or
+            purchase has been made since.
+
+        Returns:
+            True iff there was a move to redo.
+        """
+        if not self._undone:
+            return False
+        delta = self._undone.pop()
+        self._apply_delta(delta, undo=False)
+        self._journal.append(delta)
+        return True
+
+    def _apply_delta(self, delta: MoveDelta, undo: bool) -> None:
+        """ Undoes or redoes the changes of a move.
+
+        Parameters:
+            delta: The changes the move made.
+            undo: True to undo the move, False to make it again.
+        """
+        sign = -1 if undo else 1
+        before, after = (delta.end, delta.start) if undo else \
+            (delta.start, delta.end)
+
+        stats_key = self._stats_key()
+        self._player.add_strength(sign * delta.strength)
+        self._player.add_moves_remaining(sign * delta.moves)
+        self._player.add_money(sign * delta.money)
+        self._key ^= stats_key ^ self._stats_key()
+        self._key ^= zobrist(PLAYER, before) ^ zobrist(PLAYER, after)
+        self._player_position = after
+
+        if delta.taken is not None:
+            self._key ^= zobrist(str(delta.taken), delta.end)
+            if undo:
+                self._entities[delta.end] = delta.taken
+            else:
+                self._entities.pop(delta.end)
+
+        if delta.crate is not None:
+            crate_from, crate_to = (delta.crate_end, delta.end) if undo else \
+                (delta.end, delta.crate_end)
+            # A crate which filled a goal is not on the maze, only the goal
+            if not (undo and delta.filled):
+                self._key ^= zobrist(str(delta.crate), crate_from)
+                self._entities.pop(crate_from)
+            if delta.filled:
+                self._key ^= zobrist(FILLED_GOAL, delta.crate_end)
+                row, col = delta.crate_end
+                self._maze[row][col] = GOAL_TILES[not undo]
+                if undo:
+                    self._filled_goals.discard(delta.crate_end)
+                else:
+                    self._filled_goals.add(delta.crate_end)
+                self._unfilled_goals -= sign
+            if undo or not delta.filled:
+                self._key ^= zobrist(str(delta.crate), crate_to)
+                self._entities[crate_to] = delta.crate
 
     def attempt_move(self, direction: str) -> bool:
         """ Attempts to move the player in the given direction.
 
         Parameters:
             direction: The direction to move in. This should be one of the
-                        constants UP, DOWN, LEFT or RIGHT, or 'u' for undo.
+                        constants UP, DOWN, LEFT or RIGHT, or 'u' for undo or
+                        'r' for redo.
 
         Returns:
             True iff the move was successful.
         """
-        # Handle undo move
+        # Handle undo and redo moves
         if direction == 'u':
-            self.undo_move()
-            return True
-
-        # Make a copy of important information about this state to overwrite
-        # self._last_state if the move is successful
-        last_state = {
-            'maze': [[item for item in row] for row in self._maze],
-            'entities': {key: value for key, value in self._entities.items()},
-            'player_stats': (self._player.get_strength(),
-                             self._player.get_moves_remaining()),
-            'player_position': self._player_position,
-            'last_filled': None,
-        }
+            return self.undo_move()
+        if direction == 'r':
+            return self.redo_move()
 
         # Handle directional move
         if not DIRECTION_DELTAS.get(direction):
@@ -397,31 +587,51 @@ class SokobanModel:
             return False
 
         # Handle case where there is a crate in the new position
+        stats_key = self._stats_key()
+        strength = self._player.get_strength()
+        moves = self._player.get_moves_remaining()
+        money = self._player.get_money()
+        crate = crate_end = taken = None
+        filled = False
         entity_present = self._entities.get(new_position)
         if entity_present is not None:
             if entity_present.get_type() == CRATE:
                 if not self._attempt_push(new_position, direction):
                     return False
+                crate = entity_present
+                crate_end = self._get_new_position(new_position, direction)
+                # A crate filling a goal leaves the entities
+                filled = crate_end not in self._entities
             elif entity_present.get_type() == COIN:
                 self._player.add_money(COIN_AMOUNT)
                 self._entities.pop(new_position)
+                self._key ^= zobrist(COIN, new_position)
 
             elif isinstance(entity_present, Potion):
                 self._handle_potion(new_position)
+            if entity_present.get_type() != CRATE:
+                taken = entity_present
 
+        self._key ^= zobrist(PLAYER, self._player_position) ^ \
+            zobrist(PLAYER, new_position)
+        start = self._player_position
         self._player_position = new_position
         self._player.add_moves_remaining(-1)
-
-        self._last_state = last_state
+        self._key ^= stats_key ^ self._stats_key()
+
+        # A new move forgets the moves undone
+        self._undone.clear()
+        self._journal.append(MoveDelta(
+            start, new_position,
+            self._player.get_strength() - strength,
+            self._player.get_moves_remaining() - moves,
+            self._player.get_money() - money,
+            crate, crate_end, filled, taken))
         return True
 
     def has_won(self) -> bool:
         """ Returns True iff the player has won the game. """
-        for row in self._maze:
-            for tile in row:
-                if tile.get_type() == GOAL and not tile.is_filled():
-                    return False
-        return True
+        return self._unfilled_goals == 0
 
     def _get_new_position(self, position: Position, direction: str) -> Position:
         """ Returns the new position for an entity if it were to move in the
@@ -497,16 +707,20 @@ class SokobanModel:
             return False
 
         crate = self._entities.pop(position)
+        self._key ^= zobrist(str(crate), position)
 
         # If the crate would fill an unfilled goal, do so and don't add the
         # crate back to the entities
         if tile.get_type() == GOAL and not tile.is_filled():
-            tile.fill()
-            self._last_state['last_filled'] = (new_row, new_col)
+            self._maze[new_row][new_col] = GOAL_TILES[True]
+            self._filled_goals.add((new_row, new_col))
+            self._unfilled_goals -= 1
+            self._key ^= zobrist(FILLED_GOAL, (new_row, new_col))
             return True
 
         # Otherwise, add the crate back to the entities
         self._entities[(new_row, new_col)] = crate
+        self._key ^= zobrist(str(crate), (new_row, new_col))
         return True
 
     def _handle_potion(self, position: tuple[int, int]) -> None:
@@ -517,4 +731,5 @@ class SokobanModel:
             position: The position of the potion.
         """
         potion = self._entities.pop(position)
+        self._key ^= zobrist(str(potion), position)
         self._player.apply_effect(potion.effect())
@@ -0,0 +1,318 @@
+""" An A* solver for Fancy Sokoban levels under the rules of model.py. """
+import argparse
+import glob
+import heapq
+import itertools
+import time
+from typing import Iterator, NamedTuple
+
+from model import *
+
+# Directions in the order they are tried
+DIRECTIONS = (UP, LEFT, DOWN, RIGHT)
+# The most states expanded before a search gives up
+DEFAULT_MAX_EXPANDED = 2_000_000
+
+# A search state: the player's position, the crates as sorted
+# ((row, col), strength) pairs, a bitmask of the filled goals and a bitmask of
+# the pickups (potions and coins) taken. The player's strength and moves
+# remaining follow from the pickups taken and the moves made.
+State = tuple[Position, tuple[tuple[Position, int], ...], int, int]
+
+
+class SolveResult(NamedTuple):
+    """ The outcome of a search. """
+    moves: str | None       # The moves of a shortest win, None if none found
+    moves_left: int | None  # Moves remaining once it is won
+    expanded: int           # States expanded
+    seconds: float          # Time searched
+    exhausted: bool         # True iff every reachable state was searched
+
+
+class Level:
+    """ The parts of a level which never change while it is played: its walls,
+        goals and pickups, and the squares a crate can never leave.
+    """
+    def __init__(self, model: SokobanModel) -> None:
+        """ Constructor for Level.
+
+        Parameters:
+            model: A model of the level, as loaded or reset.
+        """
+        maze = model.get_maze()
+        self.rows, self.cols = model.get_dimensions()
+        self.walls = frozenset((row, col) for row in range(self.rows)
+                               for col in range(self.cols)
+                               if maze[row][col].is_blocking())
+        self.goals = tuple((row, col) for row in range(self.rows)
+                           for col in range(self.cols)
+                           if maze[row][col].get_type() == GOAL)
+        self.goal_bits = {position: 1 << i
+                          for i, position in enumerate(self.goals)}
+        filled = sum(self.goal_bits[position] for position in self.goals
+                     if maze[position[0]][position[1]].is_filled())
+
+        # Potions and coins, each taken at most once: their positions, bits
+        # and what each adds to the player's strength and moves
+        crates = []
+        self.pickups = {}
+        for position, entity in model.get_entities().items():
+            if entity.get_type() == CRATE:
+                crates.append((position, entity.get_strength()))
+            else:
+                effect = entity.effect() if isinstance(entity, Potion) else {}
+                self.pickups[position] = (1 << len(self.pickups),
+                                          effect.get('strength', 0),
+                                          effect.get('moves', 0))
+        self.strength = model.get_player_strength()
+        self.moves = model.get_player_moves_remaining()
+
+        # A crate in a corner of walls cannot be pushed again, so it is dead
+        # unless it fills a goal there
+        self.dead = frozenset(
+            (row, col) for row in range(self.rows)
+            for col in range(self.cols)
+            if (row, col) not in self.walls and
+            (row, col) not in self.goal_bits and
+            ((row - 1, col) in self.walls or (row + 1, col) in self.walls) and
+            ((row, col - 1) in self.walls or (row, col + 1) in self.walls))
+
+        self.start = (model.get_player_position(), tuple(sorted(crates)),
+                      filled, 0)
+        self.all_goals = (1 << len(self.goals)) - 1
+
+    def bonuses(self, taken: int) -> tuple[int, int]:
+        """ Returns the strength and moves the pickups taken have added.
+
+        Parameters:
+            taken: A bitmask of the pickups taken.
+        """
+        strength = moves = 0
+        for bit, extra_strength, extra_moves in self.pickups.values():
+            if taken & bit:
+                strength += extra_strength
+                moves += extra_moves
+        return strength, moves
+
+    def is_blocked(self, position: Position) -> bool:
+        """ Returns True iff the position is off the maze or a wall.
+
+        Parameters:
+            position: A (row, col) position.
+        """
+        row, col = position
+        return not (0 <= row < self.rows and 0 <= col < self.cols) or \
+            position in self.walls
+
+    def heuristic(self, state: State, strength: int, moves_left: int) -> int:
+        """ Returns a lower bound on the moves left to win from the state, or
+            -1 if it can no longer be won within the moves available.
+
+        Each unfilled goal needs its own crate pushed onto it, one square per
+        move, and the player must walk up to a crate before the first push.
+
+        Parameters:
+            state: A search state.
+            strength: The player's strength in the state.
+            moves_left: The player's moves remaining in the state.
+        """
+        player, crates, filled, taken = state
+        unfilled = [goal for goal in self.goals
+                    if not filled & self.goal_bits[goal]]
+        if not unfilled:
+            return 0
+
+        # Strength and moves the pickups still on the maze could add
+        more_strength = more_moves = 0
+        for bit, extra_strength, extra_moves in self.pickups.values():
+            if not taken & bit:
+                more_strength += extra_strength
+                more_moves += extra_moves
+        movable = [position for position, needed in crates
+                   if position not in self.dead and
+                   needed <= strength + more_strength]
+        if len(movable) < len(unfilled):
+            return -1
+
+        pushes = sum(min(abs(row - crate_row) + abs(col - crate_col)
+                         for crate_row, crate_col in movable)
+                     for row, col in unfilled)
+        walk = min(abs(player[0] - row) + abs(player[1] - col)
+                   for row, col in movable) - 1
+        bound = pushes + max(walk, 0)
+        return bound if bound <= moves_left + more_moves else -1
+
+    def successors(self, state: State, strength: int
+                   ) -> Iterator[tuple[str, State, int]]:
+        """ Yields every valid move from the state as (direction, next state,
+            pickup bit taken or 0).
+
+        Parameters:
+            state: A search state.
+            strength: The player's strength in the state.
+        """
+        player, crates, filled, taken = state
+        crate_at = dict(crates)
+        for direction in DIRECTIONS:
+            row_step, col_step = DIRECTION_DELTAS[direction]
+            target = (player[0] + row_step, player[1] + col_step)
+            if self.is_blocked(target):
+                continue
+            new_crates, new_filled, picked = crates, filled, 0
+
+            if target in crate_at:
+                destination = (target[0] + row_step, target[1] + col_step)
+                if self.is_blocked(destination) or \
+                        destination in crate_at or \
+                        (destination in self.pickups and
+                         not taken & self.pickups[destination][0]) or \
+                        crate_at[target] > strength:
+                    continue
+                moved = dict(crate_at)
+                needed = moved.pop(target)
+                bit = self.goal_bits.get(destination, 0)
+                # A crate filling a goal leaves the maze
+                if bit and not filled & bit:
+                    new_filled = filled | bit
+                else:
+                    moved[destination] = needed
+                new_crates = tuple(sorted(moved.items()))
+            elif target in self.pickups and \
+                    not taken & self.pickups[target][0]:
+                picked = self.pickups[target][0]
+
+            yield direction, (target, new_crates, new_filled,
+                              taken | picked), picked
+
+
+def solve(maze_file: str, max_expanded: int = DEFAULT_MAX_EXPANDED
+          ) -> SolveResult:
+    """ Searches for a shortest sequence of moves winning the level within
+        the player's moves, potions included. Purchases are not made, as the
+        moves must replay through attempt_move.
+
+    Parameters:
+        maze_file: The path to the maze file (e.g. 'maze_files/maze1.txt')
+        max_expanded: The most states to expand before giving up.
+
+    Returns:
+        The result of the search.
+    """
+    start_time = time.perf_counter()
+    level = Level(SokobanModel(maze_file))
+    start = level.start
+    if start[2] == level.all_goals:
+        return SolveResult('', level.moves, 0, 0.0, True)
+
+    # The transposition table keeps the fewest moves each state was reached
+    # in, and the move which got there. A state reached in fewer moves has
+    # at least as many moves remaining, so later arrivals are dropped
+    best = {start: 0}
+    parent = {start: None}
+    counter = itertools.count()
+    h = level.heuristic(start, level.strength, level.moves)
+    frontier = [(h, 0, next(counter), start)] if h >= 0 else []
+    expanded = 0
+
+    while frontier:
+        _, negative_made, _, state = heapq.heappop(frontier)
+        made = -negative_made
+        if made > best[state]:
+            continue
+        expanded += 1
+        if expanded > max_expanded:
+            return SolveResult(None, None, expanded,
+                               time.perf_counter() - start_time, False)
+
+        extra_strength, extra_moves = level.bonuses(state[3])
+        strength = level.strength + extra_strength
+        for direction, following, picked in level.successors(state,
+                                                             strength):
+            next_strength, next_moves = strength, level.moves + extra_moves
+            if picked:
+                _, added_strength, added_moves = level.pickups[following[0]]
+                next_strength += added_strength
+                next_moves += added_moves
+            moves_left = next_moves - made - 1
+
+            if following[2] == level.all_goals:
+                parent[following] = (state, direction)
+                moves = _path(parent, following)
+                return SolveResult(moves, moves_left, expanded,
+                                   time.perf_counter() - start_time, True)
+            # The game is lost once the moves run out short of a win
+            if moves_left <= 0:
+                continue
+            if best.get(following, made + 2) <= made + 1:
+                continue
+            h = level.heuristic(following, next_strength, moves_left)
+            if h < 0:
+                continue
+            best[following] = made + 1
+            parent[following] = (state, direction)
+            heapq.heappush(frontier, (made + 1 + h, -(made + 1),
+                                      next(counter), following))
+
+    return SolveResult(None, None, expanded,
+                       time.perf_counter() - start_time, True)
+
+
+def _path(parent: dict, state: State) -> str:
+    """ Returns the moves from the start to the given state.
+
+    Parameters:
+        parent: The state and move each state was reached from.
+        state: The state to reach.
+    """
+    moves = []
+    while parent[state] is not None:
+        state, direction = parent[state]
+        moves.append(direction)
+    return ''.join(reversed(moves))
+
+
+def replay(maze_file: str, moves: str) -> bool:
+    """ Returns True iff playing the moves through SokobanModel.attempt_move
+        wins the level, every move being valid and made with moves remaining.
+
+    Parameters:
+        maze_file: The path to the maze file.
+        moves: The moves to play, each one of UP, DOWN, LEFT or RIGHT.
+    """
+    model = SokobanModel(maze_file)
+    for direction in moves:
+        if model.has_won() or model.get_player_moves_remaining() <= 0:
+            return False
+        if not model.attempt_move(direction):
+            return False
+    return model.has_won()
+
+
+def main() -> None:
+    """ Solves every maze file given (all of maze_files/ by default), checks
+        each solution by replaying it and prints how tight each budget is.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('maze_files', nargs='*',
+                        default=sorted(glob.glob('maze_files/*.txt')))
+    parser.add_argument('--max-expanded', type=int,
+                        default=DEFAULT_MAX_EXPANDED)
+    args = parser.parse_args()
+
+    for maze_file in args.maze_files:
+        result = solve(maze_file, args.max_expanded)
+        stats = f'{result.expanded} states in {result.seconds:.2f}s'
+        if result.moves is None:
+            verdict = 'no win by moves alone' if result.exhausted \
+                else 'gave up'
+            print(f'{maze_file}: {verdict} ({stats})')
+            continue
+        if not replay(maze_file, result.moves):
+            raise AssertionError(f'{maze_file}: {result.moves!r} does not '
+                                 f'replay to a win')
+        print(f'{maze_file}: {result.moves} ({len(result.moves)} moves, '
+              f'{result.moves_left} to spare; {stats})')
+
+
+if __name__ == '__main__':
+    main()
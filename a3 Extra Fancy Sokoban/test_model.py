@@ -0,0 +1,191 @@
+""" Tests of the a3 SokobanModel's state keys and undo and redo journal. """
+import hashlib
+import os
+import random
+import unittest
+
+from model import *
+
+MAZE_FILES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          'maze_files')
+# A shortest win of maze3
+MAZE3_WIN = 'sdasssdddwawwasasdddsdw'
+
+
+def load(name: str) -> SokobanModel:
+    """ Returns a model of the named maze file. """
+    return SokobanModel(os.path.join(MAZE_FILES, name))
+
+
+def snapshot(model: SokobanModel) -> tuple:
+    """ Returns everything undo and redo must restore, as plain values. """
+    return (model.get_player_position(),
+            sorted((position, str(entity))
+                   for position, entity in model.get_entities().items()),
+            [[str(tile) for tile in row] for row in model.get_maze()],
+            model.get_player_strength(), model.get_player_moves_remaining(),
+            model.get_player_money(), model.has_won(),
+            model.get_state_key())
+
+
+class StateKeyTest(unittest.TestCase):
+    """ get_state_key() identifies the state, and is kept up to date. """
+    def test_equal_states_equal_keys(self) -> None:
+        rng = random.Random(22)
+        for name in ('maze1.txt', 'maze2.txt', 'maze3.txt', 'coin_maze.txt'):
+            keys, states = {}, {}
+            for _ in range(200):
+                model = load(name)
+                for _ in range(rng.randrange(30)):
+                    if rng.random() < 0.1:
+                        model.attempt_purchase(
+                            rng.choice(list(model.get_shop_items())))
+                    else:
+                        model.attempt_move(rng.choice('wasd'))
+                    # Every state but the key itself
+                    state = repr(snapshot(model)[:-1])
+                    key = model.get_state_key()
+                    self.assertEqual(key, model._compute_key())
+                    self.assertEqual(keys.setdefault(state, key), key)
+                    self.assertEqual(states.setdefault(key, state), state)
+
+    def test_transposed_moves(self) -> None:
+        # Going round a square either way leaves the same state
+        model, other = load('maze1.txt'), load('maze1.txt')
+        for move in (DOWN, RIGHT, UP, LEFT):
+            self.assertTrue(model.attempt_move(move))
+        for move in (RIGHT, DOWN, LEFT, UP):
+            self.assertTrue(other.attempt_move(move))
+        self.assertEqual(model.get_state_key(), other.get_state_key())
+        self.assertNotEqual(model.get_state_key(), load('maze1.txt')
+                            .get_state_key())
+
+    def test_reset(self) -> None:
+        model = load('maze3.txt')
+        start = model.get_state_key()
+        for move in MAZE3_WIN:
+            model.attempt_move(move)
+            # Filling a goal changes the key too
+            self.assertEqual(model.get_state_key(), model._compute_key())
+        self.assertNotEqual(model.get_state_key(), start)
+        model.reset()
+        self.assertEqual(model.get_state_key(), start)
+        self.assertEqual(load('maze3.txt').get_state_key(), start)
+
+    def test_numbers_are_fixed(self) -> None:
+        # The same in every process, so keys may be stored
+        digest = hashlib.blake2b(b'moves@5', digest_size=8).digest()
+        self.assertEqual(zobrist('moves', 5),
+                         int.from_bytes(digest, 'big'))
+        self.assertLess(zobrist(PLAYER, (2, 4)), 1 << ZOBRIST_BITS)
+
+
+class JournalTest(unittest.TestCase):
+    """ Undo and redo replay a journal of move and purchase deltas. """
+    def test_nothing_to_undo_or_redo(self) -> None:
+        model = load('maze1.txt')
+        start = snapshot(model)
+        self.assertFalse(model.undo_move())
+        self.assertFalse(model.redo_move())
+        self.assertFalse(model.attempt_move('u'))
+        self.assertEqual(snapshot(model), start)
+
+    def test_undo_to_start_and_redo_to_win(self) -> None:
+        model = load('maze3.txt')
+        states = [snapshot(model)]
+        for move in MAZE3_WIN:
+            self.assertTrue(model.attempt_move(move))
+            states.append(snapshot(model))
+        self.assertTrue(model.has_won())
+
+        for state in reversed(states[:-1]):
+            self.assertTrue(model.attempt_move('u'))
+            self.assertEqual(snapshot(model), state)
+        self.assertFalse(model.undo_move())
+        for state in states[1:]:
+            self.assertTrue(model.attempt_move('r'))
+            self.assertEqual(snapshot(model), state)
+        self.assertFalse(model.redo_move())
+        self.assertTrue(model.has_won())
+
+    def test_undo_unfills_goal(self) -> None:
+        model = load('maze3.txt')
+        for move in MAZE3_WIN:
+            model.attempt_move(move)
+        model.undo_move()
+        self.assertFalse(model.has_won())
+        self.assertIn(GOAL, [str(tile) for row in model.get_maze()
+                             for tile in row])
+        self.assertTrue(model.attempt_move(MAZE3_WIN[-1]))
+        self.assertTrue(model.has_won())
+
+    def test_move_forgets_moves_undone(self) -> None:
+        model = load('maze1.txt')
+        model.attempt_move(DOWN)
+        model.undo_move()
+        model.attempt_move(RIGHT)
+        self.assertFalse(model.redo_move())
+
+    def test_coin_purchase_undo(self) -> None:
+        model = load('coin_maze.txt')
+        start = snapshot(model)
+        self.assertTrue(model.attempt_move(RIGHT))
+        self.assertEqual(model.get_player_money(), COIN_AMOUNT)
+        after_coin = snapshot(model)
+        self.assertTrue(model.attempt_purchase(STRENGTH_POTION))
+        self.assertEqual(model.get_player_money(), 0)
+        after_purchase = snapshot(model)
+
+        # Undo takes back the purchase, then the coin
+        self.assertTrue(model.undo_move())
+        self.assertEqual(snapshot(model), after_coin)
+        self.assertTrue(model.undo_move())
+        self.assertEqual(snapshot(model), start)
+        self.assertGreaterEqual(model.get_player_money(), 0)
+
+        self.assertTrue(model.redo_move())
+        self.assertTrue(model.redo_move())
+        self.assertEqual(snapshot(model), after_purchase)
+        self.assertEqual(model.get_player_money(), 0)
+
+    def test_purchase_forgets_moves_undone(self) -> None:
+        model = load('coin_maze.txt')
+        model.attempt_move(RIGHT)
+        model.attempt_move(LEFT)
+        model.undo_move()
+        model.attempt_purchase(MOVE_POTION)
+        self.assertFalse(model.redo_move())
+        self.assertEqual(model.get_player_money(), 0)
+
+    def test_random_play(self) -> None:
+        rng = random.Random(0)
+        for name in ('maze1.txt', 'maze2.txt', 'maze3.txt', 'coin_maze.txt'):
+            for _ in range(50):
+                model = load(name)
+                states, at = [snapshot(model)], 0
+                for _ in range(40):
+                    choice = rng.random()
+                    if choice < 0.25:
+                        self.assertEqual(model.undo_move(), at > 0)
+                        at = max(at - 1, 0)
+                    elif choice < 0.4:
+                        self.assertEqual(model.redo_move(),
+                                         at < len(states) - 1)
+                        at = min(at + 1, len(states) - 1)
+                    else:
+                        if choice < 0.5:
+                            made = model.attempt_purchase(
+                                rng.choice(list(model.get_shop_items())))
+                        else:
+                            made = model.attempt_move(rng.choice('wasd'))
+                        if made:
+                            states[at + 1:] = [snapshot(model)]
+                            at += 1
+                    self.assertEqual(snapshot(model), states[at])
+                    self.assertEqual(model.get_state_key(),
+                                     model._compute_key())
+                    self.assertGreaterEqual(model.get_player_money(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+""" Tests of the A* Fancy Sokoban solver. """
+import os
+import unittest
+
+from model import *
+from solver import solve, replay
+
+MAZE_FILES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          'maze_files')
+
+
+def maze(name: str) -> str:
+    """ Returns the path to the named maze file. """
+    return os.path.join(MAZE_FILES, name)
+
+
+def shortest_win(maze_file: str) -> str | None:
+    """ Returns a shortest win of the level found by breadth-first search
+        through SokobanModel.attempt_move, or None if there is none.
+
+    Parameters:
+        maze_file: The path to the maze file.
+    """
+    model = SokobanModel(maze_file)
+    seen = {model.get_state_key()}
+    frontier = ['']
+    while frontier:
+        following = []
+        for path in frontier:
+            model = SokobanModel(maze_file)
+            for direction in path:
+                model.attempt_move(direction)
+            for direction in (UP, LEFT, DOWN, RIGHT):
+                if model.get_player_moves_remaining() <= 0:
+                    break
+                if not model.attempt_move(direction):
+                    continue
+                if model.has_won():
+                    return path + direction
+                key = model.get_state_key()
+                if key not in seen:
+                    seen.add(key)
+                    following.append(path + direction)
+                model.undo_move()
+        frontier = following
+    return None
+
+
+class SolveTest(unittest.TestCase):
+    """ solve() finds shortest wins which replay through the model. """
+    def test_shipped_mazes(self) -> None:
+        for name, length in (('maze1.txt', 11), ('maze2.txt', 13),
+                             ('maze3.txt', 23)):
+            result = solve(maze(name))
+            self.assertIsNotNone(result.moves, name)
+            self.assertEqual(len(result.moves), length, name)
+            self.assertTrue(replay(maze(name), result.moves), name)
+            self.assertEqual(len(shortest_win(maze(name))), length, name)
+
+            model = SokobanModel(maze(name))
+            for direction in result.moves:
+                model.attempt_move(direction)
+            self.assertEqual(model.get_player_moves_remaining(),
+                             result.moves_left)
+
+    def test_no_win_by_moves_alone(self) -> None:
+        result = solve(maze('coin_maze.txt'))
+        self.assertIsNone(result.moves)
+        self.assertTrue(result.exhausted)
+        self.assertIsNone(shortest_win(maze('coin_maze.txt')))
+
+    def test_gives_up(self) -> None:
+        result = solve(maze('maze3.txt'), max_expanded=10)
+        self.assertIsNone(result.moves)
+        self.assertFalse(result.exhausted)
+
+
+class ReplayTest(unittest.TestCase):
+    """ replay() accepts only sequences of valid moves ending in a win. """
+    def test_rejects(self) -> None:
+        moves = solve(maze('maze1.txt')).moves
+        self.assertFalse(replay(maze('maze1.txt'), moves[:-1]))
+        # Moves past the win
+        self.assertFalse(replay(maze('maze1.txt'), moves + moves[-1]))
+        # A move into a wall
+        self.assertFalse(replay(maze('maze1.txt'), UP * 20))
+
+
+if __name__ == '__main__':
+    unittest.main()